@@ -0,0 +1,360 @@
+# Throughput benchmarks of the log parsing and analysis hot paths.
+#
+# Every stage runs on fixed synthetic logs of several sizes, written once by
+# generator/log_generator.py from a fixed seed, and reports items/s, MB/s of the log the
+# stage's input came from, and peak RSS. Each (stage, size) runs in a fresh process so the
+# peak RSS belongs to that stage alone. Results are stored per commit under results/, and
+# the run fails when a stage's throughput dropped by more than the tolerance against the
+# results of the nearest ancestor commit (or --baseline).
+import argparse, json, os, platform, statistics, subprocess, sys, tempfile, time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [os.path.join(ROOT_DIR, 'log-chomper'), os.path.join(ROOT_DIR, 'sdk-plan-notebooks'),
+                os.path.join(ROOT_DIR, 'generator')]
+
+DEFAULT_SIZES = '1M,10M'
+DEFAULT_REPEAT = 5
+# Relative throughput drop against the baseline that fails the run
+DEFAULT_TOLERANCE = 0.10
+# Every timed repetition calls the stage often enough to take at least this long, so fast
+# stages on small logs are not dominated by timer noise
+MIN_REPETITION_SECONDS = 0.2
+# Seed of the synthetic logs; bump INPUT_VERSION whenever the generated logs change so
+# stale inputs are regenerated and results are not compared across different inputs
+INPUT_SEED = 1
+INPUT_VERSION = 1
+
+
+# Stage setups: load the inputs of a stage from a log file outside of the timed region and
+# return (inputs, number of input items, bytes of log the inputs represent)
+def _sdk_lines(log_file):
+    with open(log_file, encoding='utf-8') as f:
+        lines = [line for line in f if 'SDK DEBUG ' in line]
+    return lines, len(lines), sum(len(line.encode()) for line in lines)
+
+
+def _log_file(log_file):
+    with open(log_file, 'rb') as f:
+        lines = sum(1 for _ in f)
+    return log_file, lines, os.path.getsize(log_file)
+
+
+def _sdk_entries(log_file):
+    import log_chomper
+    records = list(log_chomper.iter_log_file(log_file))
+    return records, len(records), os.path.getsize(log_file)
+
+
+def _merged_records(log_file):
+    import log_chomper
+    records, _, size = _sdk_entries(log_file)
+    merged = log_chomper._create_merged_records(records, log_chomper.RequestResponseMatcher())
+    return merged, len(merged), size
+
+
+def _invocation_urls(log_file):
+    records, _, size = _sdk_entries(log_file)
+    urls = [record['invocation_url'] for record in records if 'invocation_url' in record]
+    return urls, len(urls), size
+
+
+def _terraform_records(log_file):
+    import commonlib.prepdata as prepdata
+    records = prepdata.read_json_from_file(log_file, prefilter=True)
+    return records, len(records), os.path.getsize(log_file)
+
+
+def _sdk_records(log_file):
+    import commonlib.prep_sdk_data as prep_sdk_data
+    records = prep_sdk_data.read_json_from_file(log_file, prefilter=True)
+    return records, len(records), os.path.getsize(log_file)
+
+
+# Timed stage bodies
+def _parse_log_lines(lines):
+    import log_chomper
+    for line in lines:
+        log_chomper._parse_log_line(line)
+
+
+def _read_sdk_entries(log_file):
+    import log_chomper
+    for _ in log_chomper.iter_log_file(log_file):
+        pass
+
+
+def _create_merged_records(records):
+    import log_chomper
+    log_chomper._create_merged_records(records, log_chomper.RequestResponseMatcher())
+
+
+def _group_response_times(stats):
+    def run(merged):
+        import log_chomper
+        log_chomper._group_response_times(merged, stats)
+    return run
+
+
+def _strip_and_replace_guid(urls):
+    import commonlib.prep_sdk_data as prep_sdk_data
+    for url in urls:
+        prep_sdk_data.strip_and_replace_guid(url)
+
+
+def _normalize_terraform_records(records):
+    import commonlib.prepdata as prepdata
+    prepdata.normalize_records(records)
+
+
+def _normalize_sdk_records(records):
+    import commonlib.prep_sdk_data as prep_sdk_data
+    prep_sdk_data.normalize_records(records)
+
+
+# Stage name -> (setup, timed body)
+STAGES = {
+    'parse_log_line': (_sdk_lines, _parse_log_lines),
+    'read_sdk_entries': (_log_file, _read_sdk_entries),
+    'create_merged_records': (_sdk_entries, _create_merged_records),
+    'group_response_times[exact]': (_merged_records, _group_response_times('exact')),
+    'group_response_times[sketch]': (_merged_records, _group_response_times('sketch')),
+    'group_response_times[vectorized]': (_merged_records, _group_response_times('vectorized')),
+    'strip_and_replace_guid': (_invocation_urls, _strip_and_replace_guid),
+    'normalize_terraform_records': (_terraform_records, _normalize_terraform_records),
+    'normalize_sdk_records': (_sdk_records, _normalize_sdk_records),
+}
+
+
+# Peak resident set size of this process in kilobytes, None where unavailable
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+# Empty the memoization caches of the parsers, so every repetition does the work of a
+# fresh run instead of hitting the URLs and timestamps cached by the previous one
+def _clear_caches():
+    import commonlib.urlnorm as urlnorm
+    import commonlib.timestamps as timestamps
+    urlnorm.normalize_url.cache_clear()
+    timestamps._epoch_seconds.cache_clear()
+
+
+# Run one stage in this process and return its measurements; invoked in a child process
+# by run_stage
+def measure_stage(stage, log_file, repeat):
+    setup, body = STAGES[stage]
+    # The normalizers write their output files and error logs to the working directory
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    os.chdir(workdir)
+    os.environ.update(NORMALIZED_TERRAFORM_LOG_PATH=os.path.join(workdir, 'terraform.json'),
+                      NORMALIZED_GENESYS_SDK_PATH=os.path.join(workdir, 'sdk.json'),
+                      OUTPUT_FORMAT='json')
+
+    inputs, items, size = setup(log_file)
+    setup_rss_kb = _peak_rss_kb()
+
+    def timed(number):
+        elapsed = 0
+        for _ in range(number):
+            _clear_caches()
+            start = time.perf_counter()
+            body(inputs)
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    # The first call also warms up imports and allocator, and calibrates the number of
+    # calls per repetition
+    number = max(1, int(MIN_REPETITION_SECONDS / max(timed(1), 1e-6)) + 1)
+    seconds = [timed(number) / number for _ in range(repeat)]
+    peak_rss_kb = _peak_rss_kb()
+    return {
+        'items': items,
+        'bytes': size,
+        'calls_per_repetition': number,
+        'seconds': seconds,
+        'setup_rss_kb': setup_rss_kb,
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+# Run one stage on one log in a fresh interpreter and add the throughput figures
+def run_stage(stage, log_file, size_label, repeat):
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure-stage', stage,
+                              '--input', os.path.abspath(log_file), '--repeat', str(repeat)],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f'stage {stage} failed on {log_file}:\n{process.stderr}')
+    # The stages may print progress; the measurements are the last line
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    best = min(result['seconds'])
+    result.update({
+        'stage': stage,
+        'size': size_label,
+        'best_seconds': best,
+        'median_seconds': statistics.median(result['seconds']),
+        'items_per_second': result['items'] / best,
+        'mb_per_second': result['bytes'] / 1024 ** 2 / best,
+    })
+    return result
+
+
+# Path of the synthetic log of a size, generating it on first use
+def input_log(data_dir, size_label):
+    import log_generator
+    os.makedirs(data_dir, exist_ok=True)
+    log_file = os.path.join(data_dir, f'bench-{size_label}-seed{INPUT_SEED}-v{INPUT_VERSION}.log')
+    if not os.path.exists(log_file):
+        spec = log_generator.LogSpec(size=log_generator.parse_size(size_label), malformed_rate=0,
+                                     seed=INPUT_SEED)
+        print(f'generating {size_label} benchmark log {log_file}')
+        log_generator.LogGenerator(spec).write(log_file + '.tmp')
+        os.replace(log_file + '.tmp', log_file)
+    return log_file
+
+
+def _git(*args):
+    process = subprocess.run(['git', *args], cwd=ROOT_DIR, stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, text=True)
+    return process.stdout.strip() if process.returncode == 0 else ''
+
+
+# Commit the results belong to, marked dirty when tracked files have uncommitted changes
+def current_commit():
+    commit = _git('rev-parse', 'HEAD') or 'unknown'
+    if _git('status', '--porcelain', '--untracked-files=no'):
+        commit += '-dirty'
+    return commit
+
+
+# Stored results of the nearest ancestor commit, or of a commit or file given explicitly
+def load_baseline(results_dir, commit, baseline=None):
+    if baseline:
+        path = baseline if os.path.isfile(baseline) else \
+            os.path.join(results_dir, f"{_git('rev-parse', baseline) or baseline}.json")
+        candidates = [path]
+    else:
+        # A clean commit is compared with its parents, a dirty tree with its own commit too
+        ancestors = _git('rev-list', '--max-count=200', 'HEAD').split()
+        if not commit.endswith('-dirty'):
+            ancestors = ancestors[1:]
+        candidates = [os.path.join(results_dir, f'{ancestor}.json') for ancestor in ancestors]
+    for path in candidates:
+        if os.path.isfile(path):
+            with open(path) as f:
+                return json.load(f)
+    return None
+
+
+# Attach the change against the baseline to every result; returns the regressed results
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    previous = {(result['stage'], result['size']): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get((result['stage'], result['size']))
+        if before is None:
+            continue
+        result['change'] = result['items_per_second'] / before['items_per_second'] - 1
+        result['regression'] = result['change'] < -tolerance
+        if result['regression']:
+            regressions.append(result)
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'Stage':<34} {'Size':>5} {'Items':>9} {'Best s':>8} {'Items/s':>11} {'MB/s':>8} "
+          f"{'RSS MB':>8} {'Change':>8}")
+    print('-' * 99)
+    for result in results:
+        rss = result['peak_rss_kb']
+        change = result.get('change')
+        print(f"{result['stage']:<34} {result['size']:>5} {result['items']:>9} {result['best_seconds']:>8.3f} "
+              f"{result['items_per_second']:>11,.0f} {result['mb_per_second']:>8.1f} "
+              f"{'-' if rss is None else f'{rss / 1024:.1f}':>8} "
+              f"{'' if change is None else f'{change:+.1%}':>8}"
+              f"{'  REGRESSION' if result.get('regression') else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the log parsing and analysis hot paths')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='Comma separated sizes of the synthetic logs (default: %(default)s)')
+    parser.add_argument('--stages', help=f"Comma separated stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Timed repetitions per stage; the best one is reported (default: %(default)s)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative throughput drop that fails the run (default: %(default)s)')
+    parser.add_argument('--baseline', help='Commit or results file to compare with (default: nearest '
+                                           'ancestor commit with stored results)')
+    parser.add_argument('--data-dir', default=os.path.join(BENCH_DIR, 'data'),
+                        help='Directory of the generated benchmark logs')
+    parser.add_argument('--results-dir', default=os.path.join(BENCH_DIR, 'results'),
+                        help='Directory of the results stored per commit')
+    parser.add_argument('--no-save', action='store_true', help='Do not store the results of this run')
+    parser.add_argument('--measure-stage', help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_stage:
+        print(json.dumps(measure_stage(args.measure_stage, args.input, args.repeat)))
+        return
+
+    stages = args.stages.split(',') if args.stages else list(STAGES)
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+
+    results = []
+    for size_label in args.sizes.split(','):
+        log_file = input_log(args.data_dir, size_label)
+        for stage in stages:
+            print(f'running {stage} on {size_label}')
+            results.append(run_stage(stage, log_file, size_label, args.repeat))
+
+    commit = current_commit()
+    baseline = load_baseline(args.results_dir, commit, args.baseline)
+    if baseline and baseline.get('input_version') != INPUT_VERSION:
+        print(f"baseline {baseline['commit']} ran on other inputs, not comparing")
+        baseline = None
+    elif baseline and (baseline.get('python'), baseline.get('platform')) != \
+            (platform.python_version(), platform.platform()):
+        print(f"warning: baseline {baseline['commit']} ran on Python {baseline.get('python')} on "
+              f"{baseline.get('platform')}, results are only comparable on the same machine")
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    print_results(results)
+    if baseline:
+        print(f"\ncompared with {baseline['commit']}, tolerance {args.tolerance:.0%}")
+    else:
+        print('\nno baseline results found')
+
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        results_file = os.path.join(args.results_dir, f'{commit}.json')
+        with open(results_file, 'w') as f:
+            json.dump({
+                'commit': commit,
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'input_version': INPUT_VERSION,
+                'repeat': args.repeat,
+                'results': results,
+            }, f, indent=4)
+        print(f'results saved to {results_file}')
+
+    if regressions:
+        print(f'{len(regressions)} stages regressed by more than {args.tolerance:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
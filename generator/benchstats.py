@@ -0,0 +1,109 @@
+# Robust statistics over repeated benchmark runs of provider versions
+import random, statistics
+
+# Number of bootstrap resamples used for the confidence interval of the median
+DEFAULT_BOOTSTRAP_RESAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.95
+# Relative slowdown of the median against the previous version flagged as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.05
+
+
+# Percentile of sorted values with linear interpolation between closest ranks
+def percentile(sorted_values, p):
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+# Percentile bootstrap confidence interval of the median; the seed makes the interval
+# reproducible for the same samples
+def bootstrap_ci(values, resamples=DEFAULT_BOOTSTRAP_RESAMPLES, confidence=DEFAULT_CONFIDENCE, seed=0):
+    if len(values) < 2:
+        return values[0], values[0]
+    rng = random.Random(seed)
+    medians = sorted(statistics.median(rng.choices(values, k=len(values))) for _ in range(resamples))
+    tail = (1 - confidence) / 2 * 100
+    return percentile(medians, tail), percentile(medians, 100 - tail)
+
+
+# Summarize the timed, successful runs of one version
+def summarize_version(version, samples, resamples=DEFAULT_BOOTSTRAP_RESAMPLES, confidence=DEFAULT_CONFIDENCE):
+    timed = [sample for sample in samples if not sample['warmup']]
+    successful = [sample for sample in timed if sample['returncode'] == 0]
+    durations = sorted(sample['duration'] for sample in successful)
+    summary = {
+        'version': version,
+        'runs': len(durations),
+        'failures': len(timed) - len(durations),
+        'concurrency': timed[0]['concurrency'] if timed else None,
+    }
+    if not durations:
+        return summary
+
+    ci_low, ci_high = bootstrap_ci(durations, resamples, confidence)
+    q1, q3 = percentile(durations, 25), percentile(durations, 75)
+    summary.update({
+        'median': statistics.median(durations),
+        'q1': q1,
+        'q3': q3,
+        'iqr': q3 - q1,
+        'ci_low': ci_low,
+        'ci_high': ci_high,
+        'min': durations[0],
+        'max': durations[-1],
+    })
+
+    cpu = [sample['cpu_seconds'] for sample in successful if sample.get('cpu_seconds') is not None]
+    rss = [sample['max_rss_kb'] for sample in successful if sample.get('max_rss_kb') is not None]
+    if cpu:
+        summary['cpu_seconds_median'] = statistics.median(cpu)
+    if rss:
+        summary['max_rss_kb_median'] = statistics.median(rss)
+    return summary
+
+
+# Summarize the samples of every version, in the order the versions were benchmarked
+def summarize(samples, resamples=DEFAULT_BOOTSTRAP_RESAMPLES, confidence=DEFAULT_CONFIDENCE):
+    by_version = {}
+    for sample in samples:
+        by_version.setdefault(sample['version'], []).append(sample)
+    return [summarize_version(version, version_samples, resamples, confidence)
+            for version, version_samples in by_version.items()]
+
+
+# Compare every version with the previous one that has results. A version regresses when
+# its median is more than `threshold` slower and its confidence interval lies entirely
+# above the previous version's interval, so noise alone does not raise a flag.
+def flag_regressions(summaries, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    previous = None
+    for summary in summaries:
+        if 'median' not in summary:
+            continue
+        if previous is not None:
+            change = summary['median'] / previous['median'] - 1
+            summary['baseline_version'] = previous['version']
+            summary['change'] = change
+            summary['regression'] = change > threshold and summary['ci_low'] > previous['ci_high']
+        previous = summary
+    return [summary for summary in summaries if summary.get('regression')]
+
+
+# Print a table of the version summaries
+def print_summary(summaries, confidence=DEFAULT_CONFIDENCE):
+    ci = f'{confidence:.0%} CI'
+    print(f"\n{'Version':<10} {'Runs':>5} {'Median':>9} {'IQR':>8} {ci:>19} {'CPU s':>8} {'RSS MB':>8} {'Change':>8}")
+    print('-' * 84)
+    for summary in summaries:
+        if 'median' not in summary:
+            print(f"{summary['version']:<10} {summary['runs']:>5} {'all runs failed':>9}")
+            continue
+        interval = f"{summary['ci_low']:.2f}-{summary['ci_high']:.2f}"
+        cpu = summary.get('cpu_seconds_median')
+        rss = summary.get('max_rss_kb_median')
+        change = summary.get('change')
+        print(f"{summary['version']:<10} {summary['runs']:>5} {summary['median']:>9.2f} {summary['iqr']:>8.2f} "
+              f"{interval:>19} {'-' if cpu is None else f'{cpu:.2f}':>8} "
+              f"{'-' if rss is None else f'{rss / 1024:.1f}':>8} "
+              f"{'' if change is None else f'{change:+.1%}':>8}"
+              f"{'  REGRESSION' if summary.get('regression') else ''}")
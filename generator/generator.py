@@ -1,10 +1,17 @@
-# Import required libraries for subprocess execution, timing, system operations and JSON handling
-import subprocess, time, sys, json
+# Import required libraries for system operations, JSON handling and argument parsing
+import sys, json, argparse
+from runner import BenchmarkRunner
+import benchstats
+import workload
 
 # Default version placeholder used in provider.tf
 placeholder_version = '0.0.0'
 # File to store timing data results
 plan_data_file = 'data.json'
+# File to store the per-version statistics of repeated runs
+summary_data_file = 'summary.json'
+# File to store the spec of the generated workload
+workload_data_file = 'workload.json'
 
 # List of Terraform provider versions to test
 versions = [
@@ -41,108 +48,99 @@ versions = [
     '1.49.1',
     ]
 
-# Class to store details about each Terraform plan execution
-class PlanDetails:
-    def __init__(self, version, duration):
-        self.version = version
-        self.duration = duration
-    
-    # Convert plan details to dictionary format for JSON serialization
-    def to_dict(self):
-        return {
-            'version': self.version,
-            'duration': self.duration
-        }
-    
 # Write collected timing data to JSON file
-def write_data_to_file(data):
-    with open(plan_data_file, 'w', encoding='utf-8') as f:
+def write_data_to_file(data, file_name=plan_data_file):
+    with open(file_name, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
 
-# Main function to test different Terraform versions
-def test_versions(command):
-    data = []
-    last_version = versions[len(versions) - 1]
-    # Iterate through versions, testing each one
-    for i, prev in enumerate(versions):
-        if i == len(versions) -1:
-            break
-        current_index = i + 1
-        current_version = versions[current_index]
-        replace_version(prev, current_version)
-        
-        print('sleeping...')
-        time.sleep(1)
-
-        run_terraform_init_upgrade()
-
-        # Time the execution of terraform command
-        start = time.time()
-        run_terraform_command(version=current_version, command=command)
-        end = time.time()
-
-        duration = end - start 
-
-        # Store results
-        plan = PlanDetails(current_version, duration)
-        data.append(plan.to_dict())
-    
-    write_data_to_file(data)
-    replace_version(last_version, placeholder_version)
-
-# Run terraform init with upgrade flag
-def run_terraform_init_upgrade():
-    command = 'terraform init -upgrade'
-    subprocess.run(command, shell=True)
-
-# Execute terraform command and capture output
-def run_terraform_command(version, command):
-    v = version.replace('.', '_')
-    output_file_name = f'./plans/{v}.json'
-    
-    with open(output_file_name, 'w') as file:
-        process = subprocess.run(command,  stdout=file, stderr=file)
-
-    if process.returncode == 0:
-        print('finished successful plan')
-    else:
-        print(f'error occurred: {process.stderr.decode()}')
-        sys.exit()
-
-# Update provider version in provider.tf file
-def replace_version(prev, new):
-    print(f'replacing {prev} with {new}')
-
-    file_name = 'provider.tf'
-    with open(file_name, 'r') as file:
-        filedata = file.read()
-    filedata = filedata.replace(prev, new)
-    with open(file_name, 'w') as file:
-        file.write(filedata)
-
-# Generate Terraform configuration file with 296 queue resources and data sources
-def write_queues_file():
-    with open('queues.tf', 'w') as txt_file:
-        for x in range(296):
-            txt_file.write(f'\nresource "genesyscloud_routing_queue" "queue{x}" {{ name = "a queue {x}" }} \n')
-            txt_file.write(f'\ndata "genesyscloud_routing_queue" "queue{x}" {{ name = genesyscloud_routing_queue.queue{x}.name }} \n')
-
-# Test a single version of Terraform
-def test_current_version(id, command):
-    start = time.time()
-    run_terraform_command(id, command)
-    end = time.time()
-    print(f'\nFinished in {end - start} for {id}\n')
+# Parse KEY=VALUE environment overrides from the command line
+def parse_env(assignments):
+    env = {}
+    for assignment in assignments:
+        key, sep, value = assignment.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f'expected KEY=VALUE, got {assignment}')
+        env[key] = value
+    return env
 
 # Main execution block
 if __name__ == '__main__':
-    # Generate queue configuration file
-    write_queues_file()
+    parser = argparse.ArgumentParser(description='Benchmark terraform runs across genesyscloud provider versions')
+    parser.add_argument('--command', choices=['apply', 'plan'], default='apply',
+                        help='Terraform command to benchmark (default: %(default)s)')
+    parser.add_argument('--versions', type=lambda value: value.split(','),
+                        help='Comma separated provider versions (default: all versions listed in generator.py)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Number of versions benchmarked at the same time (default: %(default)s)')
+    parser.add_argument('--lookahead', type=int, default=1,
+                        help='Number of versions initialized ahead of the running ones (default: %(default)s)')
+    parser.add_argument('--workdir-root', default='workdirs',
+                        help='Directory holding one working directory per version (default: %(default)s)')
+    parser.add_argument('--plugin-cache-root', default='plugin-cache',
+                        help='Directory holding one plugin cache per version (default: %(default)s)')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Environment variable for terraform, e.g. to point the provider at a local mock API')
+    parser.add_argument('--tf-log', action='store_true',
+                        help='Write a TF_LOG=json log per version to plans/ for log_chomper')
+    parser.add_argument('--repetitions', type=int, default=1,
+                        help='Timed runs per version (default: %(default)s)')
+    parser.add_argument('--warmup', type=int, default=0,
+                        help='Untimed runs per version before the timed ones (default: %(default)s)')
+    parser.add_argument('--regression-threshold', type=float, default=benchstats.DEFAULT_REGRESSION_THRESHOLD,
+                        help='Relative slowdown of the median against the previous version flagged as a '
+                             'regression (default: %(default)s)')
+    parser.add_argument('--resources', type=int, default=296,
+                        help='Number of generated resources (default: %(default)s)')
+    parser.add_argument('--mix', type=workload.parse_mix, default='genesyscloud_routing_queue=1',
+                        help='Weighted resource types, e.g. genesyscloud_routing_queue=3,genesyscloud_user=1 '
+                             f'(supported: {", ".join(workload.RESOURCE_TYPES)})')
+    parser.add_argument('--fanout', type=int, default=0,
+                        help='Resources each resource depends on in the dependency level above it (default: %(default)s)')
+    parser.add_argument('--depth', type=int, default=0,
+                        help='Number of dependency levels below the first one (default: %(default)s)')
+    parser.add_argument('--modules', type=int, default=0,
+                        help='Number of module chains the resources are spread over (default: %(default)s)')
+    parser.add_argument('--module-depth', type=int, default=1,
+                        help='Nesting depth of every module chain (default: %(default)s)')
+    parser.add_argument('--data-source-ratio', type=float, default=1.0,
+                        help='Fraction of resources read back by a data source (default: %(default)s)')
+    parser.add_argument('--resources-per-file', type=int, default=1000,
+                        help='Resources written to each generated .tf file (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed making the generated configuration reproducible (default: %(default)s)')
+    parser.add_argument('--generate-only', action='store_true',
+                        help='Only generate the configuration, do not run terraform')
+    parser.add_argument('--bootstrap-resamples', type=int, default=benchstats.DEFAULT_BOOTSTRAP_RESAMPLES,
+                        help='Bootstrap resamples for the confidence interval of the median (default: %(default)s)')
+    args = parser.parse_args()
+
+    # Generate the synthetic configuration
+    spec = workload.WorkloadSpec(args.resources, args.mix, args.fanout, args.depth, args.modules,
+                                 args.module_depth, args.data_source_ratio, args.resources_per_file,
+                                 args.seed)
+    files = workload.write_workload(spec)
+    write_data_to_file(spec.to_dict(), workload_data_file)
+    print(f'generated {args.resources} resources in {len(files)} files')
+    if args.generate_only:
+        sys.exit()
   
     # Define terraform commands
-    apply_command = ['terraform', 'apply', '--auto-approve']
-    plan_command = ['export TF_LOG=json','terraform', 'plan']
-    # Run tests with apply command
-    test_versions(command=apply_command)
-    #test_current_version(id='we_will_see_plan', command=apply_command)
-    
+    commands = {
+        'apply': ['terraform', 'apply', '--auto-approve', '-input=false'],
+        'plan': ['terraform', 'plan', '-input=false'],
+    }
+    runner = BenchmarkRunner(args.versions or versions[1:], commands[args.command],
+                             workdir_root=args.workdir_root, plugin_cache_root=args.plugin_cache_root,
+                             concurrency=args.concurrency, lookahead=args.lookahead,
+                             env=parse_env(args.env), tf_log=args.tf_log,
+                             repetitions=args.repetitions, warmup=args.warmup)
+    samples = [sample.to_dict() for sample in runner.run_all()]
+    write_data_to_file(samples)
+
+    # Summarize the repetitions and flag versions slower than the one before them
+    summaries = benchstats.summarize(samples, args.bootstrap_resamples)
+    regressions = benchstats.flag_regressions(summaries, args.regression_threshold)
+    write_data_to_file(summaries, summary_data_file)
+    benchstats.print_summary(summaries)
+    for summary in regressions:
+        print(f"\n{summary['version']} regressed {summary['change']:+.1%} against {summary['baseline_version']}")
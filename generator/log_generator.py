@@ -0,0 +1,263 @@
+# Synthetic TF_LOG=json log generator for benchmarking log_chomper and the commonlib readers.
+#
+# Simulates terraform refreshing and applying resources with `parallelism` operations in
+# flight. Every operation writes its hook and change records and the SDK DEBUG REQUEST and
+# RESPONSE pairs of its API calls, so transactions of concurrent operations interleave as
+# in a real log. Responses have lognormal latencies, some are 429s with retry_after and a
+# retried request, some are errors; provider noise and malformed lines are mixed in. The
+# log grows until it reaches the requested size and is reproducible from the seed.
+import argparse, calendar, heapq, json, math, random, time, uuid
+from functools import lru_cache
+
+API_BASE = 'https://api.mypurecloud.com'
+
+# Resource type -> API collection of its objects
+RESOURCE_ENDPOINTS = {
+    'genesyscloud_routing_queue': '/api/v2/routing/queues',
+    'genesyscloud_routing_skill': '/api/v2/routing/skills',
+    'genesyscloud_routing_wrapupcode': '/api/v2/routing/wrapupcodes',
+    'genesyscloud_group': '/api/v2/groups',
+    'genesyscloud_user': '/api/v2/users',
+}
+
+PROVIDER_MODULE = 'provider.terraform-provider-genesyscloud_v1.49.0'
+
+# Seconds between apply_progress records of a long running apply
+APPLY_PROGRESS_INTERVAL = 10
+
+# Lines written per write call
+WRITE_BATCH_LINES = 10000
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+# Shape of a generated log
+class LogSpec:
+    def __init__(self, size=100 * 1024 ** 2, resources=1000, parallelism=10, apply_ratio=0.5,
+                 calls_per_operation=3, latency_median_ms=120, latency_sigma=0.6, throttle_rate=0.02,
+                 error_rate=0.01, drift_ratio=0.05, noise_ratio=0.5, malformed_rate=0.0001, seed=0,
+                 start='2025-05-30T10:00:00-04:00'):
+        self.size = size
+        # Distinct resources per refresh/apply cycle; cycles repeat until the log is big enough
+        self.resources = resources
+        self.parallelism = parallelism
+        self.apply_ratio = apply_ratio
+        # Average API calls of one refresh or apply, including pagination reads
+        self.calls_per_operation = calls_per_operation
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.drift_ratio = drift_ratio
+        # Provider debug lines without SDK DEBUG per API call
+        self.noise_ratio = noise_ratio
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.start = start
+
+
+# Parse a size such as 500M or 2G
+def parse_size(value):
+    value = value.strip().upper().rstrip('B')
+    unit = value[-1] if value and value[-1] in SIZE_UNITS else ''
+    return int(float(value[:len(value) - len(unit)]) * SIZE_UNITS[unit])
+
+
+# "YYYY-MM-DDTHH:MM:SS" of an epoch second in the log's UTC offset
+@lru_cache(maxsize=4096)
+def _second_prefix(second, offset_seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second + offset_seconds))
+
+
+class LogGenerator:
+    def __init__(self, spec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        start = spec.start.replace('Z', '+00:00')
+        self.offset_seconds = (1 if start[-6] == '+' else -1) * (int(start[-5:-3]) * 3600 + int(start[-2:]) * 60)
+        self.offset = start[-6:]
+        self.clock = calendar.timegm(time.strptime(start[:19], '%Y-%m-%dT%H:%M:%S')) - self.offset_seconds
+        self.types = sorted(RESOURCE_ENDPOINTS)
+        self.counts = {'lines': 0, 'bytes': 0, 'requests': 0, 'throttled': 0, 'errors': 0, 'malformed': 0}
+
+    # RFC 3339 timestamp with microseconds, as written by terraform
+    def timestamp(self, t):
+        second = math.floor(t)
+        return f'{_second_prefix(second, self.offset_seconds)}.{int((t - second) * 1e6):06d}{self.offset}'
+
+    def _uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _line(self, t, level, message, **fields):
+        record = {'@level': level, '@message': message, '@module': PROVIDER_MODULE, '@timestamp': self.timestamp(t)}
+        record.update(fields)
+        return json.dumps(record)
+
+    def _hook(self, t, hook_type, resource, **hook):
+        hook['resource'] = resource['resource']
+        message = f"{resource['resource']['addr']}: {hook_type.replace('_', ' ').capitalize()}"
+        return json.dumps({'@level': 'info', '@message': message, '@module': 'terraform.ui',
+                           '@timestamp': self.timestamp(t), 'hook': hook, 'type': hook_type})
+
+    def _change(self, t, change_type, resource, action):
+        message = f"{resource['resource']['addr']}: {'Drift detected' if change_type == 'resource_drift' else 'Plan to ' + action}"
+        return json.dumps({'@level': 'info', '@message': message, '@module': 'terraform.ui',
+                           '@timestamp': self.timestamp(t), 'type': change_type,
+                           'change': {'resource': resource['resource'], 'action': action}})
+
+    def _latency(self):
+        return self.rng.lognormvariate(math.log(self.spec.latency_median_ms), self.spec.latency_sigma) / 1000
+
+    # Events (time, line) of one API call, retried after 429 responses
+    def _api_call(self, t, method, url):
+        spec = self.spec
+        while True:
+            transaction_id = self._uuid()
+            request = {'debug_type': 'SDK DEBUG REQUEST', 'transaction_id': transaction_id,
+                       'invocation_method': method, 'invocation_url': url}
+            yield t, self._line(t, 'info', 'SDK DEBUG REQUEST: ' + json.dumps(request))
+            self.counts['requests'] += 1
+
+            for _ in range(int(spec.noise_ratio) + (self.rng.random() < spec.noise_ratio % 1)):
+                yield t, self._line(t, 'debug', f'Sending HTTP request {method} {url}')
+
+            t += self._latency()
+            draw = self.rng.random()
+            response = {'debug_type': 'SDK DEBUG RESPONSE', 'transaction_id': transaction_id,
+                        'invocation_method': method, 'invocation_url': url,
+                        'correlation_id': self._uuid()}
+            if draw < spec.throttle_rate:
+                retry_after = self.rng.choice((1, 1, 2, 3, 5))
+                response['invocation_status_code'] = 429
+                response['invocation_retry_after'] = str(retry_after)
+                self.counts['throttled'] += 1
+            elif draw < spec.throttle_rate + spec.error_rate:
+                response['invocation_status_code'] = self.rng.choice((400, 404, 409, 500, 503))
+                self.counts['errors'] += 1
+            else:
+                response['invocation_status_code'] = 201 if method == 'POST' else 200
+            yield t, self._line(t, 'info', 'SDK DEBUG RESPONSE: ' + json.dumps(response))
+
+            if response['invocation_status_code'] != 429:
+                return t
+            t += retry_after
+
+    # Events of refreshing and, for some resources, planning and applying one resource
+    def _operation(self, t, index):
+        rng = self.rng
+        resource_type = self.types[index % len(self.types)]
+        name = f'r{index}'
+        resource = {'resource': {'addr': f'{resource_type}.{name}', 'module': '', 'resource': f'{resource_type}.{name}',
+                                 'implied_provider': 'genesyscloud', 'resource_type': resource_type,
+                                 'resource_name': name, 'resource_key': None}}
+        object_id = self._uuid()
+        collection = API_BASE + RESOURCE_ENDPOINTS[resource_type]
+        calls = max(1, round(rng.expovariate(1 / self.spec.calls_per_operation)))
+
+        yield t, self._hook(t, 'refresh_start', resource, id_key='id', id_value=object_id)
+        for call in range(calls):
+            url = f'{collection}/{object_id}' if call == 0 else f'{collection}?pageSize=100&pageNumber={call}'
+            t = yield from self._api_call(t, 'GET', url)
+        yield t, self._hook(t, 'refresh_complete', resource, id_key='id', id_value=object_id)
+
+        if rng.random() < self.spec.drift_ratio:
+            yield t, self._change(t, 'resource_drift', resource, 'update')
+        if rng.random() >= self.spec.apply_ratio:
+            return
+
+        action = rng.choice(('update', 'update', 'create'))
+        yield t, self._change(t, 'planned_change', resource, action)
+        t += rng.random()
+        started = t
+        yield t, self._hook(t, 'apply_start', resource, action=action)
+        last_progress = t
+        for call in range(calls):
+            if call == 0:
+                t = yield from self._api_call(t, 'POST' if action == 'create' else 'PUT',
+                                              collection if action == 'create' else f'{collection}/{object_id}')
+            else:
+                t = yield from self._api_call(t, 'GET', f'{collection}/{object_id}')
+            if t - last_progress >= APPLY_PROGRESS_INTERVAL:
+                last_progress = t
+                yield t, self._hook(t, 'apply_progress', resource, action=action,
+                                    elapsed_seconds=int(t - started))
+        yield t, self._hook(t, 'apply_complete', resource, action=action, id_key='id', id_value=object_id,
+                            elapsed_seconds=int(t - started))
+
+    # Lines in time order, with `parallelism` operations interleaved, until stopped
+    def lines(self):
+        heap = []
+        sequence = 0
+        next_index = 0
+
+        def start_operation(t):
+            nonlocal sequence, next_index
+            # Later refresh/apply cycles revisit the same resource names
+            index = next_index % self.spec.resources
+            next_index += 1
+            operation = self._operation(t + self.rng.random() * 0.05, index)
+            event = next(operation)
+            heapq.heappush(heap, (event[0], sequence, event[1], operation))
+            sequence += 1
+
+        for _ in range(self.spec.parallelism):
+            start_operation(self.clock)
+
+        while True:
+            t, _, line, operation = heapq.heappop(heap)
+            yield line
+            if self.rng.random() < self.spec.malformed_rate:
+                self.counts['malformed'] += 1
+                yield line[:self.rng.randrange(1, len(line))]
+            try:
+                event = next(operation)
+                heapq.heappush(heap, (event[0], sequence, event[1], operation))
+                sequence += 1
+            except StopIteration:
+                start_operation(t)
+
+    # Write the log to a file until it reaches spec.size bytes
+    def write(self, output_file):
+        target = self.spec.size
+        batch = []
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for line in self.lines():
+                batch.append(line)
+                self.counts['bytes'] += len(line) + 1
+                if len(batch) >= WRITE_BATCH_LINES or self.counts['bytes'] >= target:
+                    f.write('\n'.join(batch) + '\n')
+                    self.counts['lines'] += len(batch)
+                    batch = []
+                    if self.counts['bytes'] >= target:
+                        break
+        return self.counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic TF_LOG=json terraform log')
+    parser.add_argument('output_file', help='Path of the log file to write')
+    parser.add_argument('--size', type=parse_size, default='100M', help='Log size, e.g. 500M or 2G (default: %(default)s)')
+    parser.add_argument('--resources', type=int, default=1000, help='Distinct resources per refresh/apply cycle (default: %(default)s)')
+    parser.add_argument('--parallelism', type=int, default=10, help='Operations in flight, like terraform -parallelism (default: %(default)s)')
+    parser.add_argument('--apply-ratio', type=float, default=0.5, help='Fraction of resources that are also applied (default: %(default)s)')
+    parser.add_argument('--calls-per-operation', type=float, default=3, help='Average API calls per refresh or apply (default: %(default)s)')
+    parser.add_argument('--latency-median-ms', type=float, default=120, help='Median API latency (default: %(default)s)')
+    parser.add_argument('--latency-sigma', type=float, default=0.6, help='Sigma of the lognormal API latency (default: %(default)s)')
+    parser.add_argument('--throttle-rate', type=float, default=0.02, help='Fraction of 429 responses (default: %(default)s)')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='Fraction of 4xx/5xx error responses (default: %(default)s)')
+    parser.add_argument('--drift-ratio', type=float, default=0.05, help='Fraction of resources with drift (default: %(default)s)')
+    parser.add_argument('--noise-ratio', type=float, default=0.5, help='Provider debug lines without SDK DEBUG per API call (default: %(default)s)')
+    parser.add_argument('--malformed-rate', type=float, default=0.0001, help='Fraction of truncated lines (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed making the log reproducible (default: %(default)s)')
+    parser.add_argument('--start', default='2025-05-30T10:00:00-04:00', help='Time stamp of the first line (default: %(default)s)')
+    args = parser.parse_args()
+
+    spec = LogSpec(args.size, args.resources, args.parallelism, args.apply_ratio, args.calls_per_operation,
+                   args.latency_median_ms, args.latency_sigma, args.throttle_rate, args.error_rate,
+                   args.drift_ratio, args.noise_ratio, args.malformed_rate, args.seed, args.start)
+    started = time.perf_counter()
+    counts = LogGenerator(spec).write(args.output_file)
+    elapsed = time.perf_counter() - started
+    print(f"wrote {counts['lines']} lines ({counts['bytes'] / 1024 ** 2:.1f} MB) to {args.output_file} in {elapsed:.1f}s: "
+          f"{counts['requests']} requests, {counts['throttled']} throttled, {counts['errors']} errors, "
+          f"{counts['malformed']} malformed lines")
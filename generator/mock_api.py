@@ -0,0 +1,307 @@
+# Local stand-in for the Genesys Cloud public API used to load test the provider offline.
+#
+# Objects of any /api/v2 collection (e.g. /api/v2/routing/queues) are created, read,
+# updated, deleted and listed with pagination from an in-memory store. Every request is
+# delayed by a configurable latency distribution and can be rejected with 429 and a
+# Retry-After header, either at random or by a per-client token bucket rate limit.
+# All random draws come from one seeded generator so runs are reproducible.
+import argparse, json, math, random, re, threading, time, uuid
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+API_PREFIX = '/api/v2/'
+# Default page size of list requests, as in the real API
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 500
+
+# Path segments that identify a single object rather than a collection
+ID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$|^\d+$', re.IGNORECASE)
+
+
+# Latency distribution in milliseconds, parsed from "fixed:MS", "uniform:LOW:HIGH",
+# "normal:MEAN:SD", "lognormal:MEDIAN:SIGMA" or "exponential:MEAN"
+class Latency:
+    def __init__(self, spec):
+        name, *params = spec.split(':')
+        self.spec = spec
+        self.name = name
+        self.params = [float(param) for param in params]
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+        if expected.get(name) != len(self.params):
+            raise ValueError(f'invalid latency distribution: {spec}')
+
+    # Draw one delay in seconds
+    def sample(self, rng):
+        p = self.params
+        if self.name == 'fixed':
+            ms = p[0]
+        elif self.name == 'uniform':
+            ms = rng.uniform(p[0], p[1])
+        elif self.name == 'normal':
+            ms = rng.gauss(p[0], p[1])
+        elif self.name == 'lognormal':
+            ms = rng.lognormvariate(math.log(p[0]), p[1])
+        else:
+            ms = rng.expovariate(1 / p[0])
+        return max(ms, 0) / 1000
+
+
+# Token bucket allowing `rate` requests per second with bursts of `burst` requests
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    # Take a token, returning 0 or the seconds until a token is available
+    def take(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+# Behaviour and state shared by all request handler threads
+class MockApi:
+    def __init__(self, latency='fixed:0', method_latency=None, throttle_rate=0.0, retry_after=1,
+                 rate_limit=None, burst=None, seed=0):
+        self.latency = Latency(latency)
+        self.method_latency = {method.upper(): Latency(spec) for method, spec in (method_latency or {}).items()}
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.burst = burst or rate_limit
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        # collection path -> {id -> object}, in creation order
+        self.collections = {}
+        self.buckets = {}
+        self.stats = {'requests': 0, 'throttled': 0, 'by_route': {}}
+
+    # Decide delay and throttling of a request; returns (delay seconds, retry-after or None)
+    def admit(self, method, route, client):
+        with self.lock:
+            self.stats['requests'] += 1
+            route_stats = self.stats['by_route'].setdefault(f'{method} {route}', {'requests': 0, 'throttled': 0})
+            route_stats['requests'] += 1
+
+            delay = self.method_latency.get(method, self.latency).sample(self.rng)
+            retry_after = None
+            if self.rate_limit:
+                bucket = self.buckets.setdefault(client, TokenBucket(self.rate_limit, self.burst))
+                wait = bucket.take()
+                if wait:
+                    retry_after = max(1, math.ceil(wait))
+            if retry_after is None and self.throttle_rate and self.rng.random() < self.throttle_rate:
+                retry_after = self.retry_after
+            if retry_after is not None:
+                self.stats['throttled'] += 1
+                route_stats['throttled'] += 1
+            return delay, retry_after
+
+    # List one page of a collection, optionally filtered by exact name; pageSize is clamped
+    # to 1..MAX_PAGE_SIZE and a non-integer pageSize or pageNumber raises ValueError
+    def list_page(self, collection, query):
+        page_size = min(max(query_int(query, 'pageSize', DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+        page_number = max(query_int(query, 'pageNumber', 1), 1)
+        name = query.get('name', [None])[0]
+        with self.lock:
+            entities = list(self.collections.get(collection, {}).values())
+        if name is not None:
+            entities = [entity for entity in entities if entity.get('name') == name]
+
+        total = len(entities)
+        page_count = max(1, math.ceil(total / page_size))
+        page = {
+            'entities': entities[(page_number - 1) * page_size:page_number * page_size],
+            'pageSize': page_size,
+            'pageNumber': page_number,
+            'total': total,
+            'pageCount': page_count,
+            'firstUri': f'{collection}?pageSize={page_size}&pageNumber=1',
+            'lastUri': f'{collection}?pageSize={page_size}&pageNumber={page_count}',
+        }
+        if page_number < page_count:
+            page['nextUri'] = f'{collection}?pageSize={page_size}&pageNumber={page_number + 1}'
+        if page_number > 1:
+            page['previousUri'] = f'{collection}?pageSize={page_size}&pageNumber={page_number - 1}'
+        return page
+
+
+# Read an integer query parameter, raising ValueError if it is not one
+def query_int(query, name, default):
+    value = query.get(name, [default])[0]
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer, got {value!r}') from None
+
+
+# Split an API path into its collection and optional object id
+def split_path(path):
+    path = path.rstrip('/')
+    collection, _, last = path.rpartition('/')
+    if ID_PATTERN.match(last):
+        return collection, last
+    return path, None
+
+
+class MockApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+    def send_json(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('inin-correlation-id', str(uuid.uuid4()))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def handle_request(self, method):
+        url = urlsplit(self.path)
+        body = self.read_body()
+
+        if url.path == '/mock/stats':
+            with self.api.lock:
+                return self.send_json(200, self.api.stats)
+        if url.path == '/oauth/token':
+            return self.send_json(200, {'access_token': uuid.uuid4().hex, 'token_type': 'bearer',
+                                        'expires_in': 86400})
+        if not url.path.startswith(API_PREFIX):
+            return self.send_json(404, {'status': 404, 'code': 'not.found', 'message': 'Unknown path'})
+
+        collection, object_id = split_path(url.path)
+        route = collection + ('/{id}' if object_id else '')
+        client = self.headers.get('Authorization') or self.client_address[0]
+        delay, retry_after = self.api.admit(method, route, client)
+        time.sleep(delay)
+
+        if retry_after is not None:
+            return self.send_json(429, {'status': 429, 'code': 'too.many.requests',
+                                        'message': f'Rate limit exceeded, retry after {retry_after}s'},
+                                  {'Retry-After': str(retry_after)})
+        if body is None:
+            return self.send_json(400, {'status': 400, 'code': 'bad.request', 'message': 'Invalid JSON'})
+        self.dispatch(method, collection, object_id, parse_qs(url.query), body)
+
+    def dispatch(self, method, collection, object_id, query, body):
+        api = self.api
+        if object_id is None:
+            if method == 'GET':
+                try:
+                    page = api.list_page(collection, query)
+                except ValueError as e:
+                    return self.send_json(400, {'status': 400, 'code': 'bad.request', 'message': str(e)})
+                return self.send_json(200, page)
+            if method == 'POST':
+                entity = dict(body, id=str(uuid.uuid4()), selfUri=None)
+                entity['selfUri'] = f"{collection}/{entity['id']}"
+                with api.lock:
+                    api.collections.setdefault(collection, {})[entity['id']] = entity
+                return self.send_json(200, entity)
+            return self.send_json(405, {'status': 405, 'code': 'method.not.allowed', 'message': method})
+
+        with api.lock:
+            objects = api.collections.setdefault(collection, {})
+            entity = objects.get(object_id)
+            if entity is None:
+                status, response = 404, {'status': 404, 'code': 'not.found', 'message': f'{object_id} not found'}
+            elif method == 'GET':
+                status, response = 200, entity
+            elif method in ('PUT', 'PATCH'):
+                entity.update(body, id=object_id, selfUri=entity['selfUri'])
+                entity['version'] = entity.get('version', 1) + 1
+                status, response = 200, entity
+            elif method == 'DELETE':
+                del objects[object_id]
+                status, response = 204, None
+            else:
+                status, response = 405, {'status': 405, 'code': 'method.not.allowed', 'message': method}
+        self.send_json(status, response)
+
+
+# Start the mock API in a background thread and return the server; stop it with
+# server.shutdown()
+def start_server(api, host='127.0.0.1', port=0):
+    handler = type('BoundMockApiHandler', (MockApiHandler,), {'api': api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Parse METHOD=DISTRIBUTION latency overrides
+def parse_method_latency(assignments):
+    overrides = {}
+    for assignment in assignments:
+        method, sep, spec = assignment.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f'expected METHOD=DISTRIBUTION, got {assignment}')
+        Latency(spec)
+        overrides[method] = spec
+    return overrides
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local mock of the Genesys Cloud API for offline provider load tests')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', default='fixed:0',
+                        help='Latency distribution in ms: fixed:MS, uniform:LOW:HIGH, normal:MEAN:SD, '
+                             'lognormal:MEDIAN:SIGMA or exponential:MEAN (default: %(default)s)')
+    parser.add_argument('--method-latency', action='append', default=[], metavar='METHOD=DISTRIBUTION',
+                        help='Latency distribution for one HTTP method, e.g. POST=lognormal:250:0.6')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Fraction of API requests randomly rejected with 429 (default: %(default)s)')
+    parser.add_argument('--retry-after', type=int, default=1,
+                        help='Retry-After seconds of randomly throttled requests (default: %(default)s)')
+    parser.add_argument('--rate-limit', type=float,
+                        help='Requests per second allowed per client token before 429s are returned')
+    parser.add_argument('--burst', type=float, help='Burst size of the rate limit (default: the rate)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the latency and throttling draws')
+    args = parser.parse_args()
+
+    api = MockApi(args.latency, parse_method_latency(args.method_latency), args.throttle_rate,
+                  args.retry_after, args.rate_limit, args.burst, args.seed)
+    server = start_server(api, args.host, args.port)
+    print(f'mock API listening on http://{server.server_address[0]}:{server.server_address[1]}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,206 @@
+# Concurrent, pipelined runner that benchmarks terraform against several provider versions
+import subprocess, time, os, re, shutil, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+from workload import MODULES_DIR
+
+# Matches the version constraint of the provider block in provider.tf
+VERSION_PATTERN = re.compile(r'(version\s*=\s*")[^"]*(")')
+
+# Terraform state and lock files that must not be shared between working directories
+STATE_FILES = ('terraform.tfstate', 'terraform.tfstate.backup', '.terraform.lock.hcl')
+
+
+# Result of one timed terraform run
+class RunSample:
+    def __init__(self, version, duration, concurrency, active_runs, returncode, output_file,
+                 repetition=0, warmup=False, cpu_seconds=None, max_rss_kb=None):
+        self.version = version
+        self.duration = duration
+        # Configured number of concurrent runs and the most runs actually in flight
+        # while this one ran; only samples with the same levels are comparable
+        self.concurrency = concurrency
+        self.active_runs = active_runs
+        self.returncode = returncode
+        self.output_file = output_file
+        self.repetition = repetition
+        # Warmup runs fill caches and are excluded from the statistics
+        self.warmup = warmup
+        # User + system CPU time and peak resident set size of terraform and the
+        # provider processes it waited for; None where os.wait4 is not available
+        self.cpu_seconds = cpu_seconds
+        self.max_rss_kb = max_rss_kb
+
+    # Convert the sample to dictionary format for JSON serialization
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'duration': self.duration,
+            'concurrency': self.concurrency,
+            'active_runs': self.active_runs,
+            'returncode': self.returncode,
+            'output_file': self.output_file,
+            'repetition': self.repetition,
+            'warmup': self.warmup,
+            'cpu_seconds': self.cpu_seconds,
+            'max_rss_kb': self.max_rss_kb
+        }
+
+
+# Run a command and wait for it, returning its exit code, wall time in seconds and,
+# where the platform supports os.wait4, its CPU seconds and peak RSS in kilobytes
+def run_measured(command, cwd, env, output):
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=output, stderr=subprocess.STDOUT)
+    if not hasattr(os, 'wait4'):
+        returncode = process.wait()
+        return returncode, time.perf_counter() - start, None, None
+
+    _, status, usage = os.wait4(process.pid, 0)
+    duration = time.perf_counter() - start
+    # The child is reaped by wait4, tell Popen so it does not wait for it again
+    process.returncode = returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss_kb = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return returncode, duration, usage.ru_utime + usage.ru_stime, max_rss_kb
+
+
+# Write provider.tf with the provider version pinned
+def render_provider_file(template_file, target_file, version):
+    with open(template_file, 'r') as file:
+        filedata = file.read()
+    with open(target_file, 'w') as file:
+        file.write(VERSION_PATTERN.sub(rf'\g<1>{version}\g<2>', filedata, count=1))
+
+
+# Create the isolated working directory of one provider version from the .tf files and
+# local modules in base_dir; terraform state, locks and .terraform are never copied
+def prepare_workdir(base_dir, workdir, version):
+    os.makedirs(workdir, exist_ok=True)
+    for name in os.listdir(workdir):
+        if name.endswith('.tf') or name in STATE_FILES:
+            os.remove(os.path.join(workdir, name))
+    for name in os.listdir(base_dir):
+        if name.endswith('.tf') and name != 'provider.tf':
+            shutil.copyfile(os.path.join(base_dir, name), os.path.join(workdir, name))
+
+    shutil.rmtree(os.path.join(workdir, MODULES_DIR), ignore_errors=True)
+    if os.path.isdir(os.path.join(base_dir, MODULES_DIR)):
+        shutil.copytree(os.path.join(base_dir, MODULES_DIR), os.path.join(workdir, MODULES_DIR))
+    render_provider_file(os.path.join(base_dir, 'provider.tf'), os.path.join(workdir, 'provider.tf'), version)
+
+
+# Run terraform init in a working directory. Every version has its own plugin cache
+# directory because terraform does not support concurrent writes to a shared cache
+def init_workdir(workdir, plugin_cache_dir, env):
+    os.makedirs(plugin_cache_dir, exist_ok=True)
+    init_env = dict(env, TF_PLUGIN_CACHE_DIR=os.path.abspath(plugin_cache_dir))
+    with open(os.path.join(workdir, 'init.log'), 'w') as file:
+        process = subprocess.run(['terraform', 'init', '-upgrade', '-input=false'],
+                                 cwd=workdir, env=init_env, stdout=file, stderr=subprocess.STDOUT)
+    return process.returncode
+
+
+# Benchmarks a list of provider versions, each in its own working directory.
+# Up to `concurrency` versions run at the same time, and up to `lookahead` further
+# versions are initialized while they run, so terraform init is off the critical path.
+class BenchmarkRunner:
+    def __init__(self, versions, command, base_dir='.', workdir_root='workdirs',
+                 plugin_cache_root='plugin-cache', plans_dir='plans', concurrency=1,
+                 lookahead=1, env=None, tf_log=False, repetitions=1, warmup=0):
+        self.versions = versions
+        self.command = command
+        self.base_dir = base_dir
+        self.workdir_root = workdir_root
+        self.plugin_cache_root = plugin_cache_root
+        self.plans_dir = plans_dir
+        self.concurrency = max(1, concurrency)
+        self.lookahead = max(1, lookahead)
+        self.env = dict(os.environ, **(env or {}))
+        self.tf_log = tf_log
+        # Timed runs per version, preceded by untimed warmup runs
+        self.repetitions = max(1, repetitions)
+        self.warmup = max(0, warmup)
+        self._lock = threading.Lock()
+        # Peak number of active runs seen by each run currently in flight
+        self._active = {}
+
+    # Working directory of a version
+    def workdir(self, version):
+        return os.path.join(self.workdir_root, version.replace('.', '_'))
+
+    # Copy the configuration and run terraform init for a version
+    def initialize(self, version):
+        workdir = self.workdir(version)
+        prepare_workdir(self.base_dir, workdir, version)
+        print(f'initializing {version} in {workdir}')
+        returncode = init_workdir(workdir, os.path.join(self.plugin_cache_root, version), self.env)
+        if returncode != 0:
+            print(f'terraform init failed for {version}, see {workdir}/init.log')
+        return returncode
+
+    # Time the benchmark command of an initialized version
+    def run(self, version, repetition=0, warmup=False):
+        v = version.replace('.', '_')
+        if warmup:
+            v += f'_warmup{repetition}'
+        elif self.repetitions > 1:
+            v += f'_run{repetition}'
+        output_file = os.path.abspath(os.path.join(self.plans_dir, f'{v}.json'))
+        env = dict(self.env)
+        if self.tf_log:
+            env['TF_LOG'] = 'json'
+            env['TF_LOG_PATH'] = os.path.abspath(os.path.join(self.plans_dir, f'{v}.log'))
+
+        token = object()
+        with self._lock:
+            self._active[token] = 0
+            for key in self._active:
+                self._active[key] = max(self._active[key], len(self._active))
+
+        try:
+            with open(output_file, 'w') as file:
+                returncode, duration, cpu_seconds, max_rss_kb = run_measured(
+                    self.command, self.workdir(version), env, file)
+        finally:
+            with self._lock:
+                active_runs = self._active.pop(token)
+
+        label = f'{version} ({"warmup " if warmup else "run "}{repetition + 1})'
+        if returncode == 0:
+            print(f'finished {label} in {duration:.2f}s')
+        else:
+            print(f'error occurred for {label}, see {output_file}')
+        return RunSample(version, duration, self.concurrency, active_runs, returncode, output_file,
+                         repetition, warmup, cpu_seconds, max_rss_kb)
+
+    # Run the warmup and timed repetitions of one version back to back
+    def run_repetitions(self, version):
+        samples = [self.run(version, i, warmup=True) for i in range(self.warmup)]
+        samples += [self.run(version, i) for i in range(self.repetitions)]
+        return samples
+
+    # Initialize and benchmark all versions, returning the samples in version order
+    # (warmup runs included, flagged with warmup=True)
+    def run_all(self):
+        os.makedirs(self.plans_dir, exist_ok=True)
+        # Versions initialized or running at the same time
+        slots = threading.BoundedSemaphore(self.concurrency + self.lookahead)
+
+        def run_when_initialized(version, init_future):
+            try:
+                if init_future.result() != 0:
+                    return []
+                return self.run_repetitions(version)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.lookahead) as init_pool, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as run_pool:
+            futures = []
+            for version in self.versions:
+                slots.acquire()
+                init_future = init_pool.submit(self.initialize, version)
+                futures.append(run_pool.submit(run_when_initialized, version, init_future))
+            samples = [future.result() for future in futures]
+
+        return [sample for version_samples in samples for sample in version_samples]
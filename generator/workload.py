@@ -0,0 +1,212 @@
+# Parameterized, reproducible generator of synthetic Terraform configurations.
+#
+# Resources of several types are spread over files and (nested) modules, linked into a
+# dependency graph of configurable depth and fan-out, and optionally looked up again by
+# data sources. The same spec and seed always produce byte-identical files, so benchmark
+# runs against different provider versions or scales are comparable.
+import os, random, shutil
+
+# Prefix of the generated files and directory of the generated modules; only these are
+# removed when a workload is regenerated
+FILE_PREFIX = 'workload_'
+MODULES_DIR = 'modules'
+
+PROVIDER_REQUIREMENTS = '''terraform {
+  required_providers {
+    genesyscloud = {
+      source = "mypurecloud/genesyscloud"
+    }
+  }
+}
+'''
+
+
+# HCL body of each supported resource type, given a unique index
+def _queue(i):
+    return f'name = "bench queue {i}"'
+
+def _skill(i):
+    return f'name = "bench skill {i}"'
+
+def _wrapupcode(i):
+    return f'name = "bench wrapupcode {i}"'
+
+def _language(i):
+    return f'name = "bench language {i}"'
+
+def _group(i):
+    return f'name = "bench group {i}"\n  type = "official"\n  visibility = "public"'
+
+def _user(i):
+    return f'email = "bench.user{i}@example.com"\n  name = "bench user {i}"'
+
+
+# Resource type -> (body of the resource, attribute a data source looks it up by)
+RESOURCE_TYPES = {
+    'genesyscloud_routing_queue': (_queue, 'name'),
+    'genesyscloud_routing_skill': (_skill, 'name'),
+    'genesyscloud_routing_wrapupcode': (_wrapupcode, 'name'),
+    'genesyscloud_routing_language': (_language, 'name'),
+    'genesyscloud_group': (_group, 'name'),
+    'genesyscloud_user': (_user, 'email'),
+}
+
+
+# Shape of a generated workload
+class WorkloadSpec:
+    def __init__(self, resources=296, mix=None, fanout=0, depth=0, modules=0, module_depth=1,
+                 data_source_ratio=1.0, resources_per_file=1000, seed=0):
+        self.resources = resources
+        # Resource type -> relative weight
+        self.mix = mix or {'genesyscloud_routing_queue': 1}
+        # Every resource below the first dependency level depends on up to `fanout`
+        # resources of the level above it; `depth` is the number of levels below the first
+        self.fanout = fanout
+        self.depth = depth
+        # Resources are spread over `modules` module chains, each `module_depth` modules deep
+        self.modules = modules
+        self.module_depth = max(1, module_depth)
+        # Fraction of resources that are also read back by a data source
+        self.data_source_ratio = data_source_ratio
+        self.resources_per_file = max(1, resources_per_file)
+        self.seed = seed
+        for resource_type in self.mix:
+            if resource_type not in RESOURCE_TYPES:
+                raise ValueError(f'unsupported resource type: {resource_type}')
+
+    # Summary for data.json, so samples can be matched to the workload they ran
+    def to_dict(self):
+        return dict(vars(self))
+
+
+# Parse a "type=weight,type=weight" resource mix
+def parse_mix(value):
+    mix = {}
+    for item in value.split(','):
+        resource_type, _, weight = item.partition('=')
+        mix[resource_type.strip()] = float(weight or 1)
+    return mix
+
+
+# One generated resource
+class _Resource:
+    __slots__ = ('type', 'name', 'index', 'module', 'level', 'depends_on', 'data_source')
+
+    def __init__(self, resource_type, index, module, level):
+        self.type = resource_type
+        self.index = index
+        self.name = f'r{index}'
+        self.module = module
+        self.level = level
+        self.depends_on = []
+        self.data_source = False
+
+
+# Build the resources, dependency graph and data sources of a workload
+def build_workload(spec):
+    rng = random.Random(spec.seed)
+    types = sorted(spec.mix)
+    weights = [spec.mix[resource_type] for resource_type in types]
+    resource_types = rng.choices(types, weights=weights, k=spec.resources)
+
+    # Module of a resource: None for the root module, else (chain, nesting level)
+    module_count = spec.modules * spec.module_depth
+    resources = []
+    for i, resource_type in enumerate(resource_types):
+        slot = i % (module_count + 1) if module_count else 0
+        module = None if slot == 0 else divmod(slot - 1, spec.module_depth)
+        resources.append(_Resource(resource_type, i, module, 0))
+
+    # Assign dependency levels and edges within each module, since resources in other
+    # modules cannot be referenced directly
+    by_module = {}
+    for resource in resources:
+        by_module.setdefault(resource.module, []).append(resource)
+    levels = spec.depth + 1 if spec.fanout else 1
+    for members in by_module.values():
+        per_level = [[] for _ in range(levels)]
+        for position, resource in enumerate(members):
+            resource.level = position * levels // len(members)
+            per_level[resource.level].append(resource)
+        for resource in members:
+            if resource.level:
+                parents = per_level[resource.level - 1]
+                resource.depends_on = rng.sample(parents, min(spec.fanout, len(parents)))
+
+    for resource in resources:
+        resource.data_source = rng.random() < spec.data_source_ratio
+    return resources
+
+
+# HCL of one resource and, if requested, the data source reading it back
+def _render_resource(resource):
+    body, lookup_attribute = RESOURCE_TYPES[resource.type]
+    lines = [f'resource "{resource.type}" "{resource.name}" {{\n  {body(resource.index)}\n']
+    if resource.depends_on:
+        references = ', '.join(f'{parent.type}.{parent.name}' for parent in resource.depends_on)
+        lines.append(f'  depends_on = [{references}]\n')
+    lines.append('}\n\n')
+    if resource.data_source:
+        lines.append(f'data "{resource.type}" "{resource.name}" {{\n'
+                     f'  {lookup_attribute} = {resource.type}.{resource.name}.{lookup_attribute}\n}}\n\n')
+    return ''.join(lines)
+
+
+# Write resources into files of at most resources_per_file resources each
+def _write_resource_files(directory, resources, resources_per_file):
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for start in range(0, len(resources), resources_per_file):
+        file_name = os.path.join(directory, f'{FILE_PREFIX}{start // resources_per_file:04d}.tf')
+        with open(file_name, 'w') as f:
+            f.write(''.join(_render_resource(resource) for resource in resources[start:start + resources_per_file]))
+        files.append(file_name)
+    return files
+
+
+# Directory of a module, nested under its parent in the chain
+def _module_dir(output_dir, chain, level):
+    parts = [output_dir, MODULES_DIR]
+    for nesting in range(level + 1):
+        parts.append(f'chain{chain}_level{nesting}')
+    return os.path.join(*parts)
+
+
+# Remove the files of a previously generated workload
+def clean_workload(output_dir):
+    for name in os.listdir(output_dir):
+        if name.startswith(FILE_PREFIX) and name.endswith('.tf'):
+            os.remove(os.path.join(output_dir, name))
+    shutil.rmtree(os.path.join(output_dir, MODULES_DIR), ignore_errors=True)
+
+
+# Generate the workload into output_dir, returning the list of files written
+def write_workload(spec, output_dir='.'):
+    clean_workload(output_dir)
+    resources = build_workload(spec)
+    by_module = {}
+    for resource in resources:
+        by_module.setdefault(resource.module, []).append(resource)
+
+    files = _write_resource_files(output_dir, by_module.get(None, []), spec.resources_per_file)
+
+    # Every module declares the provider source and calls the next module of its chain;
+    # the root module calls the first module of every chain
+    module_calls = []
+    for chain in range(spec.modules):
+        module_calls.append(f'module "chain{chain}" {{\n  source = "./{MODULES_DIR}/chain{chain}_level0"\n}}\n\n')
+        for level in range(spec.module_depth):
+            directory = _module_dir(output_dir, chain, level)
+            files += _write_resource_files(directory, by_module.get((chain, level), []), spec.resources_per_file)
+            with open(os.path.join(directory, f'{FILE_PREFIX}versions.tf'), 'w') as f:
+                f.write(PROVIDER_REQUIREMENTS)
+                if level + 1 < spec.module_depth:
+                    f.write(f'\nmodule "nested" {{\n  source = "./chain{chain}_level{level + 1}"\n}}\n')
+            files.append(os.path.join(directory, f'{FILE_PREFIX}versions.tf'))
+
+    if module_calls:
+        file_name = os.path.join(output_dir, f'{FILE_PREFIX}modules.tf')
+        with open(file_name, 'w') as f:
+            f.write(''.join(module_calls))
+        files.append(file_name)
+    return files
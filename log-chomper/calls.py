@@ -0,0 +1,251 @@
+"""
+Compact representation of merged SDK calls for log_chomper.
+
+A merged request/response pair is a slotted MergedCall instead of a copy of the
+request dictionary with seven more keys. The method, normalized URL and status code
+repeat millions of times in a large log, so they are interned in process wide
+CodeTables and stored as small integer codes. Timestamps in the six-digit layout
+Terraform writes are kept only as epoch microseconds plus an interned UTC offset and
+formatted again on output. Records become dictionaries only in to_dict, when they are
+written out.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sdk-plan-notebooks'))
+import commonlib.timestamps as timestamps
+import commonlib.urlnorm as urlnorm
+
+MERGED_DEBUG_TYPE = "SDK DEBUG MERGE"
+
+# Request fields stored in their own slots; any other request field is kept in extra
+_REQUEST_FIELDS = frozenset((
+    'debug_type', 'transaction_id', 'invocation_method', 'invocation_url', 'timestamp', 'timestamp_us',
+))
+# Fields added to every merged record; they replace request fields of the same name
+_MERGED_FIELDS = frozenset((
+    'request_timestamp', 'response_timestamp', 'request_timestamp_us', 'response_timestamp_us',
+    'invocation_status_code', 'invocation_retry_after', 'normalized_url', 'response_time_ms',
+))
+
+
+class CodeTable:
+    """
+    Interns repeated values as small integer codes.
+    """
+
+    __slots__ = ('values', '_codes')
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        """
+        Get the code of a value, assigning the next free code to a new value.
+
+        Args:
+            value: Hashable value to intern
+
+        Returns:
+            int: Code of the value
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+# Process wide tables shared by all merged calls
+METHODS = CodeTable()
+ENDPOINTS = CodeTable()
+STATUS_CODES = CodeTable()
+UTC_OFFSETS = CodeTable()
+
+# (method code, endpoint code) -> "METHOD normalized_url" grouping key
+_endpoint_keys = {}
+
+
+def _compact_timestamp(timestamp, timestamp_us):
+    """
+    Reduce a timestamp to the code of its UTC offset when it can be formatted again
+    exactly from its epoch microseconds.
+
+    Args:
+        timestamp (str): Timestamp from the log record
+        timestamp_us (int): The same timestamp in epoch microseconds
+
+    Returns:
+        int or str: Code in UTC_OFFSETS, or the timestamp itself in any other layout
+    """
+    if timestamp_us is None or not isinstance(timestamp, str) or len(timestamp) < 27 or timestamp[19] != '.':
+        return timestamp
+    utc_offset = timestamp[26:]
+    if utc_offset != 'Z' and (len(utc_offset) != 6 or utc_offset[0] not in '+-'):
+        return timestamp
+    if timestamps.format_timestamp_us(timestamp_us, utc_offset) != timestamp:
+        return timestamp
+    return UTC_OFFSETS.code(utc_offset)
+
+
+def _expand_timestamp(compact, timestamp_us):
+    """Inverse of _compact_timestamp."""
+    if isinstance(compact, int):
+        return timestamps.format_timestamp_us(timestamp_us, UTC_OFFSETS.values[compact])
+    return compact
+
+
+def _retry_after_seconds(value):
+    """Integer Retry-After seconds of a response, 0 if absent or not a number."""
+    try:
+        return 0 if value is None else int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class MergedCall:
+    """
+    One request paired with its response.
+
+    Args:
+        transaction_id (str): Transaction ID shared by the request and the response
+        method (str): HTTP method, or None if the request had none
+        invocation_url (str): Raw request URL, or None if the request had none
+        normalized_url (str): Endpoint template of the URL
+        status_code (int): Status code of the response
+        retry_after (int): Retry-After seconds of the response, 0 if absent
+        request_timestamp (str): Log time of the request
+        response_timestamp (str): Log time of the response
+        request_timestamp_us (int): Log time of the request in epoch microseconds
+        response_timestamp_us (int): Log time of the response in epoch microseconds
+        response_time_ms (float): Response time, or None if a timestamp was missing
+        extra (dict): Further request fields, or None
+    """
+
+    __slots__ = ('transaction_id', 'method_code', 'invocation_url', 'endpoint_code', 'status_code_code',
+                 'retry_after', '_request_timestamp', '_response_timestamp', 'request_timestamp_us',
+                 'response_timestamp_us', 'response_time_ms', 'extra')
+
+    def __init__(self, transaction_id, method, invocation_url, normalized_url, status_code, retry_after,
+                 request_timestamp, response_timestamp, request_timestamp_us, response_timestamp_us,
+                 response_time_ms, extra=None):
+        self.transaction_id = transaction_id
+        self.method_code = None if method is None else METHODS.code(method)
+        self.invocation_url = invocation_url
+        self.endpoint_code = ENDPOINTS.code(normalized_url)
+        self.status_code_code = STATUS_CODES.code(status_code)
+        self.retry_after = _retry_after_seconds(retry_after)
+        self._request_timestamp = _compact_timestamp(request_timestamp, request_timestamp_us)
+        self._response_timestamp = _compact_timestamp(response_timestamp, response_timestamp_us)
+        self.request_timestamp_us = request_timestamp_us
+        self.response_timestamp_us = response_timestamp_us
+        self.response_time_ms = response_time_ms
+        self.extra = extra or None
+
+    @classmethod
+    def from_pair(cls, request, response, request_timestamp_us, response_timestamp_us):
+        """
+        Merge a request record with its response record.
+
+        Args:
+            request (dict): Parsed SDK DEBUG REQUEST record
+            response (dict): Parsed SDK DEBUG RESPONSE record
+            request_timestamp_us (int): Request time in epoch microseconds, or None
+            response_timestamp_us (int): Response time in epoch microseconds, or None
+
+        Returns:
+            MergedCall: The merged call
+        """
+        extra = {key: value for key, value in request.items()
+                 if key not in _REQUEST_FIELDS and key not in _MERGED_FIELDS}
+        response_time_ms = None
+        if request_timestamp_us is not None and response_timestamp_us is not None:
+            response_time_ms = (response_timestamp_us - request_timestamp_us) / 1000
+        invocation_url = request.get('invocation_url')
+        return cls(request.get('transaction_id'), request.get('invocation_method'), invocation_url,
+                   urlnorm.normalize_url(invocation_url or ''), response.get('invocation_status_code'),
+                   response.get('invocation_retry_after'), request.get('timestamp'),
+                   response.get('timestamp'), request_timestamp_us, response_timestamp_us, response_time_ms, extra)
+
+    @classmethod
+    def from_dict(cls, record):
+        """
+        Rebuild a merged call from a record written by to_dict, e.g. read back from the
+        merged records file.
+
+        Args:
+            record (dict): Merged record
+
+        Returns:
+            MergedCall: The merged call
+        """
+        extra = {key: value for key, value in record.items()
+                 if key not in _REQUEST_FIELDS and key not in _MERGED_FIELDS}
+        return cls(record.get('transaction_id'), record.get('invocation_method'), record.get('invocation_url'),
+                   record.get('normalized_url', 'UNKNOWN'), record.get('invocation_status_code'),
+                   record.get('invocation_retry_after'), record.get('request_timestamp'),
+                   record.get('response_timestamp'), record.get('request_timestamp_us'),
+                   record.get('response_timestamp_us'), record.get('response_time_ms'), extra)
+
+    @property
+    def method(self):
+        """str: HTTP method, or None."""
+        return None if self.method_code is None else METHODS.values[self.method_code]
+
+    @property
+    def normalized_url(self):
+        """str: Endpoint template of the URL."""
+        return ENDPOINTS.values[self.endpoint_code]
+
+    @property
+    def status_code(self):
+        """int: Status code of the response."""
+        return STATUS_CODES.values[self.status_code_code]
+
+    @property
+    def request_timestamp(self):
+        """str: Log time of the request."""
+        return _expand_timestamp(self._request_timestamp, self.request_timestamp_us)
+
+    @property
+    def response_timestamp(self):
+        """str: Log time of the response."""
+        return _expand_timestamp(self._response_timestamp, self.response_timestamp_us)
+
+    @property
+    def endpoint_key(self):
+        """str: "METHOD normalized_url" key the response times are grouped by."""
+        pair = (self.method_code, self.endpoint_code)
+        key = _endpoint_keys.get(pair)
+        if key is None:
+            key = _endpoint_keys[pair] = f"{self.method or 'UNKNOWN'} {self.normalized_url}"
+        return key
+
+    def to_dict(self):
+        """
+        Convert the call to the merged record dictionary written to the output files.
+
+        Returns:
+            dict: Request fields followed by the merged fields
+        """
+        record = {'debug_type': MERGED_DEBUG_TYPE, 'transaction_id': self.transaction_id}
+        if self.method_code is not None:
+            record['invocation_method'] = self.method
+        if self.invocation_url is not None:
+            record['invocation_url'] = self.invocation_url
+        if self.extra:
+            record.update(self.extra)
+        record['request_timestamp'] = self.request_timestamp
+        record['response_timestamp'] = self.response_timestamp
+        record['request_timestamp_us'] = self.request_timestamp_us
+        record['response_timestamp_us'] = self.response_timestamp_us
+        record['invocation_status_code'] = self.status_code
+        record['invocation_retry_after'] = self.retry_after
+        record['normalized_url'] = self.normalized_url
+        record['response_time_ms'] = self.response_time_ms
+        return record
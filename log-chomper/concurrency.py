@@ -0,0 +1,244 @@
+"""
+In-flight concurrency analysis for log_chomper.
+
+Every completed call contributes a start event (+1) at its request time and an end
+event (-1) at its response time. Sorting the events by time, with ends before starts
+at the same microsecond except the end of a zero-length call, which follows its own
+start, and taking their cumulative sum gives the number of calls in flight after every
+event, i.e. the concurrency time series. The same sweep over the
+events sorted by (endpoint, time) gives the parallelism of each endpoint on its own,
+as the events of every endpoint sum to zero. Average parallelism is the total time
+spent in calls divided by the time span they cover, the integral of the series.
+
+The in-flight level at the start of each call is what the 429 responses and their
+Retry-After values are correlated with.
+"""
+
+from array import array
+
+import numpy as np
+
+THROTTLED_STATUS = 429
+
+
+class ConcurrencyTimeline:
+    """
+    Start and end times of all calls stored as contiguous arrays.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._key_codes = {}
+        self._codes = array('q')
+        self._starts = array('q')
+        self._ends = array('q')
+        self._statuses = array('q')
+        self._retry_after = array('q')
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, key, start_us, end_us, status_code, retry_after=0):
+        """
+        Add one completed call.
+
+        Args:
+            key (str): Method + normalized URL of the call
+            start_us (int): Request time in epoch microseconds
+            end_us (int): Response time in epoch microseconds
+            status_code (int): HTTP status code of the response, may be None
+            retry_after (int): Retry-After seconds of the response, 0 if absent
+        """
+        code = self._key_codes.get(key)
+        if code is None:
+            code = self._key_codes[key] = len(self.keys)
+            self.keys.append(key)
+        self._codes.append(code)
+        self._starts.append(start_us)
+        self._ends.append(max(end_us, start_us))
+        self._statuses.append(status_code or 0)
+        self._retry_after.append(retry_after or 0)
+
+    def to_dict(self):
+        """
+        Serialize the arrays to a JSON compatible dictionary.
+
+        Returns:
+            dict: State that can be restored with from_dict
+        """
+        return {'keys': self.keys, 'codes': self._codes.tolist(), 'starts': self._starts.tolist(),
+                'ends': self._ends.tolist(), 'statuses': self._statuses.tolist(),
+                'retry_after': self._retry_after.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore arrays serialized with to_dict.
+
+        Args:
+            data (dict): Serialized arrays
+
+        Returns:
+            ConcurrencyTimeline: The restored timeline
+        """
+        timeline = cls()
+        timeline.keys = list(data['keys'])
+        timeline._key_codes = {key: code for code, key in enumerate(timeline.keys)}
+        timeline._codes = array('q', data['codes'])
+        timeline._starts = array('q', data['starts'])
+        timeline._ends = array('q', data['ends'])
+        timeline._statuses = array('q', data['statuses'])
+        timeline._retry_after = array('q', data['retry_after'])
+        return timeline
+
+    def _arrays(self):
+        """NumPy views of the stored arrays."""
+        return (np.frombuffer(self._codes, dtype=np.int64), np.frombuffer(self._starts, dtype=np.int64),
+                np.frombuffer(self._ends, dtype=np.int64), np.frombuffer(self._statuses, dtype=np.int64),
+                np.frombuffer(self._retry_after, dtype=np.int64))
+
+    @staticmethod
+    def _sweep(starts, ends, groups=None):
+        """
+        Sort the start and end events and count the calls in flight after each one.
+
+        Args:
+            starts (ndarray): Start time of every call
+            ends (ndarray): End time of every call
+            groups (ndarray): Optional group code of every call to sweep each group
+                on its own
+
+        Returns:
+            tuple: (event order, event times, in-flight level after each event), with
+                indices below len(starts) in the order referring to start events
+        """
+        times = np.concatenate((starts, ends))
+        deltas = np.concatenate((np.ones(len(starts), dtype=np.int64), np.full(len(ends), -1, dtype=np.int64)))
+        # At equal times ends (-1) sort before starts (+1), but a call must count itself
+        # when it starts, so the end of a zero-length call sorts after the starts
+        ties = deltas.copy()
+        ties[len(starts):][ends == starts] = 2
+        keys = (ties, times) if groups is None else (ties, times, np.concatenate((groups, groups)))
+        order = np.lexsort(keys)
+        return order, times[order], np.cumsum(deltas[order])
+
+    def series(self):
+        """
+        Compute the in-flight concurrency time series.
+
+        Returns:
+            tuple: (times in epoch microseconds, number of calls in flight from that
+                time on) as NumPy arrays, one entry per distinct event time
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        _, starts, ends, _, _ = self._arrays()
+        _, times, levels = self._sweep(starts, ends)
+        last = np.append(times[1:] != times[:-1], True)
+        return times[last], levels[last]
+
+    def summarize(self):
+        """
+        Compute the overall and per-endpoint parallelism and its relation to 429s.
+
+        Returns:
+            dict: calls, peak, peak_time_us, average, throttled and the Pearson
+                correlations throttle_correlation (in-flight level at the start of a
+                call vs. the call being throttled) and retry_after_correlation (level
+                vs. Retry-After of the throttled calls), None when undefined;
+                endpoints, a list of (key, calls, peak, average, throttled, mean level
+                at the start of throttled calls, mean level at the start of the other
+                calls, total Retry-After seconds); and levels, a list of (lowest level,
+                highest level, calls, throttled, mean Retry-After seconds) per
+                power-of-two bucket of the level at the start of a call
+        """
+        if not len(self):
+            return None
+
+        codes, starts, ends, statuses, retry_after = self._arrays()
+        calls = len(starts)
+        durations = (ends - starts).astype(np.float64)
+        throttled = statuses == THROTTLED_STATUS
+
+        # Overall sweep, and the level each call saw when it started, itself included
+        order, times, levels = self._sweep(starts, ends)
+        peak_index = int(np.argmax(levels))
+        span = int(ends.max() - starts.min())
+        is_start = order < calls
+        start_levels = np.empty(calls, dtype=np.int64)
+        start_levels[order[is_start]] = levels[is_start]
+
+        # Per-endpoint sweep; the events of each endpoint form a contiguous run
+        group_order, _, group_levels = self._sweep(starts, ends, codes)
+        event_codes = np.concatenate((codes, codes))[group_order]
+        run_starts = np.concatenate(([0], np.flatnonzero(np.diff(event_codes)) + 1))
+        peaks = np.maximum.reduceat(group_levels, run_starts)
+        run_codes = event_codes[run_starts]
+
+        key_count = len(self.keys)
+        first_start = np.full(key_count, np.iinfo(np.int64).max)
+        last_end = np.full(key_count, np.iinfo(np.int64).min)
+        np.minimum.at(first_start, codes, starts)
+        np.maximum.at(last_end, codes, ends)
+        busy = np.bincount(codes, weights=durations, minlength=key_count)
+        call_counts = np.bincount(codes, minlength=key_count)
+        throttled_counts = np.bincount(codes, weights=throttled, minlength=key_count)
+        throttled_levels = np.bincount(codes, weights=start_levels * throttled, minlength=key_count)
+        other_levels = np.bincount(codes, weights=start_levels * ~throttled, minlength=key_count)
+        retry_after_totals = np.bincount(codes, weights=retry_after, minlength=key_count)
+
+        endpoints = []
+        for code, peak in zip(run_codes, peaks):
+            endpoint_span = last_end[code] - first_start[code]
+            count = int(call_counts[code])
+            throttled_count = int(throttled_counts[code])
+            endpoints.append((
+                self.keys[code], count, int(peak), float(busy[code] / endpoint_span) if endpoint_span else 0.0,
+                throttled_count,
+                float(throttled_levels[code] / throttled_count) if throttled_count else None,
+                float(other_levels[code] / (count - throttled_count)) if count > throttled_count else None,
+                int(retry_after_totals[code]),
+            ))
+
+        # Power-of-two buckets of the level at the start of a call: 1, 2, 3-4, 5-8, ...
+        buckets = np.ceil(np.log2(start_levels)).astype(np.int64)
+        bucket_calls = np.bincount(buckets)
+        bucket_throttled = np.bincount(buckets, weights=throttled, minlength=len(bucket_calls))
+        bucket_retry_after = np.bincount(buckets, weights=retry_after * throttled, minlength=len(bucket_calls))
+        level_rows = []
+        for bucket in np.flatnonzero(bucket_calls):
+            highest = 1 << int(bucket)
+            lowest = highest // 2 + 1 if bucket else 1
+            throttled_count = int(bucket_throttled[bucket])
+            level_rows.append((lowest, highest, int(bucket_calls[bucket]), throttled_count,
+                               float(bucket_retry_after[bucket] / throttled_count) if throttled_count else None))
+
+        return {
+            'calls': calls,
+            'peak': int(levels[peak_index]),
+            'peak_time_us': int(times[peak_index]),
+            'average': float(durations.sum() / span) if span else 0.0,
+            'throttled': int(throttled.sum()),
+            'throttle_correlation': _correlation(start_levels, throttled),
+            'retry_after_correlation': _correlation(start_levels[throttled], retry_after[throttled]),
+            'endpoints': endpoints,
+            'levels': level_rows,
+        }
+
+
+def _correlation(x, y):
+    """
+    Pearson correlation of two arrays.
+
+    Returns:
+        float: The correlation coefficient, or None if either array is constant or
+            has fewer than two values
+    """
+    if len(x) < 2:
+        return None
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if not x.std() or not y.std():
+        return None
+    return float(np.corrcoef(x, y)[0, 1])
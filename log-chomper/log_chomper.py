@@ -7,47 +7,81 @@ extracts JSON data, matches request-response pairs, and performs statistical ana
 """
 
 import json
-import re
 import argparse
 import os
+import sys
+import time
 import statistics
 import numpy as np
-from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, Counter, OrderedDict
+from sketch import DDSketch, DEFAULT_RELATIVE_ACCURACY
+from rolling import RollingWindowStats, DEFAULT_WINDOW_SECONDS
+from vectorized import GroupedLatencies
+from calls import MergedCall
+from concurrency import ConcurrencyTimeline
+from retries import RetryAccounting, DEFAULT_RETRY_GRACE_SECONDS
 
-# Regular expression patterns
-SDK_DEBUG_PATTERN = r'SDK DEBUG (REQUEST|RESPONSE)'
-JSON_EXTRACT_PATTERN = r'(\{.*\})$'
-GUID_PATTERN = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+# Share the log readers of the notebooks' commonlib package
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sdk-plan-notebooks'))
+import commonlib.logreader as logreader
+import commonlib.compressed as compressed
+import commonlib.columnar as columnar
+import commonlib.checkpoint as checkpoints
+import commonlib.urlnorm as urlnorm
+import commonlib.timestamps as timestamps
+import commonlib.parsecache as parsecache
+import commonlib.normalize as normalize
+import commonlib.config as cfg
 
+# debug_type of the entries paired by log_chomper
+SDK_DEBUG_TYPES = ("SDK DEBUG REQUEST", "SDK DEBUG RESPONSE")
 
-def process_log_file(input_file, output_file):
+# Raw lines without this byte string are skipped before being decoded
+SDK_DEBUG_MARKER = b'SDK DEBUG '
+
+# Defaults for the in-flight request table used to pair requests with responses
+DEFAULT_MAX_INFLIGHT = 100000
+DEFAULT_INFLIGHT_TIMEOUT_SECONDS = 600
+
+# Indentation of the JSON output files
+JSON_INDENT = 2
+
+# Percentiles reported in the response time statistics
+DEFAULT_PERCENTILES = (50, 75, 99)
+
+# Ways of computing the response time statistics: keep every value in per-endpoint
+# lists, estimate with quantile sketches, or compute from contiguous NumPy arrays
+STATS_MODES = ('exact', 'sketch', 'vectorized')
+
+# Number of endpoints listed in the concurrency and retry cost reports
+DEFAULT_CONCURRENCY_TOP = 20
+DEFAULT_RETRY_TOP = 20
+
+# Seconds between dashboard refreshes and between polls of a followed log file
+DEFAULT_REFRESH_SECONDS = 5
+FOLLOW_POLL_SECONDS = 0.5
+
+
+def process_log_file(input_file, output_file, workers=1, cache=None):
     """
     Process a log file to extract SDK DEBUG REQUEST and RESPONSE entries.
     
     Args:
-        input_file (str): Path to the input log file
-        output_file (str): Path to the output JSON file
+        input_file (str): Path to the input log file, optionally gzip or Zstandard compressed
+        output_file (str): Path to the output JSON file; compressed if it ends in .gz or .zst
+        workers (int): Number of processes used to parse the file in parallel chunks
+        cache (parsecache.ParseCache): Optional cache of the entries of previously parsed logs
     
     Returns:
         bool: True if processing was successful, False otherwise
     """
-    parsed_messages = []
-    
     try:
         # Read and process the input log file
-        with open(input_file, 'r', encoding='utf-8') as infile:
-            for line in infile:
-                try:
-                    parsed_message = _parse_log_line(line)
-                    if parsed_message:
-                        parsed_messages.append(parsed_message)
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing log line: {line.strip()}. Error: {e}")
+        parsed_messages = load_log_entries(input_file, workers, cache)
         
         # Write parsed JSON messages to output file
-        with open(output_file, 'w', encoding='utf-8') as outfile:
-            json.dump(parsed_messages, outfile, indent=2)
+        with compressed.open_output(output_file) as outfile:
+            json.dump(parsed_messages, outfile, indent=JSON_INDENT)
             
         print(f"Successfully processed {len(parsed_messages)} SDK DEBUG entries to {output_file}")
         return True
@@ -60,55 +94,108 @@ def process_log_file(input_file, output_file):
         return False
 
 
+def load_log_entries(input_file, workers=1, cache=None):
+    """
+    Read all SDK DEBUG entries of a log file, reusing the records cached for the same log
+    content by an earlier run.
+    
+    With a cache the SDK DEBUG entries are shared with the notebooks (see
+    commonlib.normalize), so a log already read by log_chomper or by a notebook is not
+    parsed again by the other. Both paths parse lines with normalize.parse_sdk_entry and
+    return the same entries.
+    
+    Args:
+        input_file (str): Path to the input log file
+        workers (int): Number of processes used to parse the file on a cache miss
+        cache (parsecache.ParseCache): Optional cache of the records of previously parsed logs
+    
+    Returns:
+        list: SDK DEBUG entries in log order
+    """
+    read_stats = logreader.ReadStats()
+    
+    if cache is None:
+        parsed_messages = list(iter_log_file(input_file, workers, read_stats))
+        print(read_stats.summary())
+        return parsed_messages
+    
+    parse = lambda: list(normalize.iter_normalized(
+        logreader.iter_records(input_file, workers=workers, stats=read_stats, markers=(normalize.SDK_DEBUG_MARKER,)),
+        normalize.parse_sdk_entry))
+    sdk_entries, hit = cache.cached(input_file, normalize.SDK_CACHE_KIND, normalize.PARSE_CACHE_VERSION, parse)
+    parsed_messages = [entry for entry in sdk_entries if entry.get('debug_type') in SDK_DEBUG_TYPES]
+    if hit:
+        print(f"Loaded {len(parsed_messages)} SDK DEBUG entries from the parse cache in {cache.cache_dir}")
+    else:
+        print(read_stats.summary())
+    return parsed_messages
+
+
+def iter_log_file(input_file, workers=1, read_stats=None, start_offset=0, complete_lines_only=False):
+    """
+    Lazily yield the SDK DEBUG entries found in a log file.
+    
+    Raw lines are scanned for SDK_DEBUG_MARKER as bytes first, so only candidate
+    lines are decoded and parsed as JSON.
+    
+    Args:
+        input_file (str): Path to the input log file, optionally gzip or Zstandard compressed
+        workers (int): Number of processes used to parse the file in parallel chunks;
+            entries are still yielded in log order
+        read_stats (logreader.ReadStats): Optional counters of lines skipped and decoded
+        start_offset (int): Byte offset of the first line to read
+        complete_lines_only (bool): Leave a partially written last line for a later read
+    
+    Yields:
+        dict: Parsed SDK DEBUG JSON object for each matching line
+    """
+    yield from logreader.iter_records(input_file, _parse_log_line, workers, stats=read_stats,
+                                      markers=(SDK_DEBUG_MARKER,), start_offset=start_offset,
+                                      complete_lines_only=complete_lines_only)
+
+
 def _parse_log_line(line):
     """
     Parse a single log line to extract SDK DEBUG information.
     
+    The payload is extracted by normalize.parse_sdk_entry, the parser of the entries
+    stored in the parse cache, so cached and uncached runs see the same entries.
+    
     Args:
         line (str): A single line from the log file
     
     Returns:
-        dict: Parsed JSON object or None if no SDK DEBUG data found
+        dict: Parsed JSON object or None if no SDK DEBUG REQUEST or RESPONSE data found
     """
     try:
         # Parse the line as JSON
         log_entry = json.loads(line.strip())
-        message = log_entry.get('@message', '')
-        
-        # Check if the message contains SDK DEBUG REQUEST or RESPONSE
-        if re.search(SDK_DEBUG_PATTERN, message):
-            # Extract the JSON string from the message
-            json_str_match = re.search(JSON_EXTRACT_PATTERN, message)
-            if json_str_match:
-                json_str = json_str_match.group(1)
-                # Parse the inner JSON string
-                inner_json = json.loads(json_str)
-                
-                # Add timestamp from the outer record to the inner JSON
-                timestamp = log_entry.get('@timestamp')
-                if timestamp:
-                    inner_json['timestamp'] = timestamp
-                return inner_json
     except json.JSONDecodeError as e:
-        print(f"Error parsing inner JSON in line: {line.strip()}. Error: {e}")
+        print(f"Error parsing JSON in line: {line.strip()}. Error: {e}")
+        return None
     
+    # Extract the inner JSON of the message, with the timestamp of the outer record
+    # added and decoded once to epoch microseconds for the latency calculations
+    inner_json = normalize.parse_sdk_entry(log_entry)
+    if inner_json is not None and inner_json.get('debug_type') in SDK_DEBUG_TYPES:
+        return inner_json
     return None
 
 
-def merge_request_response(output_file):
+def merge_request_response(output_file, matcher=None, output_format=columnar.JSON_FORMAT):
     """
     Match SDK DEBUG REQUEST and RESPONSE pairs and calculate response times.
     
     Args:
         output_file (str): Path to the JSON file containing parsed SDK DEBUG entries
+        matcher (RequestResponseMatcher): Optional matcher controlling the in-flight
+            window; a matcher with the default limits is used when omitted
+        output_format (str): Format of the merged records file: json, parquet or arrow
     
     Returns:
         str: Path to the output file with merged records, or None if an error occurred
     """
-    # Generate the new output file name with "time" prepended
-    dir_name = os.path.dirname(output_file)
-    base_name = os.path.basename(output_file)
-    time_output_file = os.path.join(dir_name, f"time{base_name}")
+    time_output_file = _time_output_path(output_file, output_format)
     
     try:
         # Read the processed JSON data
@@ -119,15 +206,20 @@ def merge_request_response(output_file):
         # Log unique HTTP methods found
         _log_unique_methods(records, "input")
         
-        # Separate and match requests and responses
-        requests, responses = _separate_requests_responses(records)
-        merged_records = _create_merged_records(requests, responses)
+        # Match requests and responses
+        matcher = matcher or RequestResponseMatcher()
+        merged_calls = _create_merged_records(records, matcher)
+        _print_orphan_summary(matcher)
         
-        # Write merged records to the new output file
-        with open(time_output_file, 'w', encoding='utf-8') as outfile:
-            json.dump(merged_records, outfile, indent=2)
+        # Write merged records to the new output file, converting one call at a time
+        merged_writer = _open_merged_writer(time_output_file, output_format)
+        try:
+            for merged_call in merged_calls:
+                merged_writer.write(merged_call.to_dict())
+        finally:
+            merged_writer.close()
             
-        print(f"Successfully merged {len(merged_records)} request-response pairs to {time_output_file}")
+        print(f"Successfully merged {len(merged_calls)} request-response pairs to {time_output_file}")
         return time_output_file
         
     except Exception as e:
@@ -135,18 +227,61 @@ def merge_request_response(output_file):
         return None
 
 
+def _time_output_path(output_file, output_format=columnar.JSON_FORMAT):
+    """
+    Build the merged records file name by prepending "time" to the output file name.
+    
+    For the columnar formats the file extension is replaced by the format's extension;
+    a .gz or .zst extension is kept in all formats.
+    
+    Args:
+        output_file (str): Path to the JSON file containing parsed SDK DEBUG entries
+        output_format (str): Format of the merged records file: json, parquet or arrow
+    
+    Returns:
+        str: Path to the merged records file
+    """
+    dir_name = os.path.dirname(output_file)
+    base_name = os.path.basename(output_file)
+    if output_format != columnar.JSON_FORMAT:
+        uncompressed_name = compressed.strip_compression_extension(base_name)
+        base_name = (os.path.splitext(uncompressed_name)[0] + columnar.FORMAT_EXTENSIONS[output_format]
+                     + base_name[len(uncompressed_name):])
+    return os.path.join(dir_name, f"time{base_name}")
+
+
+def _read_records(file_path):
+    """
+    Read merged records from a JSON, Parquet or Arrow IPC file.
+    
+    Args:
+        file_path (str): Path to the merged records file
+    
+    Returns:
+        list: Record dictionaries or None if an error occurred
+    """
+    if columnar.format_from_path(file_path) == columnar.JSON_FORMAT:
+        return _read_json_file(file_path)
+    
+    try:
+        return columnar.read_table(file_path).to_pylist()
+    except FileNotFoundError:
+        print(f"File {file_path} not found")
+        return None
+
+
 def _read_json_file(file_path):
     """
     Read and parse a JSON file.
     
     Args:
-        file_path (str): Path to the JSON file
+        file_path (str): Path to the JSON file, optionally gzip or Zstandard compressed
     
     Returns:
         list: Parsed JSON data or None if an error occurred
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as infile:
+        with compressed.open_input(file_path, 'r') as infile:
             return json.load(infile)
     except FileNotFoundError:
         print(f"File {file_path} not found")
@@ -171,111 +306,251 @@ def _log_unique_methods(records, stage=""):
     print(f"Found methods in {stage} records: {methods}")
 
 
-def _separate_requests_responses(records):
+class RequestResponseMatcher:
     """
-    Separate records into requests and responses.
+    Incrementally pair SDK DEBUG REQUEST and RESPONSE records by transaction_id.
     
-    Args:
-        records (list): List of record dictionaries
-    
-    Returns:
-        tuple: (requests dict, responses dict) indexed by transaction_id
+    Only requests that are still waiting for their response are held in memory. A
+    merged record is produced as soon as the matching response arrives. Requests
+    that stay unanswered for longer than max_age_seconds (measured against the
+    timestamps in the log) or that overflow max_inflight are expired and counted
+    as orphans, together with any requests still waiting when the log ends.
     """
-    requests = {}
-    responses = {}
     
-    for record in records:
+    def __init__(self, max_inflight=DEFAULT_MAX_INFLIGHT,
+                 max_age_seconds=DEFAULT_INFLIGHT_TIMEOUT_SECONDS):
+        self.max_inflight = max_inflight
+        self.max_age_seconds = max_age_seconds
+        self.matched = 0
+        self.unmatched_responses = 0
+        self.orphans = Counter()
+        self.orphan_endpoints = Counter()
+        self.methods = set()
+        # transaction_id -> (request record, request time in epoch microseconds), oldest first
+        self._inflight = OrderedDict()
+    
+    @property
+    def inflight(self):
+        """int: Number of requests currently waiting for a response."""
+        return len(self._inflight)
+    
+    def add(self, record):
+        """
+        Feed a single parsed SDK DEBUG record to the matcher.
+        
+        Args:
+            record (dict): Parsed SDK DEBUG REQUEST or RESPONSE record
+        
+        Returns:
+            MergedCall: The merged call when record completes a pair, otherwise None
+        """
         debug_type = record.get('debug_type')
         transaction_id = record.get('transaction_id')
+        if not transaction_id:
+            return None
+        
+        record_time = _record_time_us(record)
+        if record_time is not None:
+            self._expire(record_time)
+        
+        if debug_type == "SDK DEBUG REQUEST":
+            if 'invocation_method' in record:
+                self.methods.add(record['invocation_method'])
+            self._inflight[transaction_id] = (record, record_time)
+            self._inflight.move_to_end(transaction_id)
+            while len(self._inflight) > self.max_inflight:
+                self._orphan(self._inflight.popitem(last=False)[1][0], 'overflow')
+            return None
+        
+        if debug_type == "SDK DEBUG RESPONSE":
+            pending = self._inflight.pop(transaction_id, None)
+            if pending is None:
+                self.unmatched_responses += 1
+                return None
+            self.matched += 1
+            return _merge_pair(pending[0], record, transaction_id)
         
-        if debug_type == "SDK DEBUG REQUEST" and transaction_id:
-            requests[transaction_id] = record
-        elif debug_type == "SDK DEBUG RESPONSE" and transaction_id:
-            responses[transaction_id] = record
+        return None
+    
+    def get_state(self):
+        """
+        Capture the in-flight table and counters so matching can resume later.
+        
+        Returns:
+            dict: JSON serializable matcher state
+        """
+        return {
+            'inflight': [[transaction_id, request, request_time]
+                         for transaction_id, (request, request_time) in self._inflight.items()],
+            'matched': self.matched,
+            'unmatched_responses': self.unmatched_responses,
+            'orphans': dict(self.orphans),
+            'orphan_endpoints': dict(self.orphan_endpoints),
+            'methods': sorted(self.methods),
+        }
+    
+    def set_state(self, state):
+        """
+        Restore the in-flight table and counters captured with get_state.
+        
+        Args:
+            state (dict): Matcher state
+        """
+        self._inflight = OrderedDict(
+            (transaction_id, (request, request_time))
+            for transaction_id, request, request_time in state['inflight'])
+        self.matched = state['matched']
+        self.unmatched_responses = state['unmatched_responses']
+        self.orphans = Counter(state['orphans'])
+        self.orphan_endpoints = Counter(state['orphan_endpoints'])
+        self.methods = set(state['methods'])
     
-    return requests, responses
+    def finish(self):
+        """Count every request still waiting for a response as an orphan."""
+        while self._inflight:
+            self._orphan(self._inflight.popitem(last=False)[1][0], 'end of log')
+    
+    def _expire(self, now):
+        """Expire in-flight requests older than max_age_seconds relative to now (epoch microseconds)."""
+        if self.max_age_seconds is None:
+            return
+        while self._inflight:
+            request, request_time = next(iter(self._inflight.values()))
+            if request_time is None or now - request_time <= self.max_age_seconds * timestamps.MICROSECONDS_PER_SECOND:
+                break
+            self._inflight.popitem(last=False)
+            self._orphan(request, 'timeout')
+    
+    def _orphan(self, request, reason):
+        """Record an expired request."""
+        self.orphans[reason] += 1
+        method = request.get('invocation_method', 'UNKNOWN')
+        url = _normalize_url(request.get('invocation_url', ''))
+        self.orphan_endpoints[f"{method} {url}"] += 1
 
 
-def _create_merged_records(requests, responses):
+def _print_orphan_summary(matcher, top=10):
     """
-    Create merged records from matching request-response pairs.
+    Print the requests that never received a response and unmatched responses.
     
     Args:
-        requests (dict): Request records indexed by transaction_id
-        responses (dict): Response records indexed by transaction_id
+        matcher (RequestResponseMatcher): Matcher that processed the log
+        top (int): Number of endpoints with the most orphans to list
+    """
+    total = sum(matcher.orphans.values())
+    if matcher.unmatched_responses:
+        print(f"{matcher.unmatched_responses} responses had no matching request")
+    if not total:
+        return
+    
+    reasons = ", ".join(f"{reason}: {count}" for reason, count in matcher.orphans.most_common())
+    print(f"{total} orphaned requests without a response ({reasons})")
+    for key, count in matcher.orphan_endpoints.most_common(top):
+        print(f"  {count:<8d} {key}")
+
+
+def _create_merged_records(records, matcher):
+    """
+    Create merged calls from matching request-response pairs.
+    
+    Args:
+        records (iterable): Parsed SDK DEBUG records in log order
+        matcher (RequestResponseMatcher): Matcher used to pair the records
     
     Returns:
-        list: Merged records with calculated response times
+        list: MergedCall objects with calculated response times
     """
-    merged_records = []
+    merged_calls = []
     
-    for transaction_id, request in requests.items():
-        if transaction_id in responses:
-            response = responses[transaction_id]
-            
-            # Create a merged record based on the request
-            merged_record = request.copy()
-            merged_record['debug_type'] = "SDK DEBUG MERGE"
-            
-            # Process timestamps
-            req_timestamp = request.get('timestamp')
-            resp_timestamp = response.get('timestamp')
-            
-            if 'timestamp' in merged_record:
-                del merged_record['timestamp']
-            
-            merged_record['request_timestamp'] = req_timestamp
-            merged_record['response_timestamp'] = resp_timestamp
-            merged_record['invocation_status_code'] = response.get("invocation_status_code")
-            
-            # Create normalized URL
-            url = merged_record.get('invocation_url', '')
-            normalized_url = re.sub(GUID_PATTERN, '{GUID}', url, flags=re.IGNORECASE)
-            merged_record['normalized_url'] = normalized_url
-            
-            # Calculate response time
-            merged_record['response_time_ms'] = _calculate_response_time(
-                req_timestamp, resp_timestamp, transaction_id)
-            
-            merged_records.append(merged_record)
+    for record in records:
+        merged_call = matcher.add(record)
+        if merged_call:
+            merged_calls.append(merged_call)
     
-    return merged_records
+    matcher.finish()
+    return merged_calls
 
 
-def _calculate_response_time(req_timestamp, resp_timestamp, transaction_id):
+def _merge_pair(request, response, transaction_id):
     """
-    Calculate the time difference between request and response.
+    Merge a single request-response pair into one call.
     
     Args:
-        req_timestamp (str): Request timestamp
-        resp_timestamp (str): Response timestamp
+        request (dict): SDK DEBUG REQUEST record
+        response (dict): SDK DEBUG RESPONSE record with the same transaction_id
         transaction_id (str): Transaction ID for error reporting
     
     Returns:
-        float: Time difference in milliseconds or None if calculation failed
+        MergedCall: Merged call with calculated response time
     """
-    try:
-        req_time = datetime.fromisoformat(req_timestamp.replace('Z', '+00:00'))
-        resp_time = datetime.fromisoformat(resp_timestamp.replace('Z', '+00:00'))
-        return (resp_time - req_time).total_seconds() * 1000
-    except (ValueError, AttributeError, TypeError) as e:
-        print(f"Error calculating time difference for transaction {transaction_id}: {e}")
-        return None
+    merged_call = MergedCall.from_pair(request, response, _record_time_us(request), _record_time_us(response))
+    if merged_call.response_time_ms is None:
+        print(f"Error calculating time difference for transaction {transaction_id}: missing or invalid timestamp")
+    return merged_call
+
+
+def _normalize_url(url):
+    """
+    Collapse a raw URL into its endpoint template using the shared normalizer.
+    
+    Args:
+        url (str): Raw invocation URL
+    
+    Returns:
+        str: Normalized URL with GUIDs, numeric IDs and query values replaced
+    """
+    return urlnorm.normalize_url(url)
+
+
+def _record_time_us(record):
+    """
+    Get the log time of a parsed record in epoch microseconds.
+    
+    Records parsed by _parse_log_line carry the decoded time in timestamp_us; for
+    records read from older output files the timestamp string is decoded instead.
+    
+    Args:
+        record (dict): Parsed SDK DEBUG record
+    
+    Returns:
+        int: Microseconds since the epoch or None if the record has no valid timestamp
+    """
+    timestamp_us = record.get('timestamp_us')
+    if timestamp_us is None and record.get('timestamp'):
+        timestamp_us = timestamps.parse_timestamp_us(record['timestamp'])
+    return timestamp_us
 
 
-def analyze_response_times(time_output_file):
+def analyze_response_times(time_output_file, stats='exact', sketch_accuracy=DEFAULT_RELATIVE_ACCURACY,
+                           percentiles=DEFAULT_PERCENTILES, concurrency=False, timeline_file=None,
+                           retry_accounting=None):
     """
     Analyze response times by method and URL.
     
     Args:
         time_output_file (str): Path to the file with merged request-response records
+        stats (str): How to compute the statistics, one of STATS_MODES
+        sketch_accuracy (float): Relative accuracy of the quantile sketches in sketch mode
+        percentiles (tuple): Percentiles to report
+        concurrency (bool): Also report in-flight concurrency and its relation to 429s
+        timeline_file (str): Optional CSV file for the in-flight concurrency time series
+        retry_accounting (RetryAccounting): Optional accounting of the time lost to
+            retries and rate-limit backoff, reported after the statistics
     
     Returns:
         bool: True if analysis was successful, False otherwise
     """
     try:
+        # Columnar files can be loaded straight into the vectorized arrays
+        if (stats == 'vectorized' and not concurrency and retry_accounting is None
+                and columnar.format_from_path(time_output_file) != columnar.JSON_FORMAT):
+            table = columnar.read_table(
+                time_output_file, columns=['invocation_method', 'normalized_url', 'response_time_ms'])
+            _print_response_time_statistics(GroupedLatencies.from_table(table), percentiles)
+            return True
+        
         # Read the merged records
-        records = _read_json_file(time_output_file)
+        records = _read_records(time_output_file)
         if not records:
             return False
         
@@ -283,8 +558,21 @@ def analyze_response_times(time_output_file):
         _log_unique_methods(records, "analysis")
         
         # Group and analyze response times
-        grouped_times = _group_response_times(records)
-        _print_response_time_statistics(grouped_times)
+        merged_calls = [MergedCall.from_dict(record) for record in records]
+        grouped_times = _group_response_times(merged_calls, stats, sketch_accuracy)
+        _print_response_time_statistics(grouped_times, percentiles)
+        
+        if concurrency:
+            timeline = ConcurrencyTimeline()
+            for merged_call in merged_calls:
+                _add_concurrency(timeline, merged_call)
+            _report_concurrency(timeline, timeline_file)
+        
+        if retry_accounting is not None:
+            for merged_call in merged_calls:
+                _add_retry_cost(retry_accounting, merged_call)
+            retry_accounting.finish()
+            _print_retry_report(retry_accounting)
         
         return True
         
@@ -293,61 +581,596 @@ def analyze_response_times(time_output_file):
         return False
 
 
-def _group_response_times(records):
+def stream_log_file(input_file, output_file=None, matcher=None, stats='exact',
+                    sketch_accuracy=DEFAULT_RELATIVE_ACCURACY, percentiles=DEFAULT_PERCENTILES,
+                    workers=1, output_format=columnar.JSON_FORMAT, checkpoint_file=None, cache=None,
+                    concurrency=False, timeline_file=None, retry_accounting=None):
+    """
+    Parse, pair and analyze a log file in a single pass.
+    
+    Lines flow straight from the input file through request-response matching into
+    the response time statistics, so only in-flight requests and the per-endpoint
+    response times are held in memory. The intermediate JSON files produced by the
+    default pipeline are only written when an output file is given.
+    
+    With a checkpoint file, the byte offset reached, the in-flight requests and the
+    per-endpoint response times are saved at the end of the run, and the next run
+    only parses the lines appended since then. Requests still waiting for their
+    response stay in flight instead of being reported as orphans.
+    
+    Args:
+        input_file (str): Path to the input log file
+        output_file (str): Optional path for the extracted SDK DEBUG entries; the merged
+            records are written next to it with "time" prepended to the file name
+        matcher (RequestResponseMatcher): Optional matcher controlling the in-flight
+            window; a matcher with the default limits is used when omitted
+        stats (str): How to compute the statistics, one of STATS_MODES
+        sketch_accuracy (float): Relative accuracy of the quantile sketches in sketch mode
+        percentiles (tuple): Percentiles to report
+        workers (int): Number of processes used to parse the file in parallel chunks
+        output_format (str): Format of the merged records file: json, parquet or arrow
+        checkpoint_file (str): Optional path of a checkpoint file used to resume parsing
+            of a growing log; cannot be combined with output_file
+        cache (parsecache.ParseCache): Optional cache of the entries of previously parsed
+            logs; the entries are then held in memory, and it is ignored with a checkpoint
+        concurrency (bool): Also report in-flight concurrency and its relation to 429s;
+            the start and end time of every call is then kept in memory
+        timeline_file (str): Optional CSV file for the in-flight concurrency time series
+        retry_accounting (RetryAccounting): Optional accounting of the time lost to
+            retries and rate-limit backoff, updated in the same pass
+    
+    Returns:
+        bool: True if processing was successful, False otherwise
+    """
+    matcher = matcher or RequestResponseMatcher()
+    entries_writer = None
+    merged_writer = None
+    
+    try:
+        checkpoint = None
+        start_offset = 0
+        entry_count = 0
+        grouped_times = _new_grouped_times(stats, sketch_accuracy)
+        timeline = ConcurrencyTimeline() if concurrency else None
+        stats_settings = [stats, sketch_accuracy if stats == 'sketch' else None]
+        accounting = retry_accounting
+        if concurrency:
+            stats_settings.append('concurrency')
+        if accounting is not None:
+            stats_settings.append(['retries', accounting.grace_seconds])
+        
+        if checkpoint_file:
+            checkpoint = checkpoints.Checkpoint.load(checkpoint_file, input_file)
+            if checkpoint.reset_reason:
+                print(f"Ignoring checkpoint {checkpoint_file}: {checkpoint.reset_reason}")
+            elif checkpoint.state and checkpoint.state.get('stats') != stats_settings:
+                print(f"Ignoring checkpoint {checkpoint_file}: it was written with different --stats, "
+                      "--concurrency or --retries settings")
+            elif checkpoint.state:
+                start_offset = checkpoint.offset
+                entry_count = checkpoint.state['entries']
+                matcher.set_state(checkpoint.state['matcher'])
+                grouped_times = _load_grouped_times(checkpoint.state['grouped_times'], stats, sketch_accuracy)
+                if concurrency:
+                    timeline = ConcurrencyTimeline.from_dict(checkpoint.state['concurrency'])
+                if accounting is not None:
+                    accounting = RetryAccounting.from_dict(checkpoint.state['retries'])
+                print(f"Resuming {input_file} from byte {start_offset}")
+        
+        if output_file:
+            entries_writer = columnar.JsonArrayWriter(output_file, JSON_INDENT)
+            time_output_file = _time_output_path(output_file, output_format)
+            merged_writer = _open_merged_writer(time_output_file, output_format)
+        
+        read_stats = None
+        if cache is not None and not checkpoint:
+            entries = load_log_entries(input_file, workers, cache)
+        else:
+            read_stats = logreader.ReadStats()
+            entries = iter_log_file(input_file, workers, read_stats, start_offset, bool(checkpoint))
+        
+        for record in entries:
+            entry_count += 1
+            if entries_writer:
+                entries_writer.write(record)
+            
+            merged_call = matcher.add(record)
+            if merged_call:
+                if merged_writer:
+                    merged_writer.write(merged_call.to_dict())
+                _add_response_time(grouped_times, merged_call)
+                if timeline is not None:
+                    _add_concurrency(timeline, merged_call)
+                if accounting is not None:
+                    _add_retry_cost(accounting, merged_call)
+        
+        if checkpoint:
+            state = {
+                'entries': entry_count,
+                'stats': stats_settings,
+                'matcher': matcher.get_state(),
+                'grouped_times': _dump_grouped_times(grouped_times),
+            }
+            if timeline is not None:
+                state['concurrency'] = timeline.to_dict()
+            if accounting is not None:
+                state['retries'] = accounting.to_dict()
+            checkpoint.save(read_stats.end_offset, state)
+            print(f"Saved checkpoint at byte {read_stats.end_offset} with {matcher.inflight} requests in flight")
+        else:
+            matcher.finish()
+            if accounting is not None:
+                accounting.finish()
+        
+        if read_stats:
+            print(read_stats.summary())
+        print(f"Successfully processed {entry_count} SDK DEBUG entries from {input_file}")
+        print(f"Found methods in input records: {matcher.methods}")
+        print(f"Successfully merged {matcher.matched} request-response pairs")
+        _print_orphan_summary(matcher)
+        
+        _print_response_time_statistics(grouped_times, percentiles)
+        if timeline is not None:
+            _report_concurrency(timeline, timeline_file)
+        if accounting is not None:
+            _print_retry_report(accounting)
+        return True
+        
+    except FileNotFoundError:
+        print(f"Input file {input_file} not found")
+        return False
+    except Exception as e:
+        print(f"An error occurred during streaming: {e}")
+        return False
+    finally:
+        for writer in (entries_writer, merged_writer):
+            if writer:
+                writer.close()
+
+
+def follow_log_file(input_file, matcher=None, window_seconds=DEFAULT_WINDOW_SECONDS,
+                    refresh_seconds=DEFAULT_REFRESH_SECONDS, top=20):
+    """
+    Tail a log file while Terraform writes it and print a rolling-window dashboard.
+    
+    Every refresh_seconds the busiest endpoints of the last window_seconds of log time
+    are printed with their call counts, p50/p99 response times, error rates and 429
+    counts. The window aggregates are updated in O(1) per completed call. The log is
+    followed until interrupted with Ctrl+C; if it does not exist yet, it is waited for.
+    
+    Args:
+        input_file (str): Path to the log file, typically TF_LOG_PATH
+        matcher (RequestResponseMatcher): Optional matcher controlling the in-flight
+            window; a matcher with the default limits is used when omitted
+        window_seconds (float): Length of the rolling window in seconds of log time
+        refresh_seconds (float): Seconds between dashboard refreshes
+        top (int): Number of endpoints shown on the dashboard
+    
+    Returns:
+        bool: True when following was stopped by the user
+    """
+    matcher = matcher or RequestResponseMatcher()
+    window = RollingWindowStats(window_seconds)
+    next_refresh = time.monotonic() + refresh_seconds
+    
+    print(f"Following {input_file}, press Ctrl+C to stop")
+    try:
+        for raw_line in _tail_lines(input_file):
+            if raw_line is not None and SDK_DEBUG_MARKER in raw_line:
+                record = _parse_log_line(raw_line.decode('utf-8', errors='replace'))
+                merged_call = matcher.add(record) if record else None
+                if merged_call and merged_call.response_time_ms is not None:
+                    response_time = merged_call.response_timestamp_us / timestamps.MICROSECONDS_PER_SECOND
+                    window.add(response_time, merged_call.endpoint_key, merged_call.response_time_ms,
+                               merged_call.status_code)
+            
+            if time.monotonic() >= next_refresh:
+                window.print_dashboard(top)
+                next_refresh = time.monotonic() + refresh_seconds
+    except KeyboardInterrupt:
+        window.print_dashboard(top)
+        print(f"\nStopped following {input_file} after {matcher.matched} request-response pairs")
+    return True
+
+
+def _tail_lines(input_file, poll_seconds=FOLLOW_POLL_SECONDS):
+    """
+    Yield the complete lines of a file as they are written, like tail -F.
+    
+    None is yielded whenever no new data is available, so the caller can do periodic
+    work while waiting. A truncated or replaced file is reopened from the start.
+    
+    Args:
+        input_file (str): Path to the file to follow
+        poll_seconds (float): Seconds to wait before polling for new data
+    
+    Yields:
+        bytes: Each complete line including its newline, or None while idle
+    """
+    infile = None
+    partial = b''
+    try:
+        while True:
+            if infile is None:
+                if not os.path.exists(input_file):
+                    yield None
+                    time.sleep(poll_seconds)
+                    continue
+                infile = open(input_file, 'rb')
+                inode = os.fstat(infile.fileno()).st_ino
+                partial = b''
+            
+            chunk = infile.readline()
+            if chunk:
+                partial += chunk
+                if partial.endswith(b'\n'):
+                    yield partial
+                    partial = b''
+                continue
+            
+            # No new data: reopen the file if it was truncated or replaced
+            try:
+                stat = os.stat(input_file)
+                if stat.st_ino != inode or stat.st_size < infile.tell():
+                    infile.close()
+                    infile = None
+                    continue
+            except FileNotFoundError:
+                pass
+            yield None
+            time.sleep(poll_seconds)
+    finally:
+        if infile:
+            infile.close()
+
+
+def _open_merged_writer(time_output_file, output_format=columnar.JSON_FORMAT):
+    """
+    Open an incremental writer for the merged records file.
+    
+    Args:
+        time_output_file (str): Path of the merged records file
+        output_format (str): Format of the file: json, parquet or arrow
+    
+    Returns:
+        columnar.JsonArrayWriter or columnar.ColumnarWriter: Writer with write(record) and
+            close() methods
+    """
+    if output_format == columnar.JSON_FORMAT:
+        return columnar.JsonArrayWriter(time_output_file, JSON_INDENT)
+    return columnar.ColumnarWriter(time_output_file, output_format)
+
+
+def _new_grouped_times(stats='exact', sketch_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """
+    Create an empty container for response times grouped by method and URL.
+    
+    Args:
+        stats (str): How to compute the statistics, one of STATS_MODES
+        sketch_accuracy (float): Relative accuracy of the per-group quantile sketches
+            in sketch mode
+    
+    Returns:
+        dict or GroupedLatencies: Mapping of method+URL to a list of response times or a
+            DDSketch, or contiguous arrays of endpoint codes and response times
+    """
+    if stats == 'vectorized':
+        return GroupedLatencies()
+    if stats == 'sketch':
+        return defaultdict(lambda: DDSketch(sketch_accuracy))
+    return defaultdict(list)
+
+
+def _dump_grouped_times(grouped_times):
+    """
+    Serialize grouped response times for a checkpoint.
+    
+    Args:
+        grouped_times (dict or GroupedLatencies): Response times grouped by method+URL
+    
+    Returns:
+        dict: JSON serializable grouped response times
+    """
+    if isinstance(grouped_times, GroupedLatencies):
+        return grouped_times.to_dict()
+    return {key: times.to_dict() if isinstance(times, DDSketch) else times
+            for key, times in grouped_times.items()}
+
+
+def _load_grouped_times(data, stats='exact', sketch_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """
+    Restore grouped response times serialized with _dump_grouped_times.
+    
+    Args:
+        data (dict): Serialized grouped response times
+        stats (str): Statistics mode the groups were built with, one of STATS_MODES
+        sketch_accuracy (float): Relative accuracy of the sketches in sketch mode
+    
+    Returns:
+        dict or GroupedLatencies: Response times grouped by method+URL
+    """
+    if stats == 'vectorized':
+        return GroupedLatencies.from_dict(data)
+    
+    grouped_times = _new_grouped_times(stats, sketch_accuracy)
+    for key, times in data.items():
+        grouped_times[key] = DDSketch.from_dict(times) if stats == 'sketch' else times
+    return grouped_times
+
+
+def _group_response_times(records, stats='exact', sketch_accuracy=DEFAULT_RELATIVE_ACCURACY):
     """
     Group response times by method and URL.
     
     Args:
-        records (list): List of merged record dictionaries
+        records (iterable): MergedCall objects
+        stats (str): How to compute the statistics, one of STATS_MODES
+        sketch_accuracy (float): Relative accuracy of the per-group quantile sketches
+            in sketch mode
     
     Returns:
-        dict: Response times grouped by method+URL
+        dict or GroupedLatencies: Response times grouped by method+URL
     """
-    grouped_times = defaultdict(list)
+    grouped_times = _new_grouped_times(stats, sketch_accuracy)
     
     for record in records:
-        method = record.get('invocation_method', 'UNKNOWN')
-        url = record.get('normalized_url', 'UNKNOWN')
-        response_time = record.get('response_time_ms')
-        
-        if response_time is not None:
-            key = f"{method} {url}"
-            grouped_times[key].append(response_time)
+        _add_response_time(grouped_times, record)
     
     return grouped_times
 
 
-def _print_response_time_statistics(grouped_times):
+def _add_response_time(grouped_times, record):
+    """
+    Add the response time of a single merged call to its method+URL group.
+    
+    Args:
+        grouped_times (dict or GroupedLatencies): Response times grouped by method+URL
+        record (MergedCall): Merged call
+    """
+    response_time = record.response_time_ms
+    
+    if response_time is not None:
+        key = record.endpoint_key
+        if isinstance(grouped_times, GroupedLatencies):
+            grouped_times.add(key, response_time)
+        else:
+            grouped_times[key].append(response_time)
+
+
+def _add_concurrency(timeline, record):
+    """
+    Add the start and end time of a single merged call to the concurrency timeline.
+    
+    Args:
+        timeline (ConcurrencyTimeline): Start and end times of the calls
+        record (MergedCall): Merged call
+    """
+    if record.request_timestamp_us is not None and record.response_timestamp_us is not None:
+        timeline.add(record.endpoint_key, record.request_timestamp_us, record.response_timestamp_us,
+                     record.status_code, record.retry_after)
+
+
+def _add_retry_cost(accounting, record):
+    """
+    Add a single merged call to the retry cost accounting.
+    
+    Args:
+        accounting (RetryAccounting): Retry costs per endpoint and resource type
+        record (MergedCall): Merged call
+    """
+    if record.request_timestamp_us is not None and record.response_timestamp_us is not None:
+        accounting.add(record.method, record.invocation_url, record.endpoint_key, record.request_timestamp_us,
+                       record.response_timestamp_us, record.status_code, record.retry_after)
+
+
+def _summarize_times(times, percentiles=DEFAULT_PERCENTILES):
+    """
+    Compute the summary statistics of one group of response times.
+    
+    Args:
+        times (list or DDSketch): Response times of the group
+        percentiles (tuple): Percentiles to compute
+    
+    Returns:
+        tuple: (count, min, max, mean, list of percentile values)
+    """
+    if isinstance(times, DDSketch):
+        return (times.count, times.min, times.max, times.mean,
+                [times.percentile(p) for p in percentiles])
+    
+    return (len(times), min(times), max(times), statistics.mean(times),
+            list(np.percentile(times, percentiles)))
+
+
+def _response_time_statistics(grouped_times, percentiles=DEFAULT_PERCENTILES):
+    """
+    Compute the summary statistics of every method+URL group.
+    
+    Args:
+        grouped_times (dict or GroupedLatencies): Response times grouped by method+URL
+        percentiles (tuple): Percentiles to compute
+    
+    Returns:
+        list: (key, count, min, max, mean, list of percentile values) per group
+    """
+    if isinstance(grouped_times, GroupedLatencies):
+        return grouped_times.summarize(percentiles)
+    
+    return [(key, *_summarize_times(times, percentiles))
+            for key, times in grouped_times.items() if len(times)]
+
+
+def _print_response_time_statistics(grouped_times, percentiles=DEFAULT_PERCENTILES):
     """
     Print statistics for response times grouped by method and URL.
     
     Args:
-        grouped_times (dict): Response times grouped by method+URL
+        grouped_times (dict or GroupedLatencies): Response times grouped by method+URL,
+            as lists of values, DDSketch instances or vectorized arrays
+        percentiles (tuple): Percentiles to report
     """
+    percentile_headers = "".join(f" {f'{p:g}%':<8}" for p in percentiles)
+    width = 76 + 9 * len(percentiles)
+    
     print("\nResponse Time Statistics (in milliseconds):")
-    print("-" * 100)
-    print(f"{'Method + URL':<40} {'Count':<8} {'Min':<8} {'Max':<8} {'Mean':<8} {'50%':<8} {'75%':<8} {'99%':<8}")
-    print("-" * 100)
+    print("-" * width)
+    print(f"{'Method + URL':<40} {'Count':<8} {'Min':<8} {'Max':<8} {'Mean':<8}{percentile_headers}")
+    print("-" * width)
     
-    # Create a list of (key, times) tuples sorted by count in descending order
-    sorted_items = sorted(grouped_times.items(), key=lambda x: len(x[1]), reverse=True)
+    # Sort the per-group statistics by count in descending order
+    rows = sorted(_response_time_statistics(grouped_times, percentiles), key=lambda x: x[1], reverse=True)
     
-    for key, times in sorted_items:
-        if not times:
-            continue
-            
-        count = len(times)
-        min_time = min(times)
-        max_time = max(times)
-        mean_time = statistics.mean(times)
+    for key, count, min_time, max_time, mean_time, values in rows:
+        percentile_values = "".join(f" {value:<8.2f}" for value in values)
         
-        # Calculate percentiles
-        p50 = np.percentile(times, 50)
-        p75 = np.percentile(times, 75)
-        p99 = np.percentile(times, 99)
-        
-        print(f"{key[:39]:<40} {count:<8d} {min_time:<8.2f} {max_time:<8.2f} {mean_time:<8.2f} "
-              f"{p50:<8.2f} {p75:<8.2f} {p99:<8.2f}")
+        print(f"{key[:39]:<40} {count:<8d} {min_time:<8.2f} {max_time:<8.2f} {mean_time:<8.2f}"
+              f"{percentile_values}")
+
+
+def _report_concurrency(timeline, timeline_file=None, top=DEFAULT_CONCURRENCY_TOP):
+    """
+    Print the concurrency report and optionally write the concurrency time series.
+    
+    Args:
+        timeline (ConcurrencyTimeline): Start and end times of the calls
+        timeline_file (str): Optional CSV file for the in-flight concurrency time series
+        top (int): Number of endpoints with the highest peak parallelism to list
+    """
+    _print_concurrency_report(timeline, top)
+    if timeline_file:
+        _write_timeline(timeline, timeline_file)
+
+
+def _print_concurrency_report(timeline, top=DEFAULT_CONCURRENCY_TOP):
+    """
+    Print the overall and per-endpoint in-flight concurrency and how the 429 responses
+    and their Retry-After values relate to it.
+    
+    Args:
+        timeline (ConcurrencyTimeline): Start and end times of the calls
+        top (int): Number of endpoints with the highest peak parallelism to list
+    """
+    summary = timeline.summarize()
+    print("\nIn-Flight Concurrency:")
+    if not summary:
+        print("No calls with request and response timestamps")
+        return
+    
+    def fmt(value, spec='.2f'):
+        return "-" if value is None else format(value, spec)
+    
+    throttled_share = 100 * summary['throttled'] / summary['calls']
+    print(f"Calls: {summary['calls']}, peak in flight: {summary['peak']} at "
+          f"{timestamps.format_timestamp_us(summary['peak_time_us'], 'Z')}, "
+          f"average in flight: {summary['average']:.2f}")
+    print(f"429 responses: {summary['throttled']} ({throttled_share:.2f}%), correlation of calls in flight "
+          f"with 429s: {fmt(summary['throttle_correlation'], '.3f')}, with Retry-After: "
+          f"{fmt(summary['retry_after_correlation'], '.3f')}")
+    
+    print("-" * 52)
+    print(f"{'In flight':<12} {'Calls':<10} {'429s':<8} {'429 %':<8} {'Retry-After':<11}")
+    print("-" * 52)
+    for lowest, highest, calls, throttled, retry_after in summary['levels']:
+        levels = str(lowest) if lowest == highest else f"{lowest}-{highest}"
+        print(f"{levels:<12} {calls:<10d} {throttled:<8d} {100 * throttled / calls:<8.2f} "
+              f"{fmt(retry_after):<11}")
+    
+    print("-" * 109)
+    print(f"{'Method + URL':<40} {'Calls':<8} {'Peak':<6} {'Avg':<8} {'429s':<6} "
+          f"{'InFlt@429':<10} {'InFlt@ok':<10} {'Retry-After s':<13}")
+    print("-" * 109)
+    rows = sorted(summary['endpoints'], key=lambda x: (x[2], x[1]), reverse=True)
+    for key, calls, peak, average, throttled, throttled_level, other_level, retry_after in rows[:top]:
+        print(f"{key[:39]:<40} {calls:<8d} {peak:<6d} {average:<8.2f} {throttled:<6d} "
+              f"{fmt(throttled_level):<10} {fmt(other_level):<10} {retry_after:<13d}")
+
+
+def _write_timeline(timeline, file_path):
+    """
+    Write the in-flight concurrency time series as CSV.
+    
+    Args:
+        timeline (ConcurrencyTimeline): Start and end times of the calls
+        file_path (str): Path of the CSV file; a .gz or .zst extension compresses it
+    """
+    times, levels = timeline.series()
+    with compressed.open_output(file_path) as outfile:
+        outfile.write("timestamp,timestamp_us,in_flight\n")
+        for time_us, level in zip(times.tolist(), levels.tolist()):
+            outfile.write(f"{timestamps.format_timestamp_us(time_us, 'Z')},{time_us},{level}\n")
+    print(f"Wrote {len(times)} concurrency changes to {file_path}")
+
+
+def _print_retry_report(accounting, top=DEFAULT_RETRY_TOP):
+    """
+    Print how much time retried calls lost to backoff and failed attempts, overall,
+    per resource type and per endpoint.
+    
+    Args:
+        accounting (RetryAccounting): Retry costs per endpoint and resource type
+        top (int): Number of endpoints with the most backoff time to list
+    """
+    print("\nRetry and Rate-Limit Cost:")
+    if not accounting.calls:
+        print("No calls with request and response timestamps")
+        return
+    
+    def seconds(microseconds):
+        return microseconds / timestamps.MICROSECONDS_PER_SECOND
+    
+    def share(part, whole):
+        return 100 * part / whole if whole else 0.0
+    
+    totals = list(accounting.resource_types.values())
+    retries = sum(cost.retries for cost in totals)
+    backoff_us = sum(cost.backoff_us for cost in totals)
+    failed_us = sum(cost.failed_us for cost in totals)
+    span_us = accounting.span_us
+    waiting_us = accounting.waiting_us()
+    call_us = accounting.call_us + backoff_us
+    
+    print(f"Attempts: {accounting.calls} for {accounting.calls - retries} logical calls, "
+          f"{sum(cost.retried_calls for cost in totals)} calls retried {retries} times, "
+          f"{sum(cost.gave_up for cost in totals)} gave up after a retryable failure")
+    if accounting.pending:
+        print(f"{accounting.pending} failed attempts are still waiting for their retry and are not counted yet")
+    print(f"Log time covered by calls: {seconds(span_us):.2f} s, of which {seconds(waiting_us):.2f} s "
+          f"({share(waiting_us, span_us):.2f}%) had at least one call waiting to retry")
+    print(f"Call time: {seconds(call_us):.2f} s, of which {seconds(backoff_us):.2f} s "
+          f"({share(backoff_us, call_us):.2f}%) backing off and {seconds(failed_us):.2f} s "
+          f"({share(failed_us, call_us):.2f}%) in failed attempts; "
+          f"Retry-After requested: {sum(cost.retry_after for cost in totals)} s")
+    
+    header = (f"{'Retried':<8} {'Retries':<8} {'Gave up':<8} {'Backoff s':<10} {'Failed s':<10} "
+              f"{'Retry-After':<11} {'Backoff %':<9}")
+    for title, groups in (("Resource type", accounting.resource_types), ("Method + URL", accounting.endpoints)):
+        print("-" * 106)
+        print(f"{title:<40} {header}")
+        print("-" * 106)
+        rows = sorted(groups.items(), key=lambda item: item[1].backoff_us, reverse=True)
+        for key, cost in rows[:top]:
+            print(f"{key[:39]:<40} {cost.retried_calls:<8d} {cost.retries:<8d} {cost.gave_up:<8d} "
+                  f"{seconds(cost.backoff_us):<10.2f} {seconds(cost.failed_us):<10.2f} {cost.retry_after:<11d} "
+                  f"{share(cost.backoff_us, backoff_us):<9.2f}")
+
+
+def _parse_percentiles(value):
+    """
+    Parse a comma separated list of percentiles from the command line.
+    
+    Args:
+        value (str): Comma separated percentiles, e.g. "50,75,99,99.9"
+    
+    Returns:
+        tuple: Percentiles as floats
+    """
+    try:
+        percentiles = tuple(float(p) for p in value.split(',') if p.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid percentile list: {value}")
+    if not percentiles or any(not 0 <= p <= 100 for p in percentiles):
+        raise argparse.ArgumentTypeError("percentiles must be between 0 and 100")
+    return percentiles
 
 
 def main():
@@ -359,20 +1182,99 @@ def main():
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(
         description='Process log files to extract and analyze SDK DEBUG messages')
-    parser.add_argument('input_file', help='Path to the input log file')
-    parser.add_argument('output_file', help='Path to the output JSON file')
+    parser.add_argument('input_file', help='Path to the input log file, optionally compressed '
+                                            'with gzip or Zstandard')
+    parser.add_argument('output_file', nargs='?',
+                        help='Path to the output JSON file (optional with --stream); '
+                             'a .gz or .zst extension compresses the outputs')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse, pair and analyze in a single pass; intermediate files '
+                             'are only written when output_file is given')
+    
+    parser.add_argument('--max-inflight', type=int, default=DEFAULT_MAX_INFLIGHT,
+                        help='Maximum number of requests waiting for a response before the '
+                             'oldest are reported as orphans (default: %(default)s)')
+    parser.add_argument('--inflight-timeout', type=float, default=DEFAULT_INFLIGHT_TIMEOUT_SECONDS,
+                        help='Seconds of log time after which an unanswered request is '
+                             'reported as an orphan (default: %(default)s)')
+    
+    parser.add_argument('--stats', choices=STATS_MODES, default='exact',
+                        help='Compute exact statistics, estimate them with mergeable quantile '
+                             'sketches, or compute them exactly with vectorized NumPy arrays '
+                             '(default: %(default)s)')
+    parser.add_argument('--sketch-accuracy', type=float, default=DEFAULT_RELATIVE_ACCURACY,
+                        help='Relative error bound of the sketch percentiles (default: %(default)s)')
+    parser.add_argument('--percentiles', type=_parse_percentiles, default=DEFAULT_PERCENTILES,
+                        help='Comma separated percentiles to report (default: 50,75,99)')
+    
+    parser.add_argument('--format', choices=columnar.OUTPUT_FORMATS, default=columnar.JSON_FORMAT,
+                        help='Format of the merged records file; parquet and arrow store '
+                             'dictionary encoded columns (default: %(default)s)')
+    parser.add_argument('--follow', action='store_true',
+                        help='Tail the log while Terraform writes it and periodically print '
+                             'rolling-window statistics per endpoint')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW_SECONDS,
+                        help='With --follow, length of the rolling window in seconds (default: %(default)s)')
+    parser.add_argument('--refresh', type=float, default=DEFAULT_REFRESH_SECONDS,
+                        help='With --follow, seconds between dashboard refreshes (default: %(default)s)')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='With --stream, resume a growing log from the offset and state saved '
+                             'in FILE and update it at the end of the run')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes used to parse the log file (default: %(default)s)')
+    parser.add_argument('--concurrency', action='store_true',
+                        help='Also report the calls in flight over time, peak and average parallelism '
+                             'per endpoint and their correlation with 429s and Retry-After')
+    parser.add_argument('--timeline', metavar='FILE',
+                        help='Write the in-flight concurrency time series to a CSV file; implies '
+                             '--concurrency')
+    parser.add_argument('--retries', action='store_true',
+                        help='Also report the time lost to 429 backoff and retried attempts per '
+                             'endpoint and resource type')
+    parser.add_argument('--retry-grace', type=float, default=DEFAULT_RETRY_GRACE_SECONDS,
+                        help='With --retries, seconds after the Retry-After of a failed attempt within '
+                             'which a call to the same method and URL counts as its retry '
+                             '(default: %(default)s)')
+    parser.add_argument('--cache', action='store_true',
+                        help='Reuse the SDK DEBUG entries of a log parsed before, keyed by a hash of '
+                             'its content, from the cache in PARSE_CACHE_DIR')
+    
+    # Parse arguments; intermixed so that the optional output_file may also follow the flags
+    args = parser.parse_intermixed_args()
+    matcher = RequestResponseMatcher(args.max_inflight, args.inflight_timeout)
+    concurrency = args.concurrency or bool(args.timeline)
+    retry_accounting = RetryAccounting(args.retry_grace) if args.retries else None
+    cache = parsecache.ParseCache.from_config(cfg.Config()) if args.cache else None
+    
+    if args.follow:
+        if compressed.detect_compression(args.input_file):
+            parser.error('--follow cannot tail a compressed log')
+        follow_log_file(args.input_file, matcher, args.window, args.refresh)
+        return
+    
+    if args.checkpoint and (not args.stream or args.output_file):
+        parser.error('--checkpoint requires --stream and cannot be combined with output_file')
+    if args.checkpoint and args.cache:
+        parser.error('--cache cannot be combined with --checkpoint')
+    
+    if args.stream:
+        stream_log_file(args.input_file, args.output_file, matcher, args.stats, args.sketch_accuracy,
+                        args.percentiles, args.workers, args.format, args.checkpoint, cache,
+                        concurrency, args.timeline, retry_accounting)
+        return
     
-    # Parse arguments
-    args = parser.parse_args()
+    if not args.output_file:
+        parser.error('output_file is required unless --stream is used')
     
     # Process the log file with provided arguments
-    if process_log_file(args.input_file, args.output_file):
+    if process_log_file(args.input_file, args.output_file, args.workers, cache):
         # Merge request and response records
-        time_output_file = merge_request_response(args.output_file)
+        time_output_file = merge_request_response(args.output_file, matcher, args.format)
         
         # Analyze response times
         if time_output_file:
-            analyze_response_times(time_output_file)
+            analyze_response_times(time_output_file, args.stats, args.sketch_accuracy, args.percentiles,
+                                   concurrency, args.timeline, retry_accounting)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,272 @@
+"""
+Retry and rate-limit cost accounting for log_chomper.
+
+Every attempt of an API call has its own transaction id, so retried attempts are
+linked back into logical calls by method and raw URL: after a 429 or retryable 5xx
+response, the next call with the same method and URL that starts once its Retry-After
+has elapsed, but no later than a grace period after that, is taken to be its retry.
+Calls starting earlier are concurrent calls on the same URL, e.g. list requests of
+other resources, and several chains can be open for one URL at a time. The time
+between the failed response and the retry is backoff. Chains are closed when an
+attempt succeeds or fails with a status that is not retried, or counted as given up
+when no retry follows. The costs of each chain are added to its endpoint and to its
+resource type (the API collection of the URL).
+
+Calls are fed in the order their responses complete, as produced by the request
+matcher, so the accounting runs in the same streaming pass as the latency
+statistics. Only the open chains, the per-group totals and the backoff intervals are
+kept in memory.
+"""
+
+import os
+import sys
+from array import array
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sdk-plan-notebooks'))
+import commonlib.urlnorm as urlnorm
+from commonlib.timestamps import MICROSECONDS_PER_SECOND
+
+# Status codes the SDK retries: rate limiting and transient gateway errors
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+
+# Seconds after the Retry-After of a failed attempt within which a call with the same
+# method and URL still counts as its retry
+DEFAULT_RETRY_GRACE_SECONDS = 10
+
+# A retry may start this much before its Retry-After elapsed, as log timestamps are
+# rounded to the microsecond
+RETRY_AFTER_TOLERANCE_US = 1000
+
+
+class RetryCost:
+    """
+    Retry costs of the logical calls of one endpoint or resource type.
+    """
+
+    __slots__ = ('retried_calls', 'retries', 'gave_up', 'backoff_us', 'failed_us', 'retry_after')
+
+    def __init__(self, retried_calls=0, retries=0, gave_up=0, backoff_us=0, failed_us=0, retry_after=0):
+        self.retried_calls = retried_calls
+        self.retries = retries
+        self.gave_up = gave_up
+        self.backoff_us = backoff_us
+        self.failed_us = failed_us
+        self.retry_after = retry_after
+
+    def add(self, chain, gave_up):
+        """
+        Add the costs of a closed chain of attempts.
+
+        Args:
+            chain (_RetryChain): Attempts of one logical call
+            gave_up (bool): Whether the last attempt failed without being retried
+        """
+        self.retried_calls += chain.attempts > 1
+        self.retries += chain.attempts - 1
+        self.gave_up += gave_up
+        self.backoff_us += chain.backoff_us
+        self.failed_us += chain.failed_us
+        self.retry_after += chain.retry_after
+
+    def to_list(self):
+        """list: JSON compatible totals, restored with RetryCost(*values)."""
+        return [self.retried_calls, self.retries, self.gave_up, self.backoff_us, self.failed_us, self.retry_after]
+
+
+class _RetryChain:
+    """
+    Attempts of one logical call that have failed with a retryable status so far.
+    """
+
+    __slots__ = ('endpoint', 'resource_type', 'attempts', 'backoff_us', 'failed_us', 'retry_after', 'last_end_us',
+                 'last_retry_after')
+
+    def __init__(self, endpoint, resource_type, attempts=1, backoff_us=0, failed_us=0, retry_after=0,
+                 last_end_us=0, last_retry_after=0):
+        self.endpoint = endpoint
+        self.resource_type = resource_type
+        self.attempts = attempts
+        self.backoff_us = backoff_us
+        self.failed_us = failed_us
+        self.retry_after = retry_after
+        self.last_end_us = last_end_us
+        self.last_retry_after = last_retry_after
+
+    def to_list(self):
+        """list: JSON compatible state, restored with _RetryChain(*values)."""
+        return [self.endpoint, self.resource_type, self.attempts, self.backoff_us, self.failed_us, self.retry_after,
+                self.last_end_us, self.last_retry_after]
+
+
+class RetryAccounting:
+    """
+    Backoff and failed-attempt time of retried calls, per endpoint and resource type.
+
+    Args:
+        grace_seconds (float): Seconds after the Retry-After of a failed attempt within
+            which a call with the same method and URL still counts as its retry
+    """
+
+    def __init__(self, grace_seconds=DEFAULT_RETRY_GRACE_SECONDS):
+        self.grace_seconds = grace_seconds
+        self.calls = 0
+        self.call_us = 0
+        self.first_start_us = None
+        self.last_end_us = None
+        self.endpoints = {}
+        self.resource_types = {}
+        # (method, raw URL) -> chains whose last attempt failed with a retryable status, oldest first
+        self._open = {}
+        self._backoff_starts = array('q')
+        self._backoff_ends = array('q')
+
+    def add(self, method, url, endpoint, start_us, end_us, status_code, retry_after=0):
+        """
+        Add one completed attempt.
+
+        Args:
+            method (str): HTTP method of the call
+            url (str): Raw invocation URL of the call
+            endpoint (str): Method + normalized URL the costs are reported under
+            start_us (int): Request time in epoch microseconds
+            end_us (int): Response time in epoch microseconds
+            status_code (int): HTTP status code of the response, may be None
+            retry_after (int): Retry-After seconds of the response, 0 if absent
+        """
+        self.calls += 1
+        self.call_us += max(end_us - start_us, 0)
+        if self.first_start_us is None or start_us < self.first_start_us:
+            self.first_start_us = start_us
+        if self.last_end_us is None or end_us > self.last_end_us:
+            self.last_end_us = end_us
+
+        key = (method, url)
+        chain = None
+        chains = self._open.pop(key, None)
+        if chains:
+            still_open = []
+            for candidate in chains:
+                earliest_us = (candidate.last_end_us + candidate.last_retry_after * MICROSECONDS_PER_SECOND
+                               - RETRY_AFTER_TOLERANCE_US)
+                latest_us = (candidate.last_end_us
+                             + (candidate.last_retry_after + self.grace_seconds) * MICROSECONDS_PER_SECOND)
+                if start_us > latest_us:
+                    self._close(candidate, gave_up=True)
+                elif chain is None and start_us >= earliest_us:
+                    chain = candidate
+                else:
+                    still_open.append(candidate)
+            if still_open:
+                self._open[key] = still_open
+
+        if chain is not None:
+            chain.attempts += 1
+            chain.backoff_us += max(start_us - chain.last_end_us, 0)
+            self._backoff_starts.append(chain.last_end_us)
+            self._backoff_ends.append(max(start_us, chain.last_end_us))
+
+        if status_code in RETRYABLE_STATUSES:
+            if chain is None:
+                chain = _RetryChain(endpoint, urlnorm.resource_type(url))
+            chain.failed_us += max(end_us - start_us, 0)
+            chain.retry_after += retry_after or 0
+            chain.last_end_us = end_us
+            chain.last_retry_after = retry_after or 0
+            self._open.setdefault(key, []).append(chain)
+        elif chain is not None:
+            self._close(chain, gave_up=False)
+
+    def _close(self, chain, gave_up):
+        """Add the costs of a finished chain to its endpoint and resource type."""
+        for totals, group in ((self.endpoints, chain.endpoint), (self.resource_types, chain.resource_type)):
+            cost = totals.get(group)
+            if cost is None:
+                cost = totals[group] = RetryCost()
+            cost.add(chain, gave_up)
+
+    def finish(self):
+        """Count every chain still waiting for a retry as given up."""
+        while self._open:
+            for chain in self._open.popitem()[1]:
+                self._close(chain, gave_up=True)
+
+    def to_dict(self):
+        """
+        Serialize the accounting, including the open chains, for a checkpoint.
+
+        Returns:
+            dict: State that can be restored with from_dict
+        """
+        return {
+            'grace_seconds': self.grace_seconds,
+            'calls': self.calls,
+            'call_us': self.call_us,
+            'first_start_us': self.first_start_us,
+            'last_end_us': self.last_end_us,
+            'endpoints': {key: cost.to_list() for key, cost in self.endpoints.items()},
+            'resource_types': {key: cost.to_list() for key, cost in self.resource_types.items()},
+            'open': [[method, url, [chain.to_list() for chain in chains]]
+                     for (method, url), chains in self._open.items()],
+            'backoff_starts': self._backoff_starts.tolist(),
+            'backoff_ends': self._backoff_ends.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore accounting serialized with to_dict.
+
+        Args:
+            data (dict): Serialized accounting
+
+        Returns:
+            RetryAccounting: The restored accounting
+        """
+        accounting = cls(data['grace_seconds'])
+        accounting.calls = data['calls']
+        accounting.call_us = data['call_us']
+        accounting.first_start_us = data['first_start_us']
+        accounting.last_end_us = data['last_end_us']
+        accounting.endpoints = {key: RetryCost(*values) for key, values in data['endpoints'].items()}
+        accounting.resource_types = {key: RetryCost(*values) for key, values in data['resource_types'].items()}
+        accounting._open = {(method, url): [_RetryChain(*values) for values in chains]
+                            for method, url, chains in data['open']}
+        accounting._backoff_starts = array('q', data['backoff_starts'])
+        accounting._backoff_ends = array('q', data['backoff_ends'])
+        return accounting
+
+    @property
+    def pending(self):
+        """int: Number of failed attempts still waiting for their retry."""
+        return sum(len(chains) for chains in self._open.values())
+
+    @property
+    def span_us(self):
+        """int: Log time from the first request to the last response, in microseconds."""
+        if self.first_start_us is None:
+            return 0
+        return self.last_end_us - self.first_start_us
+
+    def waiting_us(self):
+        """
+        Compute the wall time during which at least one call was backing off.
+
+        Overlapping backoff intervals of concurrent calls are merged, so this is never
+        more than span_us.
+
+        Returns:
+            int: Microseconds of log time with a call waiting to be retried
+        """
+        if not len(self._backoff_starts):
+            return 0
+        starts = np.frombuffer(self._backoff_starts, dtype=np.int64)
+        ends = np.frombuffer(self._backoff_ends, dtype=np.int64)
+        order = np.argsort(starts, kind='stable')
+        starts = starts[order]
+        ends = ends[order]
+        # An interval starts a new merged run when it begins after every earlier one ended
+        reach = np.maximum.accumulate(ends)
+        run_starts = np.flatnonzero(np.concatenate(([True], starts[1:] > reach[:-1])))
+        return int((np.maximum.reduceat(ends, run_starts) - starts[run_starts]).sum())
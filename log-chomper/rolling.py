@@ -0,0 +1,129 @@
+"""
+Rolling-window per-endpoint statistics for the live tail mode of log_chomper.
+
+Every completed request-response pair is added once and removed once when it falls
+out of the window, so the aggregates cost O(1) per event regardless of the window
+size. Percentiles come from a DDSketch whose buckets are decremented on removal.
+"""
+
+from collections import deque
+
+from sketch import DDSketch, DEFAULT_RELATIVE_ACCURACY
+
+# Default length of the rolling window in seconds of log time
+DEFAULT_WINDOW_SECONDS = 60
+
+
+class EndpointWindow:
+    """
+    Aggregates of the calls to one method+URL currently inside the window.
+
+    Args:
+        relative_accuracy (float): Relative accuracy of the percentile sketch
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.errors = 0
+        self.throttled = 0
+        self.latencies = DDSketch(relative_accuracy)
+
+    @property
+    def count(self):
+        """int: Number of calls inside the window."""
+        return self.latencies.count
+
+    def update(self, response_time, status_code, sign):
+        """
+        Add (sign=1) or remove (sign=-1) a single call.
+
+        Args:
+            response_time (float): Response time in milliseconds
+            status_code (int): HTTP status code of the response, may be None
+            sign (int): 1 to add the call, -1 to remove it
+        """
+        if sign > 0:
+            self.latencies.add(response_time)
+        else:
+            self.latencies.remove(response_time)
+        if status_code is not None and status_code >= 400:
+            self.errors += sign
+        if status_code == 429:
+            self.throttled += sign
+
+
+class RollingWindowStats:
+    """
+    Per-endpoint counts, percentiles, error rates and 429 counts over the last
+    window_seconds of log time.
+
+    Args:
+        window_seconds (float): Length of the window in seconds of log time
+        relative_accuracy (float): Relative accuracy of the percentile sketches
+    """
+
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS,
+                 relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.window_seconds = window_seconds
+        self.relative_accuracy = relative_accuracy
+        self.endpoints = {}
+        self.latest_time = None
+        # (event time, key, response time, status code), oldest first
+        self._events = deque()
+
+    def add(self, event_time, key, response_time, status_code):
+        """
+        Add a completed call and expire the calls that left the window.
+
+        Args:
+            event_time (float): Response time stamp in epoch seconds
+            key (str): Method + normalized URL of the call
+            response_time (float): Response time in milliseconds
+            status_code (int): HTTP status code of the response, may be None
+        """
+        endpoint = self.endpoints.get(key)
+        if endpoint is None:
+            endpoint = self.endpoints[key] = EndpointWindow(self.relative_accuracy)
+        endpoint.update(response_time, status_code, 1)
+        self._events.append((event_time, key, response_time, status_code))
+
+        if self.latest_time is None or event_time > self.latest_time:
+            self.latest_time = event_time
+        self.expire(self.latest_time)
+
+    def expire(self, now):
+        """
+        Remove the calls older than window_seconds before now.
+
+        Args:
+            now (float): Current log time in epoch seconds
+        """
+        cutoff = now - self.window_seconds
+        while self._events and self._events[0][0] < cutoff:
+            _, key, response_time, status_code = self._events.popleft()
+            endpoint = self.endpoints[key]
+            endpoint.update(response_time, status_code, -1)
+            if not endpoint.count:
+                del self.endpoints[key]
+
+    def print_dashboard(self, top=20):
+        """
+        Print the busiest endpoints of the current window.
+
+        Args:
+            top (int): Number of endpoints to list
+        """
+        total = sum(endpoint.count for endpoint in self.endpoints.values())
+        throttled = sum(endpoint.throttled for endpoint in self.endpoints.values())
+        print(f"\nLast {self.window_seconds:g}s: {total} calls, {throttled} throttled (429)")
+        print("-" * 94)
+        print(f"{'Method + URL':<40} {'Count':<8} {'Per sec':<8} {'50%':<8} {'99%':<8} "
+              f"{'Err %':<8} {'429':<8}")
+        print("-" * 94)
+
+        busiest = sorted(self.endpoints.items(), key=lambda x: x[1].count, reverse=True)[:top]
+        for key, endpoint in busiest:
+            rate = endpoint.count / self.window_seconds
+            error_rate = 100 * endpoint.errors / endpoint.count
+            print(f"{key[:39]:<40} {endpoint.count:<8d} {rate:<8.2f} "
+                  f"{endpoint.latencies.percentile(50):<8.2f} {endpoint.latencies.percentile(99):<8.2f} "
+                  f"{error_rate:<8.1f} {endpoint.throttled:<8d}")
@@ -0,0 +1,197 @@
+"""
+Streaming quantile sketch used for response time statistics on large logs.
+
+The sketch follows the DDSketch algorithm (Masson, Rim and Lee, "DDSketch: A Fast
+and Fully-Mergeable Quantile Sketch with Relative-Error Guarantees", VLDB 2019).
+Values are counted in logarithmically sized buckets, so memory depends on the
+range of the values rather than on how many values were added, and two sketches
+built with the same accuracy can be merged by adding their bucket counts.
+
+Error bound: every quantile returned by the sketch is within relative_accuracy of
+the exact value at the same rank, i.e. for relative_accuracy=0.01 a p99 of 250 ms
+is reported somewhere between 247.5 ms and 252.5 ms. Count, min, max and mean are
+tracked exactly. Values at or below MIN_INDEXABLE_VALUE (response times of zero)
+are counted in a dedicated zero bucket and reported as 0.
+"""
+
+import math
+
+# Default relative accuracy of the quantiles returned by DDSketch
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Values at or below this threshold are counted in the zero bucket
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with a relative-error guarantee.
+
+    Args:
+        relative_accuracy (float): Maximum relative error of the returned quantiles,
+            between 0 and 1 (exclusive)
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value):
+        """
+        Add a single value to the sketch.
+
+        Args:
+            value (float): Value to add
+        """
+        if value > MIN_INDEXABLE_VALUE:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    # Lets a sketch stand in for a list of samples when grouping values
+    append = add
+
+    def remove(self, value):
+        """
+        Remove a value that was previously added, e.g. when it leaves a rolling window.
+
+        Count, sum, mean and the quantiles are updated exactly; min and max keep the
+        extremes of every value ever added.
+
+        Args:
+            value (float): Value to remove
+        """
+        if value > MIN_INDEXABLE_VALUE:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            remaining = self.bins.get(index, 0) - 1
+            if remaining > 0:
+                self.bins[index] = remaining
+            else:
+                self.bins.pop(index, None)
+        else:
+            self.zero_count -= 1
+
+        self.count -= 1
+        self.sum -= value
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other (DDSketch): Sketch built with the same relative accuracy
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracies")
+
+        for index, bin_count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + bin_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        """float: Exact mean of the added values, or None if the sketch is empty."""
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q):
+        """
+        Estimate the value at quantile q.
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Estimated value, or None if the sketch is empty
+        """
+        if not self.count:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+
+        rank = q * (self.count - 1)
+        cumulative = self.zero_count
+        if cumulative > rank:
+            return 0.0
+
+        for index in sorted(self.bins):
+            cumulative += self.bins[index]
+            if cumulative > rank:
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    def percentile(self, p):
+        """
+        Estimate the value at percentile p.
+
+        Args:
+            p (float): Percentile between 0 and 100
+
+        Returns:
+            float: Estimated value, or None if the sketch is empty
+        """
+        return self.quantile(p / 100)
+
+    def to_dict(self):
+        """
+        Serialize the sketch to a JSON compatible dictionary.
+
+        Returns:
+            dict: Sketch state that can be restored with from_dict
+        """
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'bins': {str(index): bin_count for index, bin_count in self.bins.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore a sketch serialized with to_dict.
+
+        Args:
+            data (dict): Serialized sketch
+
+        Returns:
+            DDSketch: The restored sketch
+        """
+        sketch = cls(data['relative_accuracy'])
+        sketch.bins = {int(index): bin_count for index, bin_count in data['bins'].items()}
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.sum = data['sum']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
@@ -0,0 +1,143 @@
+"""
+Vectorized response time statistics for log_chomper.
+
+Response times are collected into two contiguous arrays, an integer endpoint code
+and a float latency per call. All per-endpoint aggregates are then computed in one
+pass over the calls sorted by (endpoint, latency): min and max are the first and
+last value of each group, sums come from np.add.reduceat, and percentiles are
+interpolated at computed offsets into each group. The percentiles use the same
+linear interpolation as np.percentile, so the results match exact mode.
+"""
+
+from array import array
+
+import numpy as np
+
+
+class GroupedLatencies:
+    """
+    Response times of all calls stored as endpoint codes plus latencies.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._key_codes = {}
+        self._codes = array('q')
+        self._latencies = array('d')
+
+    def __len__(self):
+        return len(self._latencies)
+
+    def add(self, key, latency):
+        """
+        Add the response time of one call.
+
+        Args:
+            key (str): Method + normalized URL of the call
+            latency (float): Response time in milliseconds
+        """
+        code = self._key_codes.get(key)
+        if code is None:
+            code = self._key_codes[key] = len(self.keys)
+            self.keys.append(key)
+        self._codes.append(code)
+        self._latencies.append(latency)
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        Build the arrays straight from an Arrow table of merged records.
+
+        Args:
+            table (pyarrow.Table): Table with invocation_method, normalized_url and
+                response_time_ms columns
+
+        Returns:
+            GroupedLatencies: Response times of the calls with a response time
+        """
+        import pyarrow.compute as pc
+
+        table = table.filter(pc.is_valid(table['response_time_ms']))
+        methods = pc.fill_null(pc.cast(table['invocation_method'], 'string'), 'UNKNOWN')
+        urls = pc.fill_null(pc.cast(table['normalized_url'], 'string'), 'UNKNOWN')
+        encoded = pc.binary_join_element_wise(methods, urls, ' ').combine_chunks().dictionary_encode()
+
+        grouped = cls()
+        grouped.keys = encoded.dictionary.to_pylist()
+        grouped._key_codes = {key: code for code, key in enumerate(grouped.keys)}
+        grouped._codes = array('q', encoded.indices.to_numpy(zero_copy_only=False).astype(np.int64))
+        grouped._latencies = array('d', table['response_time_ms'].to_numpy())
+        return grouped
+
+    def to_dict(self):
+        """
+        Serialize the arrays to a JSON compatible dictionary.
+
+        Returns:
+            dict: State that can be restored with from_dict
+        """
+        return {'keys': self.keys, 'codes': self._codes.tolist(), 'latencies': self._latencies.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restore arrays serialized with to_dict.
+
+        Args:
+            data (dict): Serialized arrays
+
+        Returns:
+            GroupedLatencies: The restored arrays
+        """
+        grouped = cls()
+        grouped.keys = list(data['keys'])
+        grouped._key_codes = {key: code for code, key in enumerate(grouped.keys)}
+        grouped._codes = array('q', data['codes'])
+        grouped._latencies = array('d', data['latencies'])
+        return grouped
+
+    def summarize(self, percentiles):
+        """
+        Compute count, min, max, mean and percentiles for every endpoint at once.
+
+        Args:
+            percentiles (tuple): Percentiles to compute
+
+        Returns:
+            list: (key, count, min, max, mean, list of percentile values) per endpoint
+        """
+        if not len(self):
+            return []
+
+        codes = np.frombuffer(self._codes, dtype=np.int64)
+        latencies = np.frombuffer(self._latencies, dtype=np.float64)
+
+        # Sort once by endpoint and, within an endpoint, by latency
+        order = np.lexsort((latencies, codes))
+        sorted_codes = codes[order]
+        sorted_latencies = latencies[order]
+
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1))
+        counts = np.diff(np.append(starts, len(sorted_codes)))
+        ends = starts + counts - 1
+
+        minimums = sorted_latencies[starts]
+        maximums = sorted_latencies[ends]
+        means = np.add.reduceat(sorted_latencies, starts) / counts
+
+        percentile_values = []
+        for p in percentiles:
+            position = (counts - 1) * (p / 100)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, counts - 1)
+            fraction = position - lower
+            low_values = sorted_latencies[starts + lower]
+            high_values = sorted_latencies[starts + upper]
+            percentile_values.append(low_values + (high_values - low_values) * fraction)
+
+        group_codes = sorted_codes[starts]
+        return [
+            (self.keys[group_codes[i]], int(counts[i]), float(minimums[i]), float(maximums[i]),
+             float(means[i]), [float(values[i]) for values in percentile_values])
+            for i in range(len(starts))
+        ]
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+
+import commonlib.logreader as logreader
+import commonlib.compressed as compressed
+
+# Number of leading bytes of the log file hashed to recognize it on the next run
+FINGERPRINT_BYTES = 4096
+
+# Version of the checkpoint file layout
+CHECKPOINT_VERSION = 1
+
+
+def _fingerprint(file_path, size):
+    """
+    Hashes the first bytes of a file.
+
+    Args:
+        file_path (str): Path to the file
+        size (int): Number of leading bytes to hash
+
+    Returns:
+        str: Hex digest of the leading bytes
+    """
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read(size)).hexdigest()
+
+
+class Checkpoint:
+    """
+    Byte offset and analysis state of a partially processed, growing log file.
+
+    The checkpoint records how far the log has been read together with any state
+    the caller needs to continue from there (for example in-flight transactions and
+    per-endpoint aggregates). On load the log is recognized by a hash of its first
+    bytes; if the file was truncated or replaced, the checkpoint is reset and
+    reading starts again from the beginning.
+
+    Args:
+        checkpoint_path (str): Path of the checkpoint file
+        log_path (str): Path of the log file the checkpoint belongs to
+    """
+
+    def __init__(self, checkpoint_path, log_path):
+        self.checkpoint_path = checkpoint_path
+        self.log_path = log_path
+        self.offset = 0
+        self.state = {}
+        self.fingerprint = None
+        self.fingerprint_size = 0
+        # Why a stored checkpoint was discarded, or None
+        self.reset_reason = None
+
+    @classmethod
+    def load(cls, checkpoint_path, log_path):
+        """
+        Loads the checkpoint for a log file, validating that it still applies.
+
+        Args:
+            checkpoint_path (str): Path of the checkpoint file; it does not need to exist
+            log_path (str): Path of the log file
+
+        Returns:
+            Checkpoint: The stored checkpoint, or an empty one starting at offset 0
+        """
+        checkpoint = cls(checkpoint_path, log_path)
+        if not os.path.exists(checkpoint_path):
+            return checkpoint
+
+        with open(checkpoint_path, 'r') as f:
+            stored = json.load(f)
+
+        log_size = os.path.getsize(log_path)
+        if stored.get('version') != CHECKPOINT_VERSION:
+            checkpoint.reset_reason = "checkpoint was written by a different version"
+        elif os.path.abspath(stored.get('log_path', '')) != os.path.abspath(log_path):
+            checkpoint.reset_reason = f"checkpoint belongs to {stored.get('log_path')}"
+        # Offsets into a compressed log count decompressed bytes, so only the fingerprint
+        # can tell whether it was replaced
+        elif log_size < stored['offset'] and not compressed.detect_compression(log_path):
+            checkpoint.reset_reason = "log file is shorter than the checkpoint offset"
+        elif _fingerprint(log_path, stored['fingerprint_size']) != stored['fingerprint']:
+            checkpoint.reset_reason = "log file was replaced"
+        else:
+            checkpoint.offset = stored['offset']
+            checkpoint.state = stored.get('state', {})
+            checkpoint.fingerprint = stored['fingerprint']
+            checkpoint.fingerprint_size = stored['fingerprint_size']
+        return checkpoint
+
+    def save(self, offset, state=None):
+        """
+        Atomically writes the checkpoint.
+
+        Args:
+            offset (int): Offset just past the last line processed
+            state (dict): JSON serializable state to restore on the next run
+        """
+        # Extend the fingerprint while the log is still shorter than FINGERPRINT_BYTES
+        if self.fingerprint_size < FINGERPRINT_BYTES:
+            self.fingerprint_size = min(FINGERPRINT_BYTES, os.path.getsize(self.log_path))
+            self.fingerprint = _fingerprint(self.log_path, self.fingerprint_size)
+
+        self.offset = offset
+        self.state = state if state is not None else {}
+        stored = {
+            'version': CHECKPOINT_VERSION,
+            'log_path': self.log_path,
+            'offset': self.offset,
+            'fingerprint': self.fingerprint,
+            'fingerprint_size': self.fingerprint_size,
+            'state': self.state,
+        }
+
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(stored, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+def iter_new_records(file_path, checkpoint_path, stats=None, **kwargs):
+    """
+    Parses only the lines appended to a log file since the last call.
+
+    The checkpoint offset is advanced once all new records have been consumed.
+
+    Args:
+        file_path (str): Path of the log file
+        checkpoint_path (str): Path of the checkpoint file
+        stats (logreader.ReadStats): Optional counters updated while reading
+        **kwargs: Further arguments for logreader.iter_records
+
+    Returns:
+        generator: Records parsed from the new complete lines
+
+    Example:
+        >>> new_records = list(iter_new_records(c.TERRAFORM_LOG_PATH, "terraform.log.ckpt"))
+    """
+    checkpoint = Checkpoint.load(checkpoint_path, file_path)
+    stats = stats if stats is not None else logreader.ReadStats()
+
+    yield from logreader.iter_records(file_path, stats=stats, start_offset=checkpoint.offset,
+                                      complete_lines_only=True, **kwargs)
+    checkpoint.save(stats.end_offset, checkpoint.state)
@@ -0,0 +1,488 @@
+import json
+import os
+
+import commonlib.compressed as compressed
+
+# Output formats understood by write_records and open_writer
+JSON_FORMAT = 'json'
+PARQUET_FORMAT = 'parquet'
+ARROW_FORMAT = 'arrow'
+OUTPUT_FORMATS = (JSON_FORMAT, PARQUET_FORMAT, ARROW_FORMAT)
+
+# File extensions used for each columnar format
+FORMAT_EXTENSIONS = {
+    PARQUET_FORMAT: '.parquet',
+    ARROW_FORMAT: '.arrow',
+}
+
+# Low cardinality string columns stored dictionary encoded
+DICTIONARY_COLUMNS = (
+    'debug_type',
+    'invocation_method',
+    'invocation_url',
+    'normalized_url',
+    'sanitized_url',
+    'type',
+    'module',
+    'resource_type',
+    'action',
+)
+
+# Indentation of the JSON arrays written by JsonArrayWriter
+DEFAULT_JSON_INDENT = 4
+
+# Number of records buffered by ColumnarWriter before a batch is written
+DEFAULT_BATCH_SIZE = 100000
+
+
+def _require_pyarrow():
+    """
+    Imports pyarrow, which is only needed for the columnar formats.
+
+    Returns:
+        module: The pyarrow module
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet/Arrow output: pip install pyarrow")
+    return pyarrow
+
+
+def format_from_path(file_path):
+    """
+    Guesses the format of a file from its extension.
+
+    Args:
+        file_path (str): Path of the file
+
+    Returns:
+        str: One of OUTPUT_FORMATS, defaulting to JSON
+    """
+    lowered = compressed.strip_compression_extension(file_path).lower()
+    if lowered.endswith('.parquet'):
+        return PARQUET_FORMAT
+    if lowered.endswith(('.arrow', '.feather', '.ipc')):
+        return ARROW_FORMAT
+    return JSON_FORMAT
+
+
+def _column_array(pa, name, values, dictionary_columns):
+    """
+    Converts the values of one column to an Arrow array.
+
+    Nested values are stored as JSON strings and columns mixing incompatible types
+    fall back to strings, so heterogeneous log records can always be written.
+
+    Args:
+        pa (module): The pyarrow module
+        name (str): Column name
+        values (list): Column values, None for missing values
+        dictionary_columns (iterable): Columns to dictionary encode
+
+    Returns:
+        pyarrow.Array: Column data
+    """
+    if any(isinstance(value, (dict, list)) for value in values):
+        values = [json.dumps(value) if isinstance(value, (dict, list)) else value for value in values]
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        array = pa.array([None if value is None else str(value) for value in values])
+
+    if name in dictionary_columns and pa.types.is_string(array.type):
+        array = array.dictionary_encode()
+    return array
+
+
+def records_to_table(records, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Converts a list of record dictionaries to an Arrow table.
+
+    Args:
+        records (list): Record dictionaries; missing keys become nulls
+        dictionary_columns (iterable): Columns to dictionary encode
+
+    Returns:
+        pyarrow.Table: Table with one column per record key
+    """
+    pa = _require_pyarrow()
+
+    names = list(dict.fromkeys(key for record in records for key in record))
+    if not names:
+        # Records without any key are still rows, of nulls once the columns are known
+        return pa.table({'': pa.nulls(len(records))}).drop_columns([''])
+
+    arrays = [_column_array(pa, name, [record.get(name) for record in records], dictionary_columns)
+              for name in names]
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def _merge_types(pa, current, new):
+    """
+    Returns a type that can hold the values of a column of both types.
+
+    A null column takes the other type, integers and floats widen to float64, and any
+    other mix falls back to strings, dictionary encoded if either type was.
+
+    Args:
+        pa (module): The pyarrow module
+        current (pyarrow.DataType): Type of the column so far
+        new (pyarrow.DataType): Type of the column in a new batch
+
+    Returns:
+        pyarrow.DataType: The merged type
+    """
+    if current == new or pa.types.is_null(new):
+        return current
+    if pa.types.is_null(current):
+        return new
+    if pa.types.is_integer(current) and pa.types.is_integer(new):
+        return pa.int64()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in (current, new)):
+        return pa.float64()
+    if pa.types.is_dictionary(current) or pa.types.is_dictionary(new):
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def merge_schemas(schema, other):
+    """
+    Widens a schema so that it can also hold the columns of another one.
+
+    Args:
+        schema (pyarrow.Schema): Schema of the batches written so far
+        other (pyarrow.Schema): Schema of a new batch
+
+    Returns:
+        pyarrow.Schema: The columns of schema followed by the new columns of other,
+            with the types of shared columns merged
+    """
+    pa = _require_pyarrow()
+    types = {field.name: field.type for field in schema}
+    for field in other:
+        types[field.name] = _merge_types(pa, types[field.name], field.type) if field.name in types else field.type
+    return pa.schema(list(types.items()))
+
+
+def conform_table(table, schema):
+    """
+    Casts a table to a schema, filling the columns it does not have with nulls.
+
+    Args:
+        table (pyarrow.Table): Table to cast
+        schema (pyarrow.Schema): Target schema, e.g. from merge_schemas
+
+    Returns:
+        pyarrow.Table: The table with the columns and types of schema
+
+    Raises:
+        ValueError: If the table has a column that is not in the schema
+    """
+    pa = _require_pyarrow()
+    unknown = [name for name in table.column_names if schema.get_field_index(name) < 0]
+    if unknown:
+        raise ValueError(f"Columns not in the schema: {', '.join(unknown)}")
+
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.chunked_array([pa.nulls(len(table), field.type)], field.type))
+            continue
+        column = table[field.name]
+        if column.type != field.type:
+            if pa.types.is_dictionary(field.type) and not pa.types.is_null(column.type):
+                column = column.cast(pa.string())
+            column = column.cast(field.type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def write_records(records, file_path, output_format=JSON_FORMAT, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Writes normalized records as pretty printed JSON, Parquet or Arrow IPC.
+
+    Args:
+        records (list): Record dictionaries to write
+        file_path (str): Output path
+        output_format (str): One of OUTPUT_FORMATS
+        dictionary_columns (iterable): Columns dictionary encoded in the columnar formats
+    """
+    if output_format == JSON_FORMAT:
+        writer = JsonArrayWriter(file_path)
+    else:
+        writer = ColumnarWriter(file_path, output_format, dictionary_columns, batch_size=max(len(records), 1))
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+
+def open_writer(file_path, output_format=JSON_FORMAT, dictionary_columns=DICTIONARY_COLUMNS):
+    """
+    Opens an incremental writer for records in any of the output formats.
+
+    Args:
+        file_path (str): Output path
+        output_format (str): One of OUTPUT_FORMATS
+        dictionary_columns (iterable): Columns dictionary encoded in the columnar formats
+
+    Returns:
+        JsonArrayWriter or ColumnarWriter: Writer with write(record) and close() methods
+    """
+    if output_format == JSON_FORMAT:
+        return JsonArrayWriter(file_path)
+    return ColumnarWriter(file_path, output_format, dictionary_columns)
+
+
+class JsonArrayWriter:
+    """
+    Incrementally writes records as a pretty printed JSON array.
+
+    The file is identical to json.dumps(records, indent=indent), but records are written
+    as they arrive instead of being serialized in one string. Paths ending in .gz or
+    .zst are compressed while writing.
+
+    Args:
+        file_path (str): Output path
+        indent (int): Number of spaces per indentation level
+    """
+
+    def __init__(self, file_path, indent=DEFAULT_JSON_INDENT):
+        self.file_path = file_path
+        self.count = 0
+        self._padding = '\n' + ' ' * indent
+        self._indent = indent
+        self._file = compressed.open_output(file_path)
+
+    def write(self, record):
+        """
+        Appends a single record to the array.
+
+        Args:
+            record (dict): Record to write
+        """
+        self._file.write(',' + self._padding if self.count else '[' + self._padding)
+        self._file.write(json.dumps(record, indent=self._indent).replace('\n', self._padding))
+        self.count += 1
+
+    def close(self):
+        """Closes the array and the file; closing again does nothing."""
+        if self._file.closed:
+            return
+        self._file.write('\n]' if self.count else '[]')
+        self._file.close()
+
+
+class ColumnarWriter:
+    """
+    Incrementally writes records to a Parquet or Arrow IPC file in batches.
+
+    The schema is taken from the first batch. A later batch with a new column, or with
+    values a column's type cannot hold (e.g. a column that was all null so far), widens
+    it with merge_schemas; the batches already written are then rewritten with the wider
+    schema, one at a time, so memory stays bounded by the batch size. A path
+    ending in .gz or .zst selects the format's own gzip or zstd compression (zstd for
+    Arrow IPC, which has no gzip codec), so the file stays readable by read_table.
+
+    Args:
+        file_path (str): Output path
+        output_format (str): PARQUET_FORMAT or ARROW_FORMAT
+        dictionary_columns (iterable): Columns to dictionary encode
+        batch_size (int): Number of records buffered before a batch is written
+    """
+
+    def __init__(self, file_path, output_format=PARQUET_FORMAT, dictionary_columns=DICTIONARY_COLUMNS,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        if output_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unsupported columnar format: {output_format}")
+        _require_pyarrow()
+
+        self.file_path = file_path
+        self.output_format = output_format
+        self.dictionary_columns = dictionary_columns
+        self.batch_size = batch_size
+        self.count = 0
+        self._batch = []
+        self._writer = None
+        self._schema = None
+        # Arrow IPC only: column name -> dictionary values of the batches written so far
+        self._dictionaries = {}
+
+    def write(self, record):
+        """
+        Buffers a single record, writing a batch once batch_size records are buffered.
+
+        Args:
+            record (dict): Record to write
+        """
+        self._batch.append(record)
+        self.count += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        """Writes the buffered records as one batch."""
+        if not self._batch or (self._writer is None and not any(self._batch)):
+            # The schema is taken from the first batch with a column
+            return
+
+        table = records_to_table(self._batch, self.dictionary_columns)
+        self._batch = []
+        if self._writer is None:
+            self._schema = table.schema
+            self._writer = self._open_writer(table.schema)
+        else:
+            schema = merge_schemas(self._schema, table.schema)
+            if not schema.equals(self._schema):
+                self._rewrite(schema, table)
+        self._write_table(table)
+
+    def _write_table(self, table):
+        """Writes a batch with the current schema."""
+        table = conform_table(table, self._schema)
+        if self.output_format == ARROW_FORMAT:
+            table = self._extend_dictionaries(table)
+        self._writer.write_table(table)
+
+    def _extend_dictionaries(self, table):
+        """
+        Re-encodes the dictionary columns of a batch against the values of the earlier
+        batches. An Arrow IPC file has one dictionary per column that later batches may
+        only extend, which the writer stores as dictionary deltas.
+        """
+        pa = _require_pyarrow()
+        import pyarrow.compute as pc
+
+        columns = []
+        for field, column in zip(table.schema, table.columns):
+            if pa.types.is_dictionary(field.type):
+                known = self._dictionaries.get(field.name, pa.array([], field.type.value_type))
+                chunks = []
+                for chunk in column.chunks:
+                    new_values = chunk.dictionary.filter(pc.invert(pc.is_in(chunk.dictionary, value_set=known)))
+                    if len(new_values):
+                        known = pa.concat_arrays([known, new_values])
+                    positions = pc.index_in(chunk.dictionary, value_set=known).cast(field.type.index_type)
+                    chunks.append(pa.DictionaryArray.from_arrays(pc.take(positions, chunk.indices), known))
+                self._dictionaries[field.name] = known
+                column = pa.chunked_array(chunks, field.type)
+            columns.append(column)
+        return pa.Table.from_arrays(columns, schema=table.schema)
+
+    def _rewrite(self, schema, table):
+        """
+        Rewrites the batches written so far with a wider schema before table is written.
+
+        The dictionaries of an Arrow IPC file start out with the values of table, as a
+        column that was all null so far would otherwise get an empty dictionary, which
+        cannot be extended.
+        """
+        self._writer.close()
+        previous_path = self.file_path + '.previous'
+        os.replace(self.file_path, previous_path)
+        try:
+            self._schema = schema
+            self._dictionaries = {}
+            if self.output_format == ARROW_FORMAT:
+                self._extend_dictionaries(conform_table(table, schema))
+            self._writer = self._open_writer(schema)
+            for table in _iter_tables(previous_path, self.output_format):
+                self._write_table(table)
+        finally:
+            os.remove(previous_path)
+
+    def _open_writer(self, schema):
+        """Opens the format specific Arrow writer."""
+        compression = compressed.compression_from_path(self.file_path)
+        if self.output_format == PARQUET_FORMAT:
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(self.file_path, schema, compression=compression or 'snappy')
+
+        import pyarrow.ipc as ipc
+        options = ipc.IpcWriteOptions(compression=compressed.ZSTD if compression else None,
+                                      emit_dictionary_deltas=True)
+        return ipc.new_file(self.file_path, schema, options=options)
+
+    def close(self):
+        """Writes any buffered records and closes the file."""
+        self._flush()
+        if self._writer is None:
+            # No records at all: still produce a valid, empty file
+            self._writer = self._open_writer(_require_pyarrow().schema([]))
+        self._writer.close()
+
+
+def _iter_tables(file_path, output_format):
+    """
+    Reads a Parquet or Arrow IPC file back one batch at a time.
+
+    Args:
+        file_path (str): Path of the file
+        output_format (str): PARQUET_FORMAT or ARROW_FORMAT
+
+    Returns:
+        generator: One pyarrow.Table per batch
+    """
+    pa = _require_pyarrow()
+    if output_format == PARQUET_FORMAT:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches():
+            yield pa.Table.from_batches([batch])
+        return
+
+    import pyarrow.ipc as ipc
+    with ipc.open_file(file_path) as reader:
+        for index in range(reader.num_record_batches):
+            yield pa.Table.from_batches([reader.get_batch(index)])
+
+
+def read_table(file_path, columns=None):
+    """
+    Reads a Parquet or Arrow IPC file written by this module.
+
+    Args:
+        file_path (str): Path of the file
+        columns (list): Optional subset of columns to read
+
+    Returns:
+        pyarrow.Table: The records as an Arrow table
+    """
+    _require_pyarrow()
+    if format_from_path(file_path) == PARQUET_FORMAT:
+        import pyarrow.parquet as pq
+        return pq.read_table(file_path, columns=columns)
+
+    import pyarrow.ipc as ipc
+    with ipc.open_file(file_path) as reader:
+        table = reader.read_all()
+    return table.select(columns) if columns else table
+
+
+def read_dataframe(file_path, columns=None):
+    """
+    Loads normalized records into a pandas DataFrame, whatever format they were written in.
+
+    Dictionary encoded columns become pandas categoricals.
+
+    Args:
+        file_path (str): Path of a JSON, Parquet or Arrow IPC file; JSON files may be gzip
+            or Zstandard compressed
+        columns (list): Optional subset of columns to load
+
+    Returns:
+        pandas.DataFrame: The records
+
+    Example:
+        >>> df = read_dataframe(c.NORMALIZED_GENESYS_SDK_PATH, columns=['debug_type', 'sanitized_url'])
+    """
+    import pandas as pd
+
+    if format_from_path(file_path) == JSON_FORMAT:
+        with compressed.open_input(file_path, 'r') as f:
+            df = pd.json_normalize(json.load(f))
+        return df[columns] if columns else df
+
+    return read_table(file_path, columns).to_pandas()
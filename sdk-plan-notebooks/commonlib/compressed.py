@@ -0,0 +1,226 @@
+import gzip
+import io
+import queue
+import threading
+
+# Compression formats recognized in input files and output paths
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+# Leading bytes identifying a compressed input, whatever its file name
+MAGIC_BYTES = {
+    GZIP: b'\x1f\x8b',
+    ZSTD: b'\x28\xb5\x2f\xfd',
+}
+
+# File extensions selecting the compression of an output file
+COMPRESSION_EXTENSIONS = {
+    '.gz': GZIP,
+    '.zst': ZSTD,
+}
+
+# Compression levels favoring speed, as the outputs are large and rewritten often
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Size of the decompressed blocks handed from the decompression thread to the parser,
+# and number of blocks the thread may read ahead
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+DEFAULT_PREFETCH_BLOCKS = 8
+
+
+def _require_zstandard():
+    """
+    Imports zstandard, which is only needed for .zst files.
+
+    Returns:
+        module: The zstandard module
+
+    Raises:
+        ImportError: If zstandard is not installed
+    """
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is required for .zst files: pip install zstandard")
+    return zstandard
+
+
+def detect_compression(file_path):
+    """
+    Recognizes a gzip or Zstandard compressed file by its leading bytes.
+
+    Args:
+        file_path (str): Path of the file
+
+    Returns:
+        str: GZIP or ZSTD, or None for an uncompressed file
+    """
+    with open(file_path, 'rb') as file:
+        head = file.read(4)
+    for compression, magic in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def compression_from_path(file_path):
+    """
+    Picks the compression of an output file from its extension.
+
+    Args:
+        file_path (str): Path of the file, e.g. normalized.json.zst
+
+    Returns:
+        str: GZIP or ZSTD, or None to write the file uncompressed
+    """
+    lowered = file_path.lower()
+    for extension, compression in COMPRESSION_EXTENSIONS.items():
+        if lowered.endswith(extension):
+            return compression
+    return None
+
+
+def strip_compression_extension(file_path):
+    """
+    Removes a compression extension from a path.
+
+    Args:
+        file_path (str): Path of the file
+
+    Returns:
+        str: The path without a trailing .gz or .zst
+    """
+    for extension in COMPRESSION_EXTENSIONS:
+        if file_path.lower().endswith(extension):
+            return file_path[:-len(extension)]
+    return file_path
+
+
+def open_input(file_path, mode='rb', encoding='utf-8'):
+    """
+    Opens a file for reading, decompressing it on the fly when it is compressed.
+
+    Args:
+        file_path (str): Path of the file
+        mode (str): 'rb' for bytes or 'r' for text
+        encoding (str): Encoding of the text in text mode
+
+    Returns:
+        file: Readable file object
+    """
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, mode, encoding=None if 'b' in mode else encoding)
+
+    if compression == GZIP:
+        stream = gzip.open(file_path, 'rb')
+    else:
+        zstandard = _require_zstandard()
+        stream = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True,
+                                                            read_across_frames=True)
+        stream = io.BufferedReader(stream, DEFAULT_BLOCK_SIZE)
+    return stream if 'b' in mode else io.TextIOWrapper(stream, encoding=encoding)
+
+
+def open_output(file_path, mode='w', encoding='utf-8'):
+    """
+    Opens a file for writing, compressing it when its path ends in .gz or .zst.
+
+    Args:
+        file_path (str): Path of the file
+        mode (str): 'wb' for bytes or 'w' for text
+        encoding (str): Encoding of the text in text mode
+
+    Returns:
+        file: Writable file object
+    """
+    compression = compression_from_path(file_path)
+    if compression is None:
+        return open(file_path, mode, encoding=None if 'b' in mode else encoding)
+
+    if compression == GZIP:
+        stream = gzip.open(file_path, 'wb', compresslevel=GZIP_LEVEL)
+    else:
+        zstandard = _require_zstandard()
+        stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(file_path, 'wb'),
+                                                                        closefd=True)
+    return stream if 'b' in mode else io.TextIOWrapper(stream, encoding=encoding)
+
+
+def iter_blocks(file_path, start_offset=0, complete_lines_only=False, block_size=DEFAULT_BLOCK_SIZE,
+                prefetch=DEFAULT_PREFETCH_BLOCKS):
+    """
+    Decompresses a file on a background thread and yields it in blocks of whole lines.
+
+    zlib and zstd release the GIL while decompressing, so decompression of the next
+    blocks overlaps with parsing of the current one. The thread reads at most
+    `prefetch` blocks ahead and stops when the generator is closed.
+
+    Args:
+        file_path (str): Path of a compressed or plain file
+        start_offset (int): Offset in the decompressed data of the first line to yield
+        complete_lines_only (bool): Leave out a last line without a newline, and stop
+            at the end of a truncated stream instead of failing, as for a compressed log
+            that is still being written
+        block_size (int): Approximate number of decompressed bytes per block
+        prefetch (int): Number of blocks decompressed ahead of the consumer
+
+    Returns:
+        generator: Blocks of raw bytes, each ending at a line boundary
+    """
+    blocks = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def decompress():
+        try:
+            with open_input(file_path) as stream:
+                skip = start_offset
+                while skip > 0:
+                    skipped = len(stream.read(min(skip, block_size)))
+                    if not skipped:
+                        break
+                    skip -= skipped
+                while True:
+                    try:
+                        data = stream.read(block_size)
+                    except EOFError:
+                        if not complete_lines_only:
+                            raise
+                        data = b''
+                    if not data or not put(data):
+                        break
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=decompress, name=f"decompress {file_path}", daemon=True)
+    thread.start()
+    remainder = b''
+    try:
+        while True:
+            data = blocks.get()
+            if data is done:
+                break
+            if isinstance(data, BaseException):
+                raise data
+            data = remainder + data
+            end = data.rfind(b'\n') + 1
+            remainder = data[end:]
+            if end:
+                yield data[:end]
+        if remainder and not complete_lines_only:
+            yield remainder
+    finally:
+        stop.set()
+        thread.join()
@@ -9,4 +9,13 @@ class Config:
         # Get file location from environment variable, default to current directory
         self.TERRAFORM_LOG_PATH = os.getenv('TERRAFORM_LOG_PATH', "")
         self.NORMALIZED_TERRAFORM_LOG_PATH = os.getenv('NORMALIZED_TERRAFORM_LOG_PATH', "")
-        self.NORMALIZED_GENESYS_SDK_PATH = os.getenv('NORMALIZED_GENESYS_SDK_PATH', "")
\ No newline at end of file
+        self.NORMALIZED_GENESYS_SDK_PATH = os.getenv('NORMALIZED_GENESYS_SDK_PATH', "")
+
+        # Format of the normalized output files: json, parquet or arrow
+        self.OUTPUT_FORMAT = os.getenv('OUTPUT_FORMAT', "json")
+
+        # Content-addressed cache of parsed log records shared by the notebooks and
+        # log_chomper; least recently used entries are evicted beyond PARSE_CACHE_MAX_MB,
+        # and a size of 0 disables the cache
+        self.PARSE_CACHE_DIR = os.getenv('PARSE_CACHE_DIR', str(Path.home() / ".cache" / "cxascode-analysis"))
+        self.PARSE_CACHE_MAX_MB = os.getenv('PARSE_CACHE_MAX_MB', "2048")
\ No newline at end of file
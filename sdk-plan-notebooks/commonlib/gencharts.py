@@ -20,6 +20,8 @@ def generate_plt_by_resource_type(df,resource_type):
     """
     df_refresh_start = df[df['type'] == resource_type]
     counts = df_refresh_start['resource_type'].value_counts()
+    # Categorical columns read from Parquet/Arrow also count the categories that do not occur
+    counts = counts[counts > 0]
     print(f'The total number of resource type: {resource_type} are:{len(counts)}')
 
     # create a bar graph
@@ -0,0 +1,464 @@
+import json
+import logging
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import commonlib.compressed as compressed
+
+# Size of the byte ranges handed to each worker process when parsing in parallel, and
+# of the windows of the file memory mapped at a time when scanning for markers
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+
+# Size of the blocks in which the newlines of a mapped window are counted
+LINE_COUNT_BLOCK_SIZE = 1024 * 1024
+
+
+class ReadStats:
+    """Counters collected while reading a log file"""
+
+    def __init__(self):
+        self.lines = 0
+        self.skipped = 0
+        self.decoded = 0
+        self.records = 0
+        # Offset just past the last line read, i.e. where a later read can resume
+        self.end_offset = 0
+
+    def update(self, other):
+        """
+        Adds the counters of another ReadStats instance to this one.
+
+        Args:
+            other (ReadStats): Counters collected for another part of the file
+        """
+        self.lines += other.lines
+        self.skipped += other.skipped
+        self.decoded += other.decoded
+        self.records += other.records
+
+    def summary(self):
+        """
+        Describes how many lines the prefilter saved from being decoded.
+
+        Returns:
+            str: Human readable summary of the counters
+        """
+        return (f"Read {self.lines} lines: {self.skipped} skipped by prefilter, "
+                f"{self.decoded} decoded, {self.records} records kept")
+
+
+def parse_json_line(line):
+    """
+    Parses a single line of a JSON lines file.
+
+    Args:
+        line (str): Line to parse
+
+    Returns:
+        dict: Parsed JSON record, or None if the line is not valid JSON (the error is logged)
+    """
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        logging.error(f"Failed to parse line '{line.strip()}' at line {e.lineno}: {e}")
+        return None
+
+
+def split_file(file_path, chunk_size=DEFAULT_CHUNK_SIZE, start=0, end=None):
+    """
+    Splits a file into byte ranges that start and end on line boundaries.
+
+    Args:
+        file_path (str): Path to the file to split
+        chunk_size (int): Approximate size of each range in bytes
+        start (int): Offset of the first byte to cover; must be the start of a line
+        end (int): Offset just past the last byte to cover, defaults to the file size
+
+    Returns:
+        list: List of (start, end) byte offsets covering the requested part of the file
+    """
+    file_size = os.path.getsize(file_path) if end is None else end
+    ranges = []
+    with open(file_path, 'rb') as file:
+        while start < file_size:
+            end = start + chunk_size
+            if end >= file_size:
+                end = file_size
+            else:
+                # Extend the range to the end of the line it cuts through
+                file.seek(end)
+                file.readline()
+                end = min(file.tell(), file_size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def complete_lines_end(file_path, start=0, end=None):
+    """
+    Finds the end of the last complete line of a file that may still be written to.
+
+    Args:
+        file_path (str): Path to the file
+        start (int): Offset not to search before
+        end (int): Offset to search back from, defaults to the file size
+
+    Returns:
+        int: Offset just past the last newline between start and end, or start if
+            there is no complete line
+    """
+    position = os.path.getsize(file_path) if end is None else end
+    block_size = 64 * 1024
+    with open(file_path, 'rb') as file:
+        while position > start:
+            block_start = max(start, position - block_size)
+            file.seek(block_start)
+            newline = file.read(position - block_start).rfind(b'\n')
+            if newline != -1:
+                return block_start + newline + 1
+            position = block_start
+    return start
+
+
+def _read_range(file, length):
+    """
+    Yields the lines of an open binary file up to a byte limit.
+
+    Args:
+        file (file): Binary file positioned at the start of a line
+        length (int): Number of bytes to read; must end on a line boundary
+
+    Returns:
+        generator: Raw lines as bytes
+    """
+    remaining = length
+    if remaining <= 0:
+        return
+    for raw_line in file:
+        yield raw_line
+        remaining -= len(raw_line)
+        if remaining <= 0:
+            break
+
+
+def _compile_prefilter(markers):
+    """
+    Builds a byte level test for candidate lines.
+
+    Args:
+        markers (iterable): Byte strings of which at least one must occur in a line
+
+    Returns:
+        callable: Function returning True for lines that contain one of the markers,
+            or None when no markers were given
+    """
+    if not markers:
+        return None
+    markers = tuple(markers)
+    if len(markers) == 1:
+        marker = markers[0]
+        return lambda raw_line: marker in raw_line
+    pattern = re.compile(b'|'.join(re.escape(marker) for marker in markers))
+    return lambda raw_line: pattern.search(raw_line) is not None
+
+
+def _parse_lines(lines, parse_line, stats, markers=None):
+    """
+    Parses an iterable of raw lines.
+
+    Args:
+        lines (iterable): Raw lines as bytes
+        parse_line (callable): Function turning a decoded line into a record or None
+        stats (ReadStats): Counters to update
+        markers (iterable): Optional byte strings of which at least one must occur in a
+            line for it to be decoded and parsed
+
+    Returns:
+        generator: Parsed records, skipping lines for which parse_line returned None
+    """
+    is_candidate = _compile_prefilter(markers)
+    for raw_line in lines:
+        stats.lines += 1
+        if is_candidate and not is_candidate(raw_line):
+            stats.skipped += 1
+            continue
+        stats.decoded += 1
+        record = parse_line(raw_line.decode('utf-8', errors='replace'))
+        if record is not None:
+            stats.records += 1
+            yield record
+
+
+def _find_marker(markers):
+    """
+    Builds a search for the next occurrence of any marker in a buffer.
+
+    Args:
+        markers (iterable): Byte strings to look for
+
+    Returns:
+        callable: Function (buffer, start, end) returning the offset of the next marker
+            occurrence, or -1 if there is none
+    """
+    markers = tuple(markers)
+    if len(markers) == 1:
+        marker = markers[0]
+        return lambda buffer, start, end: buffer.find(marker, start, end)
+
+    pattern = re.compile(b'|'.join(re.escape(marker) for marker in markers))
+
+    def find(buffer, start, end):
+        match = pattern.search(buffer, start, end)
+        return match.start() if match else -1
+    return find
+
+
+def _count_lines(buffer, start, end):
+    """
+    Counts the lines in a part of a buffer, including a last line without a newline.
+
+    Args:
+        buffer (mmap.mmap): Mapped file data
+        start (int): Offset of the first byte
+        end (int): Offset just past the last byte
+
+    Returns:
+        int: Number of lines
+    """
+    lines = 0
+    for block_start in range(start, end, LINE_COUNT_BLOCK_SIZE):
+        lines += buffer[block_start:min(block_start + LINE_COUNT_BLOCK_SIZE, end)].count(b'\n')
+    if end > start and buffer[end - 1:end] != b'\n':
+        lines += 1
+    return lines
+
+
+def _scan_range(file, start, end, markers, stats):
+    """
+    Yields the lines of a byte range that contain a marker, without copying the others.
+
+    The range is memory mapped and searched for the markers as bytes. Only the lines
+    around a match are copied out of the mapping; every other line is never turned
+    into a Python object.
+
+    Args:
+        file (file): Binary file
+        start (int): Offset of the first byte of the range; must be the start of a line
+        end (int): Offset just past the last byte of the range
+        markers (iterable): Byte strings of which at least one must occur in a line
+        stats (ReadStats): Counters to update with the lines scanned and skipped
+
+    Returns:
+        generator: Raw lines as bytes, including their newline
+    """
+    if end <= start:
+        return
+    find = _find_marker(markers)
+    # Mappings must start at a multiple of the allocation granularity
+    map_start = start - start % mmap.ALLOCATIONGRANULARITY
+    with mmap.mmap(file.fileno(), end - map_start, access=mmap.ACCESS_READ, offset=map_start) as buffer:
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            buffer.madvise(mmap.MADV_SEQUENTIAL)
+        position, range_end = start - map_start, end - map_start
+        matched = 0
+        while position < range_end:
+            found = find(buffer, position, range_end)
+            if found == -1:
+                break
+            line_start = buffer.rfind(b'\n', position, found) + 1 or position
+            line_end = buffer.find(b'\n', found, range_end)
+            line_end = range_end if line_end == -1 else line_end + 1
+            matched += 1
+            yield buffer[line_start:line_end]
+            position = line_end
+        lines = _count_lines(buffer, start - map_start, range_end)
+    stats.lines += lines
+    stats.skipped += lines - matched
+
+
+def _parse_scanned(file, start, end, parse_line, stats, markers):
+    """
+    Parses the lines of a byte range that contain a marker, see _scan_range.
+
+    Returns:
+        generator: Parsed records, skipping lines for which parse_line returned None
+    """
+    for raw_line in _scan_range(file, start, end, markers, stats):
+        stats.decoded += 1
+        record = parse_line(raw_line.decode('utf-8', errors='replace'))
+        if record is not None:
+            stats.records += 1
+            yield record
+
+
+def _parse_chunk(file_path, start, end, parse_line, markers=None):
+    """
+    Parses the lines in one byte range of a file. Runs inside a worker process.
+
+    Args:
+        file_path (str): Path to the file
+        start (int): Offset of the first byte of the range
+        end (int): Offset just past the last byte of the range
+        parse_line (callable): Function turning a decoded line into a record or None
+        markers (iterable): Optional byte strings used to prefilter the lines
+
+    Returns:
+        tuple: (list of parsed records, ReadStats for the range)
+    """
+    if markers:
+        stats = ReadStats()
+        with open(file_path, 'rb') as file:
+            records = list(_parse_scanned(file, start, end, parse_line, stats, markers))
+        return records, stats
+
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    return _parse_data(data, parse_line, markers)
+
+
+def _parse_data(data, parse_line, markers=None):
+    """
+    Parses a block of whole lines. Runs inside a worker process.
+
+    Args:
+        data (bytes): Raw lines
+        parse_line (callable): Function turning a decoded line into a record or None
+        markers (iterable): Optional byte strings used to prefilter the lines
+
+    Returns:
+        tuple: (list of parsed records, ReadStats for the block)
+    """
+    stats = ReadStats()
+    records = list(_parse_lines(data.splitlines(), parse_line, stats, markers))
+    return records, stats
+
+
+def iter_records(file_path, parse_line=parse_json_line, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                 stats=None, markers=None, start_offset=0, complete_lines_only=False):
+    """
+    Lazily parses the records of a line oriented log file, optionally in parallel.
+
+    With more than one worker the file is split on line boundaries into byte ranges
+    that are parsed in a process pool. Results are yielded in the original file order
+    and at most two ranges per worker are in flight at once, so memory stays bounded
+    regardless of the file size.
+
+    When markers are given, the file is memory mapped in windows of chunk_size bytes
+    and searched for them as bytes; only lines containing at least one marker are
+    copied out of the mapping, decoded and handed to parse_line.
+
+    Reading can resume from a previous stats.end_offset with start_offset. For a
+    file that is still being written set complete_lines_only, so that a partially
+    written last line is left for the next read.
+
+    gzip and Zstandard compressed files are recognized by their leading bytes and
+    decompressed on a background thread while the lines are parsed; offsets then
+    refer to the decompressed data.
+
+    Args:
+        file_path (str): Path to the log file
+        parse_line (callable): Module level function turning a decoded line into a
+            record, or None to skip the line
+        workers (int): Number of worker processes; 1 parses in the current process
+        chunk_size (int): Approximate size of each byte range handed to a worker
+        stats (ReadStats): Optional counters updated while reading
+        markers (iterable): Optional byte strings of which at least one must occur in a
+            line for it to be parsed, e.g. (b'SDK DEBUG',)
+        start_offset (int): Offset of the first line to read
+        complete_lines_only (bool): Stop at the last newline in the file
+
+    Returns:
+        generator: Parsed records in file order
+
+    Example:
+        >>> for record in iter_records("terraform.log", workers=4):
+        ...     print(record["@message"])
+    """
+    stats = stats if stats is not None else ReadStats()
+    if compressed.detect_compression(file_path):
+        yield from _iter_compressed_records(file_path, parse_line, workers, chunk_size, stats, markers,
+                                            start_offset, complete_lines_only)
+        return
+
+    end_offset = os.path.getsize(file_path)
+    if complete_lines_only:
+        end_offset = complete_lines_end(file_path, start_offset, end_offset)
+    stats.end_offset = max(start_offset, end_offset)
+
+    if workers <= 1 and markers:
+        with open(file_path, 'rb') as file:
+            for start, end in split_file(file_path, chunk_size, start_offset, end_offset):
+                yield from _parse_scanned(file, start, end, parse_line, stats, markers)
+        return
+
+    if workers <= 1:
+        with open(file_path, 'rb') as file:
+            file.seek(start_offset)
+            lines = _read_range(file, end_offset - start_offset)
+            yield from _parse_lines(lines, parse_line, stats, markers)
+        return
+
+    ranges = split_file(file_path, chunk_size, start_offset, end_offset)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for start, end in ranges:
+            pending.append(executor.submit(_parse_chunk, file_path, start, end, parse_line, markers))
+            if len(pending) >= workers * 2:
+                records, chunk_stats = pending.popleft().result()
+                stats.update(chunk_stats)
+                yield from records
+        while pending:
+            records, chunk_stats = pending.popleft().result()
+            stats.update(chunk_stats)
+            yield from records
+
+
+def _iter_compressed_records(file_path, parse_line, workers, chunk_size, stats, markers,
+                             start_offset, complete_lines_only):
+    """
+    Parses the records of a compressed log file, see iter_records.
+
+    A compressed file cannot be split into byte ranges up front, so with more than
+    one worker the decompressed lines are collected into blocks of about chunk_size
+    bytes that are parsed in the process pool.
+
+    Returns:
+        generator: Parsed records in file order
+    """
+    stats.end_offset = start_offset
+    blocks = compressed.iter_blocks(file_path, start_offset, complete_lines_only)
+
+    if workers <= 1:
+        for block in blocks:
+            stats.end_offset += len(block)
+            yield from _parse_lines(block.splitlines(), parse_line, stats, markers)
+        return
+
+    def chunks():
+        pending_blocks, size = [], 0
+        for block in blocks:
+            pending_blocks.append(block)
+            size += len(block)
+            if size >= chunk_size:
+                yield b''.join(pending_blocks)
+                pending_blocks, size = [], 0
+        if pending_blocks:
+            yield b''.join(pending_blocks)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for data in chunks():
+            stats.end_offset += len(data)
+            pending.append(executor.submit(_parse_data, data, parse_line, markers))
+            if len(pending) >= workers * 2:
+                records, chunk_stats = pending.popleft().result()
+                stats.update(chunk_stats)
+                yield from records
+        while pending:
+            records, chunk_stats = pending.popleft().result()
+            stats.update(chunk_stats)
+            yield from records
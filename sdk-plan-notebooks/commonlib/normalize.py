@@ -0,0 +1,249 @@
+import json
+import logging
+import commonlib.config as cfg
+import commonlib.logreader as logreader
+import commonlib.columnar as columnar
+import commonlib.parsecache as parsecache
+import commonlib.timestamps as timestamps
+import commonlib.urlnorm as urlnorm
+
+# Only lines containing one of these byte strings carry hook or change records
+TERRAFORM_RECORD_MARKERS = (b'"hook"', b'"change"')
+
+# Only lines containing this byte string can carry SDK debug messages
+SDK_DEBUG_MARKER = b'SDK DEBUG'
+
+# Parse cache entry kinds and version of the cached layouts: normalized Terraform records
+# and the SDK DEBUG entries of parse_sdk_entry, shared with log_chomper. Bump the version
+# whenever normalize_terraform_record or parse_sdk_entry change their output so cached
+# records are not reused
+TERRAFORM_CACHE_KIND = "terraform"
+SDK_CACHE_KIND = "sdk"
+PARSE_CACHE_VERSION = 3
+
+
+def resource_address(resource):
+    """
+    Returns the full address of a resource, including its module path and instance key.
+
+    Args:
+        resource (dict): The "resource" object of a hook or change record
+
+    Returns:
+        str: Resource address such as module.queues.genesyscloud_routing_queue.q["sales"]
+    """
+    address = resource.get("addr")
+    if address:
+        return address
+    module = resource.get("module")
+    return f"{module}.{resource['resource']}" if module else resource["resource"]
+
+
+def normalize_terraform_record(record):
+    """
+    Normalizes a single Terraform hook or change record.
+
+    Args:
+        record (dict): Raw Terraform log record
+
+    Returns:
+        dict: The normalized record, or None if the record is neither a hook nor a change
+            record. See prepdata.normalize_records for the fields.
+    """
+    hook = record.get("hook")
+    change = record.get("change")
+    if hook is None and change is None:
+        return None
+
+    if change is not None:
+        resource = change["resource"]
+        action = change["action"]
+        resource_id = "None"
+    else:
+        resource = hook["resource"]
+        action = "None"
+        # refresh_start/refresh_complete and apply_complete hooks carry the resource id
+        resource_id = hook.get("id_value") or "None"
+
+    return {
+        'resource_id': resource_id,
+        'address': resource_address(resource),
+        'timestamp': record['@timestamp'],
+        'timestamp_us': timestamps.parse_timestamp_us(record['@timestamp']),
+        'type': record['type'],
+        'module': resource["module"],
+        'resource': resource["resource"],
+        'resource_type': resource["resource_type"],
+        'resource_name': resource["resource_name"],
+        'action': action
+    }
+
+
+def parse_sdk_entry(record):
+    """
+    Extracts the JSON payload of a record carrying an SDK DEBUG message.
+
+    These entries are what the parse cache stores for SDK records, so log_chomper and the
+    notebooks parse a log the same way whether or not it was cached.
+
+    Args:
+        record (dict): Raw Terraform log record
+
+    Returns:
+        dict: The JSON payload of the message with timestamp and timestamp_us added when
+            the record has a timestamp, or None if the record is not an SDK DEBUG message
+            or its payload is not valid JSON (the error is logged)
+    """
+    msg = record.get("@message", "")
+    start = msg.find("{")
+    if "SDK DEBUG" not in msg or start < 0:
+        return None
+
+    try:
+        entry = json.loads(msg[start:])
+    except ValueError as e:
+        logging.error(f"Failed to parse SDK DEBUG payload '{msg}': {e}")
+        return None
+
+    timestamp = record.get("@timestamp")
+    if timestamp:
+        entry["timestamp"] = timestamp
+        entry["timestamp_us"] = timestamps.parse_timestamp_us(timestamp)
+    return entry
+
+
+def normalize_sdk_entry(entry):
+    """
+    Normalizes an SDK DEBUG entry produced by parse_sdk_entry.
+
+    Args:
+        entry (dict): SDK DEBUG entry, left unchanged
+
+    Returns:
+        dict: A copy of the entry with sanitized_url and an integer invocation_retry_after
+            (0 if absent or not a number) added
+    """
+    normalized = dict(entry)
+    normalized["sanitized_url"] = urlnorm.normalize_url(normalized.get("invocation_url") or "")
+
+    retry_after = normalized.get("invocation_retry_after")
+    try:
+        normalized["invocation_retry_after"] = 0 if retry_after is None else int(retry_after)
+    except (TypeError, ValueError):
+        normalized["invocation_retry_after"] = 0
+    return normalized
+
+
+def normalize_sdk_record(record):
+    """
+    Normalizes a single record carrying an SDK DEBUG message.
+
+    Args:
+        record (dict): Raw Terraform log record
+
+    Returns:
+        dict: The JSON payload of the message with timestamp, timestamp_us, sanitized_url
+            and an integer invocation_retry_after added, or None if the record is not an
+            SDK DEBUG message or its payload is not valid JSON
+    """
+    entry = parse_sdk_entry(record)
+    return None if entry is None else normalize_sdk_entry(entry)
+
+
+def iter_normalized(records, normalize):
+    """
+    Lazily normalizes records, dropping the ones the normalizer does not handle.
+
+    Args:
+        records (iterable): Raw log records
+        normalize (callable): normalize_terraform_record or normalize_sdk_record
+
+    Returns:
+        generator: Normalized records
+    """
+    for record in records:
+        normalized = normalize(record)
+        if normalized is not None:
+            yield normalized
+
+
+def route_records(records, stages):
+    """
+    Feeds every raw record through several normalizers in one pass.
+
+    Args:
+        records (iterable): Raw log records, consumed once
+        stages (list): (normalize, sinks) pairs; every record the normalizer returns is
+            passed to each sink, a callable such as list.append or a writer's write method
+
+    Returns:
+        list: Number of records routed to each stage
+    """
+    counts = [0] * len(stages)
+    for record in records:
+        for index, (normalize, sinks) in enumerate(stages):
+            normalized = normalize(record)
+            if normalized is None:
+                continue
+            counts[index] += 1
+            for sink in sinks:
+                sink(normalized)
+    return counts
+
+
+def normalize_log(file_path, workers=1, stats=None, use_cache=True):
+    """
+    Reads a log once and produces the normalized Terraform and SDK records together.
+
+    Hook/change records and SDK DEBUG records are routed to their sinks as the log is
+    parsed: the configured NORMALIZED_TERRAFORM_LOG_PATH and NORMALIZED_GENESYS_SDK_PATH
+    outputs are written incrementally in Config.OUTPUT_FORMAT, and the Terraform records
+    and SDK DEBUG entries are stored in the parse cache, so the other notebook and
+    log_chomper --cache find them without reading the log again.
+
+    Args:
+        file_path (str): Path to the log file
+        workers (int): Number of processes used to parse the file in parallel chunks
+        stats (logreader.ReadStats): Optional counters of lines skipped and decoded
+        use_cache (bool): Store the records in the parse cache configured by
+            PARSE_CACHE_DIR and PARSE_CACHE_MAX_MB
+
+    Returns:
+        tuple: (normalized Terraform records, normalized SDK records)
+
+    Example:
+        >>> terraform_records, sdk_records = normalize_log(c.TERRAFORM_LOG_PATH, workers=8)
+    """
+    c = cfg.Config()
+    terraform_records = []
+    sdk_entries = []
+    sdk_records = []
+    terraform_sinks = [terraform_records.append]
+    sdk_sinks = [sdk_records.append]
+    writers = []
+
+    def route_sdk_entry(entry):
+        normalized = normalize_sdk_entry(entry)
+        for sink in sdk_sinks:
+            sink(normalized)
+
+    try:
+        for path, sinks in ((c.NORMALIZED_TERRAFORM_LOG_PATH, terraform_sinks),
+                            (c.NORMALIZED_GENESYS_SDK_PATH, sdk_sinks)):
+            if path:
+                writers.append(columnar.open_writer(path, c.OUTPUT_FORMAT))
+                sinks.append(writers[-1].write)
+
+        records = logreader.iter_records(file_path, workers=workers, stats=stats,
+                                         markers=TERRAFORM_RECORD_MARKERS + (SDK_DEBUG_MARKER,))
+        route_records(records, [(normalize_terraform_record, terraform_sinks),
+                                (parse_sdk_entry, [sdk_entries.append, route_sdk_entry])])
+    finally:
+        for writer in writers:
+            writer.close()
+
+    if use_cache:
+        cache = parsecache.ParseCache.from_config(c)
+        cache.put(file_path, TERRAFORM_CACHE_KIND, PARSE_CACHE_VERSION, terraform_records)
+        cache.put(file_path, SDK_CACHE_KIND, PARSE_CACHE_VERSION, sdk_entries)
+    return terraform_records, sdk_records
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+# Columns describing the resource, carried over to the paired events
+RESOURCE_COLUMNS = ['address', 'module', 'resource', 'resource_type', 'resource_name']
+
+
+def pair_events(df, start_type, complete_type, progress_type=None, key='address'):
+    """
+    Pairs start and complete events of the same resource and computes their durations.
+
+    The events of both types are sorted once by resource key and time, with a start
+    placed before a complete that has the same time stamp. A start directly followed
+    by a complete of the same resource is a pair, so each resource costs O(1) after the
+    sort instead of the cross product of a merge on a non unique key.
+
+    Args:
+        df (pandas.DataFrame): Normalized Terraform records from prepdata
+        start_type (str): Type of the start events, e.g. "refresh_start"
+        complete_type (str): Type of the complete events, e.g. "refresh_complete"
+        progress_type (str): Optional type of progress events, e.g. "apply_progress";
+            a start that never completed is then paired with the last progress event of
+            its resource at or after it (and before a later start of the resource) and
+            reported with completed=False
+        key (str): Column identifying a resource
+
+    Returns:
+        pandas.DataFrame: One row per pair with the resource columns, resource_id,
+            start_timestamp, complete_timestamp, duration_seconds and completed
+
+    Example:
+        >>> refreshes = pair_events(df, "refresh_start", "refresh_complete")
+        >>> refreshes.sort_values("duration_seconds", ascending=False).head(20)
+    """
+    events = df[df['type'].isin([start_type, complete_type])]
+    events = events.assign(_is_start=(events['type'] == start_type).to_numpy())
+    events = events.sort_values([key, 'timestamp_us', '_is_start'], ascending=[True, True, False],
+                                kind='stable')
+
+    keys = events[key].to_numpy()
+    is_start = events['_is_start'].to_numpy()
+    paired = is_start[:-1] & ~is_start[1:] & (keys[:-1] == keys[1:])
+    start_positions = np.flatnonzero(paired)
+
+    starts = events.iloc[start_positions]
+    completes = events.iloc[start_positions + 1]
+    pairs = _build_pairs(starts, completes, completed=True)
+
+    if progress_type is not None:
+        # Starts not directly followed by their complete event
+        open_positions = np.flatnonzero(is_start & ~np.append(paired, False))
+        # Each progress event belongs to the latest start of its resource at or before it,
+        # so a resource applied twice only reports the progress of its open apply
+        all_starts = events[is_start].assign(_start=np.flatnonzero(is_start))[[key, 'timestamp_us', '_start']]
+        progress = df[(df['type'] == progress_type) & df[key].isin(events[key].iloc[open_positions])]
+        progress = pd.merge_asof(progress.sort_values('timestamp_us', kind='stable'),
+                                 all_starts.sort_values('timestamp_us', kind='stable'),
+                                 on='timestamp_us', by=key, direction='backward')
+        last_progress = progress[progress['_start'].isin(open_positions)].drop_duplicates('_start', keep='last')
+        open_positions = open_positions[np.isin(open_positions, last_progress['_start'])]
+        last_progress = last_progress.set_index('_start').loc[open_positions]
+        pairs = pd.concat([pairs, _build_pairs(events.iloc[open_positions], last_progress, completed=False)],
+                          ignore_index=True)
+
+    return pairs
+
+
+def _build_pairs(starts, completes, completed):
+    """
+    Combines aligned start and complete rows into one row per pair.
+
+    Args:
+        starts (pandas.DataFrame): Start events
+        completes (pandas.DataFrame): Complete or progress events in the same order
+        completed (bool): Whether the pairs end with a complete event
+
+    Returns:
+        pandas.DataFrame: The pairs
+    """
+    pairs = starts[[column for column in RESOURCE_COLUMNS if column in starts]].reset_index(drop=True)
+    # The id is only known once the resource was read or created
+    pairs['resource_id'] = completes['resource_id'].to_numpy()
+    pairs['start_timestamp'] = starts['timestamp'].to_numpy()
+    pairs['complete_timestamp'] = completes['timestamp'].to_numpy()
+    pairs['duration_seconds'] = (completes['timestamp_us'].to_numpy(dtype=float)
+                                 - starts['timestamp_us'].to_numpy(dtype=float)) / 1e6
+    pairs['completed'] = completed
+    return pairs
+
+
+def refresh_durations(df):
+    """
+    Returns how long the refresh of every resource took.
+
+    Args:
+        df (pandas.DataFrame): Normalized Terraform records from prepdata
+
+    Returns:
+        pandas.DataFrame: One row per refreshed resource, see pair_events
+    """
+    return pair_events(df, "refresh_start", "refresh_complete")
+
+
+def apply_durations(df):
+    """
+    Returns how long the apply of every resource took.
+
+    Resources whose apply never completed (for example because it failed) are reported
+    up to their last apply_progress event with completed=False.
+
+    Args:
+        df (pandas.DataFrame): Normalized Terraform records from prepdata
+
+    Returns:
+        pandas.DataFrame: One row per applied resource, see pair_events
+    """
+    return pair_events(df, "apply_start", "apply_complete", progress_type="apply_progress")
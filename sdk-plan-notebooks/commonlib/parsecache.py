@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import os
+import pickle
+import zlib
+from functools import lru_cache
+
+# Suffix of the cache entry files; anything else in the cache directory is left alone
+ENTRY_SUFFIX = '.records'
+
+# Bytes read at a time while hashing a log file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# zlib level of the stored entries: cheap to write, still shrinks the records ~10x
+COMPRESSION_LEVEL = 1
+
+
+@lru_cache(maxsize=256)
+def _file_digest(file_path, size, mtime_ns):
+    """
+    Hashes the full content of a file.
+
+    The size and modification time are part of the memoization key only, so an
+    unchanged file is hashed once per process.
+
+    Args:
+        file_path (str): Absolute path to the file
+        size (int): File size in bytes
+        mtime_ns (int): Modification time in nanoseconds
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_digest(file_path):
+    """
+    Returns the content hash of a file.
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    status = os.stat(file_path)
+    return _file_digest(os.path.abspath(file_path), status.st_size, status.st_mtime_ns)
+
+
+class ParseCache:
+    """
+    Content-addressed store of records parsed from log files.
+
+    An entry is keyed by the hash of the log file content, the kind of records
+    (for example "terraform" or "sdk") and the version of the parser that produced
+    them, so a log that is renamed or copied is still found while a log that changed
+    or a parser that changed its output is not. Entries are pickled and zlib
+    compressed. Reading an entry refreshes its modification time, and once the
+    directory grows beyond max_bytes the least recently used entries are removed.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries; created when needed
+        max_bytes (int): Total size of the entries kept; 0 disables the cache
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else ''
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates the cache configured by PARSE_CACHE_DIR and PARSE_CACHE_MAX_MB.
+
+        Args:
+            config (commonlib.config.Config): Configuration to read
+
+        Returns:
+            ParseCache: The configured cache
+        """
+        return cls(config.PARSE_CACHE_DIR, int(float(config.PARSE_CACHE_MAX_MB) * 1024 * 1024))
+
+    @property
+    def enabled(self):
+        """bool: Whether entries are read and stored."""
+        return bool(self.cache_dir) and self.max_bytes > 0
+
+    def entry_path(self, file_path, kind, version):
+        """
+        Returns the path of the entry for a log file.
+
+        Args:
+            file_path (str): Path to the log file
+            kind (str): Kind of records stored
+            version (int): Version of the parser producing the records
+
+        Returns:
+            str: Path of the cache entry
+        """
+        key = f"{file_digest(file_path)}-{kind}-v{version}"
+        return os.path.join(self.cache_dir, key + ENTRY_SUFFIX)
+
+    def get(self, file_path, kind, version):
+        """
+        Loads the records cached for a log file.
+
+        Args:
+            file_path (str): Path to the log file
+            kind (str): Kind of records stored
+            version (int): Version of the parser producing the records
+
+        Returns:
+            list: The cached records, or None if there is no usable entry
+        """
+        if not self.enabled:
+            return None
+
+        path = self.entry_path(file_path, kind, version)
+        try:
+            with open(path, 'rb') as f:
+                records = pickle.loads(zlib.decompress(f.read()))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError) as e:
+            logging.error(f"Discarding unreadable parse cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        return records
+
+    def put(self, file_path, kind, version, records):
+        """
+        Stores the records parsed from a log file and evicts old entries.
+
+        Args:
+            file_path (str): Path to the log file
+            kind (str): Kind of records stored
+            version (int): Version of the parser producing the records
+            records (list): Records to store
+        """
+        if not self.enabled:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(file_path, kind, version)
+        data = zlib.compress(pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                status = entry.stat()
+                entries.append((status.st_mtime_ns, status.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        if os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    self._remove(entry.path)
+
+    def cached(self, file_path, kind, version, parse):
+        """
+        Returns the cached records of a log file, parsing and storing them on a miss.
+
+        Args:
+            file_path (str): Path to the log file
+            kind (str): Kind of records stored
+            version (int): Version of the parser producing the records
+            parse (callable): Called with no arguments to produce the records on a miss
+
+        Returns:
+            tuple: (records, True if they were read from the cache)
+
+        Example:
+            >>> cache = ParseCache.from_config(cfg.Config())
+            >>> records, hit = cache.cached(path, "sdk", 1, lambda: parse_everything(path))
+        """
+        records = self.get(file_path, kind, version)
+        if records is not None:
+            return records, True
+
+        records = parse()
+        self.put(file_path, kind, version, records)
+        return records, False
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
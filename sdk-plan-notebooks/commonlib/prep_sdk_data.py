@@ -1,48 +1,54 @@
-import json
 import logging
-import re
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath('config.py'))))
 import commonlib.config as cfg
+import commonlib.logreader as logreader
+import commonlib.columnar as columnar
+import commonlib.checkpoint as checkpoints
+import commonlib.parsecache as parsecache
+import commonlib.normalize as normalize
+import commonlib.urlnorm as urlnorm
 
 
 # Set up logging
 logging.basicConfig(filename='parse_sdk_errors.log', level=logging.ERROR)
 
+# Only lines containing this byte string can carry SDK debug messages
+SDK_DEBUG_MARKER = normalize.SDK_DEBUG_MARKER
+
 def strip_and_replace_guid(uri):
     """
-    Strips GUIDs from a URI and replaces them with {ID} placeholder.
+    Strips GUIDs and other variable parts from a URI, producing an endpoint template.
+    
+    Uses the shared commonlib.urlnorm normalizer, so the templates match the
+    normalized_url keys produced by log_chomper.
     
     Args:
         uri (str): The URI string containing GUIDs to be replaced
         
     Returns:
-        str: The URI with all GUIDs replaced with {ID}
+        str: The URI with GUIDs replaced with {GUID} and numeric IDs with {ID}
         
     Example:
         >>> strip_and_replace_guid("http://api/123e4567-e89b-12d3-a456-426614174000/resource")
-        "http://api/{ID}/resource"
+        "http://api/{GUID}/resource"
     """
-    guid_pattern = r'\w{8}-\w{4}-\w{4}-\w{4}-\w{12}'
-    sanitized_uri=uri
-
-    # Find all GUIDs in the string
-    guids = re.findall(guid_pattern, uri)
-
-    # Replace each GUID with {guid}
-    for guid in guids:
-      replacement = '{ID}'
-      sanitized_uri = re.sub(guid, replacement, uri, flags=re.IGNORECASE)
+    return urlnorm.normalize_url(uri)
 
-    return sanitized_uri
-
-def read_json_from_file(file_path):
+def read_json_from_file(file_path, workers=1, prefilter=False, stats=None, checkpoint=None):
     """
     Reads and parses JSON records from a file, one record per line.
 
     Args:
-        file_path (str): Path to the JSON file to read
+        file_path (str): Path to the JSON file to read, optionally gzip or Zstandard compressed
+        workers (int): Number of processes used to parse the file in parallel chunks
+        prefilter (bool): Only decode lines that can contain an SDK debug message; all other
+            records are dropped, so only enable it when the records are just normalized
+            with normalize_records
+        stats (logreader.ReadStats): Optional counters of lines skipped and decoded
+        checkpoint (str): Optional checkpoint file path; when given, only the lines appended
+            since the previous call are parsed and the checkpoint is advanced
 
     Returns:
         list: List of dictionaries containing the parsed JSON records
@@ -55,37 +61,42 @@ def read_json_from_file(file_path):
         >>> print(records[0])  
         {'id': 1, 'name': 'test'}
     """
-    records = []
-    with open(file_path, 'r') as file:
-        for line in file:
-            try:
-                # Attempt to parse each record into a dictionary
-                record = json.loads(line)
-                
-                # Perform any additional processing on the parsed record here...
-                # For example, you might extract specific fields or values from the record
-                records.append(record)
-            except json.JSONDecodeError as e:
-                logging.error(f"Failed to parse line '{line.strip()}' at line {e.lineno}: {e}")
-    return records
+    return list(iter_json_from_file(file_path, workers, prefilter, stats, checkpoint))
+
+def iter_json_from_file(file_path, workers=1, prefilter=False, stats=None, checkpoint=None):
+    """
+    Lazily parses JSON records from a file, one record per line.
+
+    Takes the same arguments as read_json_from_file, but yields the records as they are
+    parsed so they can be normalized without keeping the raw records in memory.
+
+    Returns:
+        generator: Parsed JSON records as dictionaries
+    """
+    markers = (SDK_DEBUG_MARKER,) if prefilter else None
+    if checkpoint:
+        return checkpoints.iter_new_records(file_path, checkpoint, workers=workers, stats=stats,
+                                            markers=markers)
+    return logreader.iter_records(file_path, workers=workers, stats=stats, markers=markers)
 
 def normalize_records(records):
     """
     Normalizes a list of log records by extracting and transforming SDK debug messages.
     
     Args:
-        records (list): List of dictionaries containing log records to normalize
+        records (iterable): Log records to normalize, e.g. from iter_json_from_file
         
     Returns:
         list: List of normalized records containing only SDK debug messages with transformed fields
         
     The function:
-    - Filters for info level SDK debug messages
+    - Filters for SDK debug messages, skipping (and logging) those whose JSON is invalid
     - Extracts JSON data from the message
-    - Adds timestamp from original record
+    - Adds timestamp from original record, also as integer epoch microseconds (timestamp_us)
     - Sanitizes URLs by replacing GUIDs
     - Normalizes retry_after values to integers
-    - Writes normalized records to a JSON file
+    - Writes normalized records to NORMALIZED_GENESYS_SDK_PATH in Config.OUTPUT_FORMAT
+      (JSON, Parquet or Arrow IPC)
     
     Example:
         >>> records = [{"@level": "info", "@message": "SDK DEBUG {...}", "@timestamp": "2023-01-01"}]
@@ -93,34 +104,47 @@ def normalize_records(records):
         >>> print(normalized[0])
         {'timestamp': '2023-01-01', 'sanitized_url': 'http://api/{ID}/resource', ...}
     """
+    c = cfg.Config()
     normalized_records = []
+    writer = columnar.open_writer(c.NORMALIZED_GENESYS_SDK_PATH, c.OUTPUT_FORMAT)
+    try:
+        for normalized in normalize.iter_normalized(records, normalize.normalize_sdk_record):
+            normalized_records.append(normalized)
+            writer.write(normalized)
+    finally:
+        writer.close()
 
-    for record in records:
-        level = record.get("@level")
-        msg = record.get("@message")
-        timestamp = record.get("@timestamp")
-        sdk_debug=False
-
-        if msg.find("SDK DEBUG")!=-1:
-            sdk_debug=True
-
-        if level=="info" and sdk_debug==True:
-           rawData= msg[20:]
-           msgJSON  = json.loads(rawData)
-           msgJSON["timestamp"]=timestamp
-           msgJSON["sanitized_url"]=strip_and_replace_guid(msgJSON["invocation_url"])
-
-           retry_after = msgJSON.get("invocation_retry_after")
-           if retry_after==None:
-              msgJSON["invocation_retry_after"]=0
-           else:
-              msgJSON["invocation_retry_after"]=int(msgJSON["invocation_retry_after"])
-           
-           normalized_records.append(msgJSON)
+    return normalized_records
 
+def load_normalized_records(file_path, workers=1, use_cache=True):
+    """
+    Reads and normalizes a log file, reusing the normalized records cached for the same
+    log content by an earlier run.
+    
+    Args:
+        file_path (str): Path to the log file
+        workers (int): Number of processes used to parse the file on a cache miss
+        use_cache (bool): Look up and store the records in the parse cache configured by
+            PARSE_CACHE_DIR and PARSE_CACHE_MAX_MB
+        
+    Returns:
+        list: Normalized SDK debug records, as returned by normalize_records
+        
+    The normalized records are written to NORMALIZED_GENESYS_SDK_PATH on a cache hit as
+    well.
+    
+    Example:
+        >>> normalized_records = load_normalized_records(c.TERRAFORM_LOG_PATH)
+    """
     c = cfg.Config()
-    with open(c.NORMALIZED_GENESYS_SDK_PATH, "w") as f:
-        pretty_json=json.dumps(normalized_records, indent=4)
-        f.write(pretty_json)        
-
-    return normalized_records
+    cache = parsecache.ParseCache.from_config(c) if use_cache else None
+    entries = None
+    if cache:
+        entries = cache.get(file_path, normalize.SDK_CACHE_KIND, normalize.PARSE_CACHE_VERSION)
+    if entries is not None:
+        records = [normalize.normalize_sdk_entry(entry) for entry in entries]
+        columnar.write_records(records, c.NORMALIZED_GENESYS_SDK_PATH, c.OUTPUT_FORMAT)
+        return records
+
+    # A single pass normalizes and caches the records of both notebooks
+    return normalize.normalize_log(file_path, workers=workers, use_cache=use_cache)[1]
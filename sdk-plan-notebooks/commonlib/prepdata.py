@@ -4,18 +4,33 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath('config.py'))))
 import commonlib.config as cfg
+import commonlib.logreader as logreader
+import commonlib.columnar as columnar
+import commonlib.checkpoint as checkpoints
+import commonlib.parsecache as parsecache
+import commonlib.normalize as normalize
 
 
 # Set up logging
 logging.basicConfig(filename='parse_errors.log', level=logging.ERROR)
 
+# Only lines containing one of these byte strings carry hook or change records
+TERRAFORM_RECORD_MARKERS = normalize.TERRAFORM_RECORD_MARKERS
 
-def read_json_from_file(file_path):
+
+def read_json_from_file(file_path, workers=1, prefilter=False, stats=None, checkpoint=None):
     """
     Reads and parses JSON records from a file, one record per line.
     
     Args:
-        file_path (str): Path to the JSON file to read
+        file_path (str): Path to the JSON file to read, optionally gzip or Zstandard compressed
+        workers (int): Number of processes used to parse the file in parallel chunks
+        prefilter (bool): Only decode lines that can contain a hook or change record; all other
+            records are dropped, so only enable it when the records are just normalized
+            with normalize_records
+        stats (logreader.ReadStats): Optional counters of lines skipped and decoded
+        checkpoint (str): Optional checkpoint file path; when given, only the lines appended
+            since the previous call are parsed and the checkpoint is advanced
         
     Returns:
         list: List of parsed JSON records as dictionaries
@@ -26,33 +41,40 @@ def read_json_from_file(file_path):
     Each line in the file should contain a complete, valid JSON object. Invalid JSON
     lines are logged as errors and skipped.
     """
-    records = []
-    with open(file_path, 'r') as file:
-        for line in file:
-            try:
-                # Attempt to parse each record into a dictionary
-                record = json.loads(line)
-                
-                # Perform any additional processing on the parsed record here...
-                # For example, you might extract specific fields or values from the record
-                records.append(record)
-            except json.JSONDecodeError as e:
-                logging.error(f"Failed to parse line '{line.strip()}' at line {e.lineno}: {e}")
-    return records
+    return list(iter_json_from_file(file_path, workers, prefilter, stats, checkpoint))
+
+def iter_json_from_file(file_path, workers=1, prefilter=False, stats=None, checkpoint=None):
+    """
+    Lazily parses JSON records from a file, one record per line.
+
+    Takes the same arguments as read_json_from_file, but yields the records as they are
+    parsed so they can be normalized without keeping the raw records in memory.
+
+    Returns:
+        generator: Parsed JSON records as dictionaries
+    """
+    markers = TERRAFORM_RECORD_MARKERS if prefilter else None
+    if checkpoint:
+        return checkpoints.iter_new_records(file_path, checkpoint, workers=workers, stats=stats,
+                                            markers=markers)
+    return logreader.iter_records(file_path, workers=workers, stats=stats, markers=markers)
 
 def normalize_records(records):
     """
     Normalizes Terraform log records into a standardized format.
     
     Args:
-        records (list): List of raw Terraform log records to normalize
+        records (iterable): Raw Terraform log records to normalize, e.g. from
+            iter_json_from_file
         
     Returns:
         list: List of normalized records with consistent fields
         
     Each normalized record contains:
-        - resource_id: ID of the resource (defaults to "None")
+        - resource_id: ID of the resource from the hook's id_value (defaults to "None")
+        - address: Full resource address including module path, unique per resource
         - timestamp: Timestamp from original record
+        - timestamp_us: Timestamp as integer epoch microseconds
         - type: Record type (e.g. refresh_start, refresh_complete)
         - module: Terraform module name
         - resource: Resource identifier
@@ -64,52 +86,49 @@ def normalize_records(records):
     1. Records with a "hook" field - typically refresh operations
     2. Records with a "change" field - resource modifications
     
-    The normalized records are also written to a JSON file at:
+    The normalized records are also written to NORMALIZED_TERRAFORM_LOG_PATH as JSON,
+    Parquet or Arrow IPC depending on Config.OUTPUT_FORMAT.
     """
+    c = cfg.Config()
     normalized_records = []
+    writer = columnar.open_writer(c.NORMALIZED_TERRAFORM_LOG_PATH, c.OUTPUT_FORMAT)
+    try:
+        for normalized in normalize.iter_normalized(records, normalize.normalize_terraform_record):
+            normalized_records.append(normalized)
+            writer.write(normalized)
+    finally:
+        writer.close()
 
+    return normalized_records
 
-    for record in records:
-        #print(record)
-        hook = record.get("hook")
-        if hook!=None:
-            resource_id = "None"
-            module = hook["resource"]["module"]
-            resource = hook["resource"]["resource"]
-            resource_name = hook["resource"]["resource_name"] 
-            resource_type =  hook["resource"]["resource_type"]
-
-            if record['type']=="refresh_start" or record['type']=="refresh_complete":
-                id=hook["id_value"]
-
-            action="None"
-
-        change = record.get("change")
-        if change!=None:
-            resource_id = "None"
-            module = change["resource"]["module"]
-            resource = change["resource"]["resource"] 
-            resource_name = change["resource"]["resource_name"] 
-            resource_type = change["resource"]["resource_type"]  
-            action =   change["action"]
-
-        parsed_record={
-            'resource_id': resource_id,
-            'timestamp': record['@timestamp'],
-            'type':    record['type'],
-            'module':  module,
-            'resource': resource,
-            'resource_type': resource_type,
-            'resource_name': resource_name,
-            'action': action
-        }
-
+def load_normalized_records(file_path, workers=1, use_cache=True):
+    """
+    Reads and normalizes a log file, reusing the normalized records cached for the same
+    log content by an earlier run.
     
-        normalized_records.append(parsed_record)
-
+    Args:
+        file_path (str): Path to the log file
+        workers (int): Number of processes used to parse the file on a cache miss
+        use_cache (bool): Look up and store the records in the parse cache configured by
+            PARSE_CACHE_DIR and PARSE_CACHE_MAX_MB
+        
+    Returns:
+        list: Normalized Terraform records, as returned by normalize_records
+        
+    The normalized records are written to NORMALIZED_TERRAFORM_LOG_PATH on a cache hit as
+    well.
+    
+    Example:
+        >>> normalized_records = load_normalized_records(c.TERRAFORM_LOG_PATH)
+    """
     c = cfg.Config()
-    with open(c.NORMALIZED_TERRAFORM_LOG_PATH,"w") as f:
-        pretty_json=json.dumps(normalized_records, indent=4)
-        f.write(pretty_json)
+    cache = parsecache.ParseCache.from_config(c) if use_cache else None
+    records = None
+    if cache:
+        records = cache.get(file_path, normalize.TERRAFORM_CACHE_KIND, normalize.PARSE_CACHE_VERSION)
+    if records is not None:
+        columnar.write_records(records, c.NORMALIZED_TERRAFORM_LOG_PATH, c.OUTPUT_FORMAT)
+        return records
 
-    return normalized_records
+    # A single pass normalizes and caches the records of both notebooks
+    return normalize.normalize_log(file_path, workers=workers, use_cache=use_cache)[0]
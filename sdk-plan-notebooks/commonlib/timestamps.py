@@ -0,0 +1,122 @@
+import time
+from datetime import datetime
+from functools import lru_cache
+
+# Length of the "YYYY-MM-DDTHH:MM:SS" prefix shared by all log timestamps
+_SECOND_PREFIX_LENGTH = 19
+
+MICROSECONDS_PER_SECOND = 1000000
+
+
+@lru_cache(maxsize=4096)
+def _epoch_seconds(second_prefix, utc_offset):
+    """
+    Converts a timestamp truncated to the second into epoch seconds.
+
+    Consecutive log lines share the same second, so the cache turns most calls into
+    a dictionary lookup.
+
+    Args:
+        second_prefix (str): "YYYY-MM-DDTHH:MM:SS"
+        utc_offset (str): "+HH:MM" / "-HH:MM", or "" for UTC
+
+    Returns:
+        int: Seconds since the epoch
+    """
+    return int(datetime.fromisoformat(second_prefix + (utc_offset or '+00:00')).timestamp())
+
+
+def parse_timestamp_us(timestamp):
+    """
+    Parses a Terraform log timestamp into integer epoch microseconds.
+
+    Handles the fixed RFC 3339 layout written by Terraform and the provider, e.g.
+    "2025-05-30T10:11:12.123456-04:00" or "2025-05-30T10:11:12.123Z", by slicing
+    the string instead of running a general ISO 8601 parser. Other layouts fall back
+    to datetime.fromisoformat.
+
+    Args:
+        timestamp (str): Timestamp from the log record
+
+    Returns:
+        int: Microseconds since the epoch, or None if the timestamp could not be parsed
+
+    Example:
+        >>> parse_timestamp_us("1970-01-01T00:00:01.5Z")
+        1500000
+    """
+    try:
+        rest = timestamp[_SECOND_PREFIX_LENGTH:]
+        microseconds = 0
+        if rest.startswith('.'):
+            digits_end = 1
+            while digits_end < len(rest) and rest[digits_end].isdigit():
+                digits_end += 1
+            microseconds = int(rest[1:digits_end][:6].ljust(6, '0'))
+            rest = rest[digits_end:]
+
+        if rest in ('Z', 'z', ''):
+            rest = ''
+        elif len(rest) != 6 or rest[0] not in '+-' or rest[3] != ':':
+            raise ValueError(timestamp)
+
+        seconds = _epoch_seconds(timestamp[:_SECOND_PREFIX_LENGTH], rest)
+        return seconds * MICROSECONDS_PER_SECOND + microseconds
+    except (ValueError, TypeError, AttributeError):
+        return _parse_timestamp_us_slow(timestamp)
+
+
+def _parse_timestamp_us_slow(timestamp):
+    """
+    Parses any ISO 8601 timestamp into integer epoch microseconds.
+
+    Args:
+        timestamp (str): Timestamp to parse
+
+    Returns:
+        int: Microseconds since the epoch, or None if the timestamp could not be parsed
+    """
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return round(parsed.timestamp() * MICROSECONDS_PER_SECOND)
+
+
+@lru_cache(maxsize=4096)
+def _second_prefix(epoch_seconds, utc_offset):
+    """
+    Formats epoch seconds as the local "YYYY-MM-DDTHH:MM:SS" of a UTC offset.
+
+    Args:
+        epoch_seconds (int): Seconds since the epoch
+        utc_offset (str): "+HH:MM" / "-HH:MM", or "Z" for UTC
+
+    Returns:
+        str: "YYYY-MM-DDTHH:MM:SS"
+    """
+    offset_seconds = 0
+    if utc_offset != 'Z':
+        offset_seconds = int(utc_offset[1:3]) * 3600 + int(utc_offset[4:6]) * 60
+        offset_seconds = -offset_seconds if utc_offset[0] == '-' else offset_seconds
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(epoch_seconds + offset_seconds))
+
+
+def format_timestamp_us(timestamp_us, utc_offset):
+    """
+    Formats epoch microseconds in the layout Terraform writes, the inverse of
+    parse_timestamp_us for timestamps with six fractional digits.
+
+    Args:
+        timestamp_us (int): Microseconds since the epoch
+        utc_offset (str): "+HH:MM" / "-HH:MM", or "Z" for UTC
+
+    Returns:
+        str: Timestamp such as "2025-05-30T10:11:12.123456-04:00"
+
+    Example:
+        >>> format_timestamp_us(1500000, "Z")
+        "1970-01-01T00:00:01.500000Z"
+    """
+    seconds, microseconds = divmod(timestamp_us, MICROSECONDS_PER_SECOND)
+    return f"{_second_prefix(seconds, utc_offset)}.{microseconds:06d}{utc_offset}"
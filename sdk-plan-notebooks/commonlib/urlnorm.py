@@ -0,0 +1,92 @@
+import re
+from functools import lru_cache
+
+# Placeholders substituted for the variable parts of a URL
+GUID_PLACEHOLDER = '{GUID}'
+ID_PLACEHOLDER = '{ID}'
+QUERY_VALUE_PLACEHOLDER = '{}'
+
+# Number of distinct raw URLs whose template is remembered
+DEFAULT_CACHE_SIZE = 65536
+
+GUID_PATTERN = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
+
+# One pass over the path: GUIDs anywhere, and whole segments that are numeric IDs or
+# long hex tokens
+_VARIABLE_PART_RE = re.compile(
+    rf'(?P<guid>{GUID_PATTERN})'
+    r'|(?<=/)(?P<id>\d+|[0-9a-f]{24,})(?=/|$)',
+    re.IGNORECASE)
+
+# Versioned API prefix of the Genesys Cloud public API paths, e.g. /api/v2/
+_API_PREFIX_RE = re.compile(r'/api/v\d+/')
+
+
+def _replace_variable_part(match):
+    return GUID_PLACEHOLDER if match.group('guid') else ID_PLACEHOLDER
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def normalize_url(url):
+    """
+    Collapses a raw API URL into an endpoint template.
+
+    GUIDs are replaced with {GUID}, path segments that are numeric IDs or long hex
+    tokens with {ID}, and query string values with {} (parameter names are kept and
+    sorted). Results are memoized in a bounded LRU cache because the same URLs repeat
+    thousands of times in a log; normalize_url.cache_info() reports the hit rate.
+
+    Args:
+        url (str): Raw invocation URL
+
+    Returns:
+        str: Normalized URL template
+
+    Example:
+        >>> normalize_url("https://api/api/v2/routing/queues/123e4567-e89b-12d3-a456-426614174000?expand=members")
+        "https://api/api/v2/routing/queues/{GUID}?expand={}"
+    """
+    if not url:
+        return url
+
+    path, _, query = url.partition('#')[0].partition('?')
+    template = _VARIABLE_PART_RE.sub(_replace_variable_part, path)
+
+    if query:
+        names = sorted({parameter.partition('=')[0] for parameter in query.split('&') if parameter})
+        template += '?' + '&'.join(f"{name}={QUERY_VALUE_PLACEHOLDER}" for name in names)
+
+    return template
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def resource_type(url):
+    """
+    Derives the API resource type a URL operates on from its path.
+
+    The resource type is the path below the /api/vN/ prefix up to the first variable
+    segment, so calls on a collection, on one of its objects and on their
+    subresources all fall under the same type.
+
+    Args:
+        url (str): Raw or normalized invocation URL
+
+    Returns:
+        str: Resource type, or "UNKNOWN" for an empty URL
+
+    Example:
+        >>> resource_type("https://api/api/v2/routing/queues/123e4567-e89b-12d3-a456-426614174000/members")
+        "routing/queues"
+    """
+    if not url:
+        return 'UNKNOWN'
+
+    path = normalize_url(url).partition('?')[0]
+    match = _API_PREFIX_RE.search(path)
+    path = path[match.end():] if match else path.partition('://')[2].partition('/')[2]
+    segments = []
+    for segment in path.split('/'):
+        if not segment or segment.startswith('{'):
+            break
+        segments.append(segment)
+    return '/'.join(segments) or 'UNKNOWN'